@@ -1,21 +1,227 @@
-import google.generativeai as genai
+import asyncio
+import threading
+import time
 from config import get_settings
-from typing import Dict, List, Optional
+from cache import ResponseCache, SingleFlight, SQLiteCache, make_cache_key
+from local_advisor import comparison_insight, explain_term, generic_explanation, loan_recommendation
+from metrics import observe_ai_call, observe_ai_coalesced, observe_local_answer
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 
 settings = get_settings()
-genai.configure(api_key=settings.gemini_api_key)
-model = genai.GenerativeModel('gemini-pro')
 
+# Created on first use by get_model(); importing the Google SDK costs more than the rest of the app
+model = None
+_model_lock = threading.Lock()
 
-def generate_loan_recommendation(
+# Bounds the number of in-flight Gemini calls across all requests
+_ai_semaphore = asyncio.Semaphore(settings.ai_max_concurrency)
+
+# Successful LLM responses keyed by normalized prompt inputs; fallbacks are never cached
+response_cache = ResponseCache(
+    maxsize=settings.ai_cache_size,
+    ttl=settings.ai_cache_ttl_seconds,
+    shared=SQLiteCache(
+        settings.ai_cache_path,
+        ttl=settings.ai_cache_ttl_seconds,
+        max_rows=settings.ai_cache_max_rows
+    ) if settings.ai_cache_path else None
+)
+
+
+class AIUnavailable(Exception):
+    """
+    Raised when AI is switched off (MATH_ONLY, AI_ROUTING=local_only, or no GEMINI_API_KEY);
+    callers serve their fallbacks.
+    """
+
+
+def ai_enabled() -> bool:
+    return not settings.math_only and settings.ai_routing != "local_only" and bool(settings.gemini_api_key)
+
+
+def ai_status() -> str:
+    if model is not None:
+        return "ready"
+    return "lazy" if ai_enabled() else "disabled"
+
+
+def use_llm(needed: bool) -> bool:
+    """
+    Routing policy (AI_ROUTING) for one request. "local_first" calls the model only when the
+    local advisor cannot answer well (`needed`), "llm_first" whenever AI is available, and
+    "local_only" never.
+    """
+    if settings.ai_routing == "local_only" or (model is None and not ai_enabled()):
+        return False
+    return needed or settings.ai_routing == "llm_first"
+
+
+def get_model():
+    """
+    Return the generative model, importing and configuring the Google SDK on first call.
+    Blocking (the import takes a while), so async code calls it through asyncio.to_thread.
+    """
+    global model
+    if model is None:
+        if not ai_enabled():
+            raise AIUnavailable("AI is disabled")
+        with _model_lock:
+            if model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=settings.gemini_api_key)
+                model = genai.GenerativeModel('gemini-pro')
+    return model
+
+
+# Identical concurrent model calls share one upstream request
+ai_flights = SingleFlight()
+
+
+def set_model(new_model):
+    """
+    Swap the generative model (e.g. for an offline fake) and return the previous one.
+    Any object with an async generate_content_async(prompt) whose result has .text works.
+    """
+    global model
+    previous = model
+    model = new_model
+    return previous
+
+
+async def _call_model(prompt: str, function: str) -> str:
+    """
+    Run one model call without blocking the event loop. Runs inside an ai_flights call whose
+    deadline (ai_timeout_seconds) includes waiting for a concurrency slot, so callers fall back
+    to their canned responses as soon as the budget runs out.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        current = model if model is not None else await asyncio.to_thread(get_model)
+        async with _ai_semaphore:
+            response = await current.generate_content_async(prompt)
+        text = response.text
+        outcome = "ok"
+        return text
+    except asyncio.CancelledError:
+        # The flight deadline passed
+        outcome = "timeout"
+        raise
+    except AIUnavailable:
+        outcome = "disabled"
+        raise
+    finally:
+        observe_ai_call(function, outcome, time.perf_counter() - started)
+
+
+async def _coalesced(key, function: str, call) -> str:
+    """
+    Run call() as the flight for `key`, or join the identical call already in flight and
+    share its result and its deadline.
+    """
+    if ai_flights.in_flight(key):
+        observe_ai_coalesced(function)
+    return await ai_flights.do(key, call, timeout=settings.ai_timeout_seconds)
+
+
+async def _generate(prompt: str, function: str) -> str:
+    """
+    One model call, shared with any identical call (same function and prompt) already in flight.
+    """
+    return await _coalesced((function, prompt), function, lambda: _call_model(prompt, function))
+
+
+async def _cached_generate(cache_key: str, prompt: str, function: str) -> str:
+    """
+    Cached model call; concurrent misses on the same cache key share one call.
+    """
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    async def call():
+        text = await _call_model(prompt, function)
+        await response_cache.set(cache_key, text)
+        return text
+    
+    return await _coalesced(cache_key, function, call)
+
+
+async def _generate_stream(prompt: str, function: str) -> AsyncIterator[str]:
+    """
+    Stream one model call, yielding text chunks as they arrive. The timeout applies to the
+    first chunk (including loading the SDK and waiting for a concurrency slot) and to each gap
+    between chunks, not to the whole generation. The slot is held until the stream ends.
+    """
+    async def start():
+        current = model if model is not None else await asyncio.to_thread(get_model)
+        await _ai_semaphore.acquire()
+        try:
+            return await current.generate_content_async(prompt, stream=True)
+        except BaseException:
+            _ai_semaphore.release()
+            raise
+    
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response = await asyncio.wait_for(start(), timeout=settings.ai_timeout_seconds)
+        try:
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=settings.ai_timeout_seconds)
+                except StopAsyncIteration:
+                    break
+                yield chunk.text
+        finally:
+            _ai_semaphore.release()
+        outcome = "ok"
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    except AIUnavailable:
+        outcome = "disabled"
+        raise
+    except (GeneratorExit, asyncio.CancelledError):
+        # The consumer went away (e.g. the client disconnected)
+        outcome = "cancelled"
+        raise
+    finally:
+        observe_ai_call(function, outcome, time.perf_counter() - started)
+
+
+async def _stream_with_fallback(prompt: str, function: str, fallback: str) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Yield ("token", text) chunks as the model produces them. If the call fails, yield
+    ("fallback", text) once with the canned response, which replaces anything streamed so far.
+    """
+    stream = _generate_stream(prompt, function)
+    try:
+        async for text in stream:
+            if text:
+                yield "token", text
+    except Exception:
+        yield "fallback", fallback
+    finally:
+        # Release the concurrency slot right away if our consumer stops early
+        await stream.aclose()
+
+
+async def generate_loan_recommendation(
     best_loan: Dict,
     user_profile: Dict,
     all_loans: List[Dict]
 ) -> str:
     """
-    Generate natural language recommendation for best loan option.
+    Generate natural language recommendation for best loan option. Without a user profile to
+    personalize for, the local advisor's recommendation is served unless AI_ROUTING is llm_first.
     """
+    if not use_llm(needed=bool(user_profile)):
+        observe_local_answer("generate_loan_recommendation")
+        return loan_recommendation(best_loan, all_loans)
+    
     prompt = f"""
 You are a friendly financial advisor in India. Explain the best loan option in 3-4 simple sentences.
 
@@ -34,20 +240,23 @@ Other Options Compared: {len(all_loans)}
 Focus on tangible benefits like monthly savings and years of loan-free living. Use conversational, encouraging tone. Avoid financial jargon.
 Keep response to 3-4 sentences maximum.
 """
-    
+
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return await _generate(prompt, "generate_loan_recommendation")
     except Exception as e:
-        # Fallback message
-        savings = abs(best_loan.get('savings_vs_first', 0))
-        return f"Based on our analysis, {best_loan['loan_name']} is your best option with a monthly EMI of ₹{best_loan['emi']:,.2f}. This choice offers the optimal balance of affordability and total cost savings. You'll be on track to financial freedom with smart loan management!"
+        return loan_recommendation(best_loan, all_loans)
 
 
-def explain_financial_term(term: str, context: Optional[Dict] = None) -> str:
+async def explain_financial_term(term: str, context: Optional[Dict] = None) -> str:
     """
-    Explain financial term in simple language with Indian context.
+    Explain financial term in simple language with Indian context. Terms in the local glossary
+    are answered without a model call unless AI_ROUTING is llm_first.
     """
+    local = explain_term(term, context)
+    if not use_llm(needed=local is None):
+        observe_local_answer("explain_financial_term")
+        return local or generic_explanation(term)
+    
     context_str = ""
     if context:
         context_str = f"\nExample context: Loan of ₹{context.get('amount', '5,00,000')} at {context.get('rate', '10')}% interest."
@@ -58,87 +267,93 @@ Use everyday language and relevant examples.{context_str}
 
 Keep it under 50 words. Be practical and helpful.
 """
-    
+
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return await _cached_generate(make_cache_key("explain", term, context or {}), prompt, "explain_financial_term")
     except Exception as e:
-        # Fallback explanations
-        fallbacks = {
-            "emi": "EMI (Equated Monthly Installment) is the fixed amount you pay every month towards your loan. It includes both the loan amount (principal) and the interest charged by the lender.",
-            "principal": "Principal is the actual loan amount you borrow from the bank. For example, if you take a ₹5 lakh loan, ₹5 lakh is your principal amount.",
-            "interest rate": "Interest rate is the cost of borrowing money, shown as a percentage. If you borrow ₹1 lakh at 10% annual interest, you'll pay ₹10,000 as interest charges per year.",
-            "processing fee": "Processing fee is a one-time charge banks levy to process your loan application. It typically ranges from 0.5% to 2% of the loan amount.",
-            "tenure": "Tenure is the time period over which you'll repay the loan. A longer tenure means lower monthly EMI but more total interest paid.",
-            "apr": "APR (Annual Percentage Rate) is the actual yearly cost of your loan including all fees and charges, not just the interest rate."
-        }
-        
-        term_lower = term.lower()
-        for key in fallbacks:
-            if key in term_lower:
-                return fallbacks[key]
-        
-        return f"{term} is an important loan term. It affects your monthly payments and total loan cost. Please consult with a financial advisor for detailed explanation."
-
-
-def generate_savings_strategy(
+        return local or generic_explanation(term)
+
+
+def _format_plan_steps(plan: Dict) -> str:
+    if not plan['prepayments']:
+        return "No prepayments: there are no savings to deploy before the loan ends."
+    return "\n".join(
+        f"{i}. **Month {step['month']}**: Prepay ₹{step['amount']:,.0f}"
+        for i, step in enumerate(plan['prepayments'], start=1)
+    )
+
+
+def _strategy_prompt(current_loan: Dict, financial_goal: str, plan: Dict) -> str:
+    return f"""
+You are a financial advisor in India. Explain this prepayment plan to the borrower in 4-6 short numbered steps.
+Use exactly these numbers; do not invent new amounts or months.
+
+Loan: ₹{current_loan['principal']:,.0f} at {current_loan['interest_rate']}% for {current_loan['tenure_months']} months
+Goal: {financial_goal}
+Emergency reserve kept aside: ₹{plan['emergency_reserve']:,.0f}
+
+Plan:
+{_format_plan_steps(plan)}
+
+Outcome: saves ₹{plan['interest_saved']:,.0f} in interest; loan closes in month {plan['new_tenure']} instead of {plan['original_tenure']}.
+"""
+
+
+def _strategy_fallback(plan: Dict) -> str:
+    if not plan['prepayments']:
+        return f"""Here's your personalized savings strategy:
+
+You have no savings to put towards prepayment before the loan ends, so your loan runs its full {plan['original_tenure']} months with ₹{plan['original_total_interest']:,.0f} in total interest.
+
+Build an emergency fund first, then put any surplus towards prepayments early in the loan, when each rupee saves the most interest."""
+    reserve_step = ""
+    if plan['emergency_reserve'] > 0:
+        reserve_step = f"Keep ₹{plan['emergency_reserve']:,.0f} aside as an emergency fund before prepaying.\n\n"
+    return f"""Here's your personalized savings strategy:
+
+{reserve_step}{_format_plan_steps(plan)}
+
+Expected outcome: Save ₹{plan['interest_saved']:,.0f} in interest and close your loan {plan['months_saved']} months early (month {plan['new_tenure']} instead of {plan['original_tenure']})!"""
+
+
+async def generate_savings_strategy(
     current_loan: Dict,
     available_savings: float,
     financial_goal: str,
-    timeline_months: int
+    timeline_months: int,
+    plan: Dict
 ) -> str:
     """
-    Generate personalized savings and prepayment strategy.
+    Narrate a prepayment plan computed by optimizer.optimize_prepayments.
+    The model only explains the plan; all amounts and months come from the optimizer.
     """
-    prompt = f"""
-You are a financial advisor creating a personalized loan prepayment strategy for an Indian borrower.
-
-Current Loan:
-- Principal: ₹{current_loan['principal']:,.2f}
-- Interest Rate: {current_loan['interest_rate']}%
-- Tenure: {current_loan['tenure_months']} months
-- Processing Fee: ₹{current_loan.get('processing_fee', 0):,.2f}
-
-User Situation:
-- Available Savings: ₹{available_savings:,.2f}
-- Financial Goal: {financial_goal}
-- Target Timeline: {timeline_months} months
-
-Create a step-by-step prepayment strategy with:
-1. Specific prepayment amounts and timing
-2. Expected savings milestones
-3. When to consider refinancing (if applicable)
-4. Realistic timeline with key dates
-
-Be specific with rupee amounts and months. Keep it actionable and encouraging.
-Format as numbered steps. Maximum 6-8 steps.
-"""
-    
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return await _generate(_strategy_prompt(current_loan, financial_goal, plan), "generate_savings_strategy")
     except Exception as e:
-        # Fallback strategy
-        monthly_prepayment = available_savings / timeline_months if timeline_months > 0 else 0
-        return f"""Here's your personalized savings strategy:
+        return _strategy_fallback(plan)
+
+
+def stream_savings_strategy(current_loan: Dict, financial_goal: str, plan: Dict) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Streaming generate_savings_strategy: ("token", text) chunks, or ("fallback", text) on failure.
+    """
+    return _stream_with_fallback(
+        _strategy_prompt(current_loan, financial_goal, plan),
+        "stream_savings_strategy",
+        _strategy_fallback(plan)
+    )
 
-1. **Month 1-3**: Build emergency fund of ₹{available_savings * 0.2:,.0f} (20% of savings) for security
-2. **Month 4**: Make first prepayment of ₹{monthly_prepayment * 3:,.0f} to reduce principal
-3. **Month 7**: Second prepayment of ₹{monthly_prepayment * 3:,.0f} - you'll start seeing interest savings
-4. **Month 12**: Review loan market for better interest rates. If you find 1-2% lower rate, consider refinancing
-5. **Month {timeline_months}**: Final prepayment of remaining ₹{available_savings * 0.4:,.0f} to achieve your goal
 
-Expected outcome: Save ₹{(available_savings * current_loan['interest_rate'] / 100):,.0f} in interest charges!"""
+CHAT_FALLBACK = "I'm here to help with your loan questions! Could you provide a bit more detail about what you'd like to know? For example, are you asking about EMI calculations, interest rates, or prepayment options?"
 
 
-def chat_with_advisor(
+def _chat_prompt(
     user_question: str,
     loan_context: Optional[Dict] = None,
-    conversation_history: Optional[List[Dict]] = None
+    conversation_history: Optional[List[Dict]] = None,
+    summary: Optional[str] = None,
+    max_history: Optional[int] = 3
 ) -> str:
-    """
-    Chatbot assistant for loan-related questions.
-    """
     context_str = ""
     if loan_context:
         context_str = f"""
@@ -148,14 +363,17 @@ User's Current Loan Context:
 - EMI: ₹{loan_context.get('emi', 'N/A')}
 - Tenure: {loan_context.get('tenure', 'N/A')} months
 """
-    
+
     history_str = ""
+    if summary:
+        history_str = f"Summary of the earlier conversation:\n{summary}\n\n"
     if conversation_history:
-        history_str = "Previous conversation:\n"
-        for item in conversation_history[-3:]:  # Last 3 exchanges
+        history_str += "Previous conversation:\n"
+        recent = conversation_history[-max_history:] if max_history else conversation_history
+        for item in recent:
             history_str += f"User: {item.get('question', '')}\nAssistant: {item.get('answer', '')}\n\n"
     
-    prompt = f"""
+    return f"""
 You are a helpful loan advisor chatbot in India. Answer the user's question in a friendly, practical way.
 {context_str}
 {history_str}
@@ -165,35 +383,115 @@ User Question: {user_question}
 Provide a clear, concise answer (3-4 sentences). If using their loan details, reference specific numbers.
 Be encouraging and helpful. If you need more information, ask follow-up questions.
 """
-    
+
+
+async def chat_with_advisor(
+    user_question: str,
+    loan_context: Optional[Dict] = None,
+    conversation_history: Optional[List[Dict]] = None,
+    summary: Optional[str] = None,
+    max_history: Optional[int] = 3
+) -> str:
+    """
+    Chatbot assistant for loan-related questions. Only the last max_history exchanges of
+    conversation_history are used (all of them when None); summary covers earlier ones.
+    """
+    prompt = _chat_prompt(user_question, loan_context, conversation_history, summary, max_history)
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return await _generate(prompt, "chat_with_advisor")
     except Exception as e:
-        return "I'm here to help with your loan questions! Could you provide a bit more detail about what you'd like to know? For example, are you asking about EMI calculations, interest rates, or prepayment options?"
+        return CHAT_FALLBACK
+
+
+def stream_chat_with_advisor(
+    user_question: str,
+    loan_context: Optional[Dict] = None,
+    conversation_history: Optional[List[Dict]] = None,
+    summary: Optional[str] = None,
+    max_history: Optional[int] = 3
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Streaming chat_with_advisor: ("token", text) chunks, or ("fallback", text) on failure.
+    """
+    return _stream_with_fallback(
+        _chat_prompt(user_question, loan_context, conversation_history, summary, max_history),
+        "stream_chat_with_advisor",
+        CHAT_FALLBACK
+    )
+
+
+def _compact_summary(summary: str, turns: List[Dict], max_chars: int) -> str:
+    """
+    Summary without the model: the borrower's questions and the first sentence of each answer,
+    dropping the oldest lines beyond max_chars.
+    """
+    lines = summary.splitlines() if summary else []
+    for turn in turns:
+        lines.append(f"User asked: {turn['question']}")
+        lines.append(f"Advisor: {turn['answer'].split('. ')[0].strip()}")
+    
+    while len(lines) > 1 and len("\n".join(lines)) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)[-max_chars:]
 
 
-def get_comparative_insight(loans: List[Dict]) -> str:
+async def summarize_conversation(summary: str, turns: List[Dict], max_chars: int) -> str:
     """
-    Generate insights comparing multiple loan options.
+    Fold chat turns that left the recent window into the running conversation summary.
+    """
+    exchanges = "\n".join(f"User: {turn['question']}\nAssistant: {turn['answer']}" for turn in turns)
+    prompt = f"""
+Update the running summary of a chat between a borrower in India and a loan advisor.
+Keep the facts the borrower shared (amounts, rates, tenures, income, goals), their open questions
+and the advice already given. Drop greetings and repetition. Reply with the summary only,
+under {max_chars // 6} words.
+
+Current summary:
+{summary or "(none yet)"}
+
+New exchanges:
+{exchanges}
+"""
+
+    try:
+        text = (await _generate(prompt, "summarize_conversation")).strip()
+        if text:
+            return text[:max_chars]
+    except Exception:
+        pass
+    return _compact_summary(summary, turns, max_chars)
+
+
+async def get_comparative_insight(loans: List[Dict]) -> str:
+    """
+    Generate insights comparing multiple loan options. The local advisor's insight, built from
+    the same compare_loans figures, is served with AI_ROUTING=local_only and when the call fails.
     """
     if not loans or len(loans) < 2:
         return "Add at least two loan options to get comparative insights."
     
+    if not use_llm(needed=True):
+        observe_local_answer("get_comparative_insight")
+        return comparison_insight(loans)
+    
     best = loans[0]
     worst = loans[-1]
     
+    # compare_loans rows carry 'name'; AI request models carry 'loan_name'
+    best_name = best.get('loan_name', best.get('name'))
+    worst_name = worst.get('loan_name', worst.get('name'))
+    
     emi_diff = worst['emi'] - best['emi']
     interest_diff = worst['total_interest'] - best['total_interest']
     
     prompt = f"""
 Compare these loan options and provide key insights in 2-3 sentences:
 
-Best Option: {best['loan_name']}
+Best Option: {best_name}
 - EMI: ₹{best['emi']:,.2f}
 - Total Interest: ₹{best['total_interest']:,.2f}
 
-Comparison Option: {worst['loan_name']}
+Comparison Option: {worst_name}
 - EMI: ₹{worst['emi']:,.2f}
 - Total Interest: ₹{worst['total_interest']:,.2f}
 
@@ -202,9 +500,14 @@ Interest Difference: ₹{interest_diff:,.2f} total
 
 Explain the real-life impact of choosing the better option. Be specific and encouraging.
 """
+
+    cache_key = make_cache_key(
+        "insight",
+        best_name, best['emi'], best['total_interest'],
+        worst_name, worst['emi'], worst['total_interest']
+    )
     
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return await _cached_generate(cache_key, prompt, "get_comparative_insight")
     except Exception as e:
-        return f"Choosing {best['loan_name']} over {worst['loan_name']} saves you ₹{emi_diff:,.2f} every month and ₹{interest_diff:,.2f} in total interest. That's significant savings you can use for other financial goals!"
+        return comparison_insight(loans)
@@ -0,0 +1,267 @@
+"""
+Benchmarks for the calculation functions and API hot paths.
+
+Runs fully offline: the Gemini model is replaced with a stub that answers instantly.
+
+    python benchmarks/bench.py                        # run and print results
+    python benchmarks/bench.py --save baseline.json   # store a baseline
+    python benchmarks/bench.py --compare baseline.json --threshold 1.25
+
+With --compare the exit code is 1 when any case's median latency is slower than the
+baseline by more than the threshold factor.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-offline")
+# No shared AI cache: rounds would read answers stored by earlier runs
+os.environ["AI_CACHE_PATH"] = ""
+
+import ai_service  # noqa: E402
+from calculations import (  # noqa: E402
+    amortization_schedule,
+    calculate_emi,
+    calculate_emi_batch,
+    calculate_prepayment_impact,
+    compare_loans,
+    generate_amortization_schedule
+)
+
+
+TENURES = [12, 60, 120, 240, 360, 480]
+COMPARISON_SIZES = [2, 10, 100, 1000]
+BATCH_SIZES = [1000, 100000]
+
+
+class StubModel:
+    """
+    Offline stand-in for the Gemini model.
+    """
+
+    class _Response:
+        text = "Stubbed AI response."
+    
+    async def generate_content_async(self, prompt, stream=False):
+        return self._Response()
+
+
+def _loans(count: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"loan_{i}",
+            "name": f"Lender {i}",
+            "principal": rng.choice([500000, 1000000, 5000000]),
+            "interest_rate": round(rng.uniform(7.5, 16.0), 2),
+            "tenure_months": rng.choice(TENURES),
+            "processing_fee": rng.choice([0, 2000, 10000, 25000])
+        }
+        for i in range(count)
+    ]
+
+
+def _measure(func: Callable, min_time: float, min_rounds: int) -> Dict:
+    """
+    Call func repeatedly for at least min_time seconds and min_rounds calls.
+    """
+    func()  # warm-up
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < min_rounds or time.perf_counter() - started < min_time:
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return _summarize(timings)
+
+
+async def _measure_async(func: Callable, min_time: float, min_rounds: int, setup: Callable = None) -> Dict:
+    """
+    Like _measure for a coroutine function; setup() runs untimed before every call.
+    """
+    setup = setup or (lambda: None)
+    setup()
+    await func()  # warm-up
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < min_rounds or time.perf_counter() - started < min_time:
+        setup()
+        t0 = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - t0)
+    return _summarize(timings)
+
+
+def _summarize(timings: List[float]) -> Dict:
+    timings.sort()
+    mean = statistics.fmean(timings)
+    return {
+        "rounds": len(timings),
+        "mean_ms": mean * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        "ops_per_sec": 1 / mean if mean > 0 else float("inf")
+    }
+
+
+def function_cases() -> Dict[str, Callable]:
+    cases = {}
+    for tenure in TENURES:
+        cases[f"calculate_emi[tenure={tenure}]"] = lambda t=tenure: calculate_emi(5000000, 9.5, t)
+        cases[f"calculate_prepayment_impact[tenure={tenure}]"] = (
+            lambda t=tenure: calculate_prepayment_impact(5000000, 9.5, t, 100000, t // 2)
+        )
+        cases[f"generate_amortization_schedule[tenure={tenure}]"] = (
+            lambda t=tenure: generate_amortization_schedule(5000000, 9.5, t)
+        )
+        cases[f"amortization_schedule.to_json[tenure={tenure}]"] = (
+            lambda t=tenure: amortization_schedule(5000000, 9.5, t).to_json()
+        )
+    for size in COMPARISON_SIZES:
+        loans = _loans(size)
+        cases[f"compare_loans[n={size}]"] = lambda l=loans: compare_loans(l)
+    for size in BATCH_SIZES:
+        loans = _loans(size)
+        columns = (
+            [loan["principal"] for loan in loans],
+            [loan["interest_rate"] for loan in loans],
+            [loan["tenure_months"] for loan in loans]
+        )
+        cases[f"calculate_emi_batch[n={size}]"] = lambda c=columns: calculate_emi_batch(*c)
+    return cases
+
+
+def endpoint_cases() -> Dict[str, tuple]:
+    cases = {
+        "POST /api/calculate-emi": (
+            "/api/calculate-emi",
+            {"principal": 5000000, "interest_rate": 9.5, "tenure_months": 240}
+        ),
+        "POST /api/calculate-prepayment": (
+            "/api/calculate-prepayment",
+            {
+                "principal": 5000000,
+                "interest_rate": 9.5,
+                "tenure_months": 240,
+                "prepayment_amount": 200000,
+                "prepayment_month": 24
+            }
+        ),
+        "POST /api/ai-explain-term": ("/api/ai-explain-term", {"term": "EMI"})
+    }
+    for tenure in (60, 240, 480):
+        cases[f"POST /api/amortization-schedule[tenure={tenure}]"] = (
+            "/api/amortization-schedule",
+            {"principal": 5000000, "interest_rate": 9.5, "tenure_months": tenure}
+        )
+    for size in COMPARISON_SIZES:
+        cases[f"POST /api/compare-loans[n={size}]"] = ("/api/compare-loans", {"loans": _loans(size)})
+    return cases
+
+
+async def run_endpoints(min_time: float, min_rounds: int, name_filter: str = "", baseline: Dict = None) -> Dict[str, Dict]:
+    try:
+        import httpx
+    except ImportError:
+        print("httpx is not installed; skipping endpoint benchmarks (pip install -r requirements-dev.txt)")
+        return {}
+    
+    from main import app, calculation_memo
+    
+    def clear_caches():
+        # Identical payloads would otherwise be served from the memo and AI response cache
+        # after the first round, timing the lookup instead of the calculation
+        calculation_memo.clear()
+        ai_service.response_cache.memory.clear()
+    
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, (path, payload) in endpoint_cases().items():
+            if name_filter not in name:
+                continue
+            
+            async def call(p=path, body=payload):
+                response = await client.post(p, json=body)
+                response.raise_for_status()
+            
+            results[name] = await _measure_async(call, min_time, min_rounds, clear_caches)
+            _print_row(name, results[name], (baseline or {}).get(name))
+    return results
+
+
+def _print_row(name: str, result: Dict, baseline: Dict = None) -> None:
+    line = (
+        f"{name:<52} {result['mean_ms']:>10.3f} {result['p50_ms']:>10.3f} "
+        f"{result['p95_ms']:>10.3f} {result['ops_per_sec']:>12.1f}"
+    )
+    if baseline:
+        line += f" {result['p50_ms'] / baseline['p50_ms']:>8.2f}x"
+    print(line)
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Names of cases whose median latency regressed by more than `threshold` times.
+    """
+    return [
+        name for name, result in results.items()
+        if name in baseline and result["p50_ms"] > baseline[name]["p50_ms"] * threshold
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="regression factor for --compare")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to spend per case")
+    parser.add_argument("--min-rounds", type=int, default=5, help="minimum calls per case")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--skip-endpoints", action="store_true", help="only benchmark functions")
+    args = parser.parse_args()
+    
+    ai_service.set_model(StubModel())
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    
+    print(f"{'case':<52} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'ops/s':>12}")
+    results = {}
+    for name, func in function_cases().items():
+        if args.filter in name:
+            results[name] = _measure(func, args.min_time, args.min_rounds)
+            _print_row(name, results[name], baseline.get(name))
+    
+    if not args.skip_endpoints:
+        results.update(asyncio.run(run_endpoints(args.min_time, args.min_rounds, args.filter, baseline)))
+    
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results
+            }, f, indent=2)
+        print(f"Saved {len(results)} results to {args.save}")
+    
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        for name in regressions:
+            print(f"REGRESSION {name}: p50 {results[name]['p50_ms']:.3f} ms vs {baseline[name]['p50_ms']:.3f} ms")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Cold-start report: how long a fresh server process takes to import the API, in each AI mode.
+
+Every run is a new interpreter, as on a scale-to-zero instance:
+
+    python benchmarks/startup.py                        # median of 5 runs per mode + slowest imports
+    python benchmarks/startup.py --save startup.json    # store a baseline
+    python benchmarks/startup.py --compare startup.json --threshold 1.25
+
+Modes: "lazy" (API key set, Google SDK loaded on the first AI request; first_ai_ms is that load),
+"math_only" (MATH_ONLY=true, the SDK is never imported) and "eager" (the SDK loaded at startup,
+as with AI_PRELOAD). The calculation worker pool is spawned on the first offloaded job rather than
+at startup, so first_offload_ms times that job, process spawn included ("-" with CALC_WORKERS=0).
+With --compare the exit code is 1 when a mode's median import or first-offload time is slower
+than the baseline by more than the threshold factor. It is 1 regardless when the lazy or math_only
+mode imported the SDK at startup.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "lazy": {"GEMINI_API_KEY": "startup-offline", "MATH_ONLY": "false"},
+    "math_only": {"GEMINI_API_KEY": "", "MATH_ONLY": "true"},
+    "eager": {"GEMINI_API_KEY": "startup-offline", "MATH_ONLY": "false"}
+}
+
+# Runs in the child process; prints one JSON line
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+import_ms = (time.perf_counter() - started) * 1000
+sdk_imported = "google.generativeai" in sys.modules
+first_offload_ms = None
+if main.worker_pool.enabled:
+    started = time.perf_counter()
+    asyncio.run(main.worker_pool.run(main.calculate_emi, 5000000, 9.5, 240))
+    first_offload_ms = (time.perf_counter() - started) * 1000
+    main.worker_pool.shutdown()
+first_ai_ms = None
+if {load_model}:
+    started = time.perf_counter()
+    main.get_model()
+    first_ai_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{
+    "import_ms": import_ms,
+    "first_ai_ms": first_ai_ms,
+    "first_offload_ms": first_offload_ms,
+    "sdk_imported": sdk_imported
+}}))
+"""
+
+
+def _env(mode: str) -> Dict[str, str]:
+    env = dict(os.environ, **MODES[mode])
+    env["PYTHONPATH"] = BACKEND_DIR
+    return env
+
+
+def run_once(mode: str) -> Dict:
+    """
+    Start a fresh interpreter, import main, run one job on the worker pool and (except in
+    math_only mode) load the model. process_ms also covers interpreter start-up and exit.
+    """
+    code = CHILD.format(load_model=mode != "math_only")
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        env=_env(mode),
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    if mode == "eager":
+        # The SDK load is part of startup rather than of the first AI request
+        result["import_ms"] += result.pop("first_ai_ms")
+        result["first_ai_ms"] = None
+        result["sdk_imported"] = True
+    return result
+
+
+def slowest_imports(mode: str, top: int) -> List[Tuple[str, float]]:
+    """
+    Direct imports of main with their cumulative import time, from python -X importtime.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        env=_env(mode),
+        capture_output=True,
+        text=True,
+        check=True
+    ).stderr
+    
+    # Lines look like "import time:   self [us] | cumulative | <2 spaces per level>name"
+    direct = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if len(name) - len(name.lstrip()) == 3:
+            direct.append((name.strip(), int(cumulative) / 1000))
+    return sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+
+
+def measure(mode: str, runs: int) -> Dict:
+    samples = [run_once(mode) for _ in range(runs)]
+    first_ai = [sample["first_ai_ms"] for sample in samples if sample["first_ai_ms"] is not None]
+    first_offload = [sample["first_offload_ms"] for sample in samples if sample["first_offload_ms"] is not None]
+    return {
+        "runs": runs,
+        "import_ms": statistics.median(sample["import_ms"] for sample in samples),
+        "process_ms": statistics.median(sample["process_ms"] for sample in samples),
+        "first_ai_ms": statistics.median(first_ai) if first_ai else None,
+        "first_offload_ms": statistics.median(first_offload) if first_offload else None,
+        "sdk_at_startup": any(sample["sdk_imported"] for sample in samples)
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    (mode, metric) pairs whose median import or first-offload time regressed beyond
+    threshold × baseline.
+    """
+    return [
+        (mode, metric) for mode, result in results.items() if mode in baseline
+        for metric in ("import_ms", "first_offload_ms")
+        if result.get(metric) is not None and baseline[mode].get(metric) is not None
+        and result[metric] > baseline[mode][metric] * threshold
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per mode")
+    parser.add_argument("--top", type=int, default=10, help="how many of the slowest imports to list")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="regression factor for --compare")
+    args = parser.parse_args()
+    
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    
+    print(
+        f"{'mode':<12} {'import ms':>10} {'process ms':>11} {'first AI ms':>12} "
+        f"{'offload ms':>11} {'baseline ms':>12}"
+    )
+    results = {}
+    for mode in MODES:
+        results[mode] = result = measure(mode, args.runs)
+        first_ai = f"{result['first_ai_ms']:.1f}" if result["first_ai_ms"] is not None else "-"
+        offload = f"{result['first_offload_ms']:.1f}" if result["first_offload_ms"] is not None else "-"
+        reference = f"{baseline[mode]['import_ms']:.1f}" if mode in baseline else "-"
+        print(
+            f"{mode:<12} {result['import_ms']:>10.1f} {result['process_ms']:>11.1f} {first_ai:>12} "
+            f"{offload:>11} {reference:>12}"
+        )
+    
+    print("\nSlowest imports of main (lazy mode, cumulative ms):")
+    for name, ms in slowest_imports("lazy", args.top):
+        print(f"  {name:<40} {ms:>8.1f}")
+    
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results
+            }, f, indent=2)
+        print(f"Saved {len(results)} results to {args.save}")
+    
+    failed = False
+    for mode in ("lazy", "math_only"):
+        if results[mode]["sdk_at_startup"]:
+            print(f"REGRESSION {mode}: google.generativeai was imported at startup")
+            failed = True
+    if args.compare:
+        for mode, metric in compare(results, baseline, args.threshold):
+            print(f"REGRESSION {mode}: {metric} {results[mode][metric]:.1f} ms vs {baseline[mode][metric]:.1f} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
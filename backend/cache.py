@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    In-process LRU cache with optional per-entry expiry.
+    Intended for use from the event loop; it is not thread-safe.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        
+        # Evict least recently used entries beyond capacity
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        value = self.get(key, default)
+        self._data.pop(key, None)
+        return value
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+    def __len__(self) -> int:
+        # Live entries only; expired ones would otherwise be counted until looked up
+        self.purge_expired()
+        return len(self._data)
+
+
+class MemoCache:
+    """
+    LRU cache of serialized responses bounded by entry count and total body size.
+    Values are (etag, body) pairs.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, etag: str, body: bytes) -> None:
+        size = len(key) + len(body)
+        if size > self.max_bytes:
+            return
+        
+        previous = self._data.pop(key, None)
+        if previous is not None:
+            self.total_bytes -= len(key) + len(previous[1])
+        
+        self._data[key] = (etag, body)
+        self.total_bytes += size
+        
+        # Evict least recently used entries until both limits hold
+        while len(self._data) > self.maxsize or self.total_bytes > self.max_bytes:
+            old_key, (_, old_body) = self._data.popitem(last=False)
+            self.total_bytes -= len(old_key) + len(old_body)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    Shared string cache backed by a local SQLite file.
+    Safe to point several worker processes at the same path. Calls block on file I/O, so async
+    code runs them in a thread (see ResponseCache). Every `sweep_every` writes, expired rows are
+    deleted and the oldest rows beyond `max_rows` are dropped, so the file stays bounded.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None, max_rows: Optional[int] = None, sweep_every: int = 100):
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.sweep_every = sweep_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            
+            value, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._writes += 1
+            if self._writes % self.sweep_every == 0:
+                self._sweep()
+
+    def sweep(self) -> None:
+        with self._lock:
+            self._sweep()
+
+    def _sweep(self) -> None:
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        if self.max_rows is not None:
+            # A replaced key gets a new rowid, so the lowest rowids are the oldest writes
+            self._conn.execute(
+                "DELETE FROM cache WHERE rowid <= (SELECT rowid FROM cache ORDER BY rowid DESC LIMIT 1 OFFSET ?)",
+                (self.max_rows,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Two-tier response cache: an in-process LRU+TTL tier in front of an optional shared tier,
+    whose blocking SQLite calls run in a worker thread. Tracks hit/miss counters per tier.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None, shared: Optional[SQLiteCache] = None):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+        
+        if self.shared is not None:
+            value = await asyncio.to_thread(self.shared.get, key)
+            if value is not None:
+                self.shared_hits += 1
+                self.memory.set(key, value)
+                return value
+        
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.set, key, value)
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.shared_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "shared_enabled": self.shared is not None
+        }
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls: the first caller for a key starts func(), later callers
+    with the same key await that same call and share its result or exception. The key is dropped
+    as soon as the call finishes, so nothing is cached beyond its flight.
+    
+    The timeout is per key: it is set by the caller that starts the flight, and every caller
+    that joins later shares that deadline. A caller that gives up (e.g. its request is cancelled)
+    does not cancel the call for the others. Intended for use from the event loop.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable], timeout: Optional[float] = None) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            self.started += 1
+            flight = asyncio.ensure_future(asyncio.wait_for(func(), timeout) if timeout is not None else func())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._land(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(flight)
+
+    def _land(self, key: Hashable, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception as retrieved even if every caller has gone
+        if not flight.cancelled() and isinstance(flight.exception(), asyncio.TimeoutError):
+            self.timeouts += 1
+
+    def stats(self) -> Dict:
+        calls = self.started + self.coalesced
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "coalesced_rate": round(self.coalesced / calls, 4) if calls else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+
+def make_cache_key(namespace: str, *parts: Any) -> str:
+    """
+    Stable key from normalized inputs: strings are lower-cased with whitespace collapsed,
+    dicts are serialized with sorted keys.
+    """
+    def normalize(part):
+        if isinstance(part, str):
+            return " ".join(part.lower().split())
+        if isinstance(part, dict):
+            return {str(k): normalize(v) for k, v in part.items()}
+        if isinstance(part, (list, tuple)):
+            return [normalize(p) for p in part]
+        return part
+    
+    payload = json.dumps([normalize(p) for p in parts], sort_keys=True, default=str)
+    return f"{namespace}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+_MISSING = object()
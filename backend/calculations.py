@@ -1,7 +1,13 @@
 import math
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
+import numpy as np
 
+from metrics import timed
+from schedule import AmortizationSchedule
+
+
+@timed()
 def calculate_emi(principal: float, annual_rate: float, tenure_months: int) -> Dict:
     """
     Calculate EMI using the formula:
@@ -27,120 +33,306 @@ def calculate_emi(principal: float, annual_rate: float, tenure_months: int) -> D
     }
 
 
-def normalize_value(value: float, min_val: float, max_val: float, inverse: bool = False) -> float:
+@timed()
+def calculate_emi_batch(principals, annual_rates, tenure_months) -> Dict[str, np.ndarray]:
     """
-    Normalize value to 0-100 scale.
-    If inverse=True, lower values get higher scores (for costs, interest, etc.)
+    Vectorized calculate_emi over columnar inputs.
+    Evaluates (1+R)^N once per row in a single pass over the batch and keeps
+    the zero-rate handling and rounding of calculate_emi.
     """
-    if max_val == min_val:
-        return 50.0
+    principal = np.asarray(principals, dtype=np.float64)
+    tenure = np.asarray(tenure_months, dtype=np.float64)
+    monthly_rate = np.asarray(annual_rates, dtype=np.float64) / 12 / 100
+
+    growth = np.power(1 + monthly_rate, tenure)
+    zero_rate = monthly_rate == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi = np.where(
+            zero_rate,
+            principal / tenure,
+            principal * monthly_rate * growth / (growth - 1)
+        )
+
+    total_payment = emi * tenure
+    total_interest = total_payment - principal
+
+    return {
+        "emi": np.round(emi, 2),
+        "total_payment": np.round(total_payment, 2),
+        "total_interest": np.round(total_interest, 2),
+        "principal": principal,
+        "monthly_rate": np.round(monthly_rate * 100, 4)
+    }
+
+
+@timed()
+def emi_sensitivity_grid(
+    principals,
+    annual_rates,
+    tenure_months,
+    rate_step: float = 0.25,
+    tenure_step: int = 12
+) -> Dict[str, np.ndarray]:
+    """
+    EMI and total interest over the full rate × tenure × principal grid (arrays indexed
+    [rate, tenure, principal]) in one broadcast pass, plus analytic first-order sensitivities:
+    the change per +rate_step % annual rate and per +tenure_step months.
+    
+    With r the monthly rate and g = (1+r)^n:
+    d ln EMI / dr = 1/r - n / ((1+r)(g-1))  ->  (n+1)/2 as r -> 0
+    d ln EMI / dn = -ln(1+r) / (g-1)         ->  -1/n    as r -> 0
+    and total interest I = n × EMI - P, so dI/dR = n × dEMI/dR and dI/dn = EMI + n × dEMI/dn.
+    """
+    rate = np.asarray(annual_rates, dtype=np.float64)[:, None, None]
+    tenure = np.asarray(tenure_months, dtype=np.float64)[None, :, None]
+    principal = np.asarray(principals, dtype=np.float64)[None, None, :]
     
-    normalized = ((value - min_val) / (max_val - min_val)) * 100
+    emi_data = calculate_emi_batch(principal, rate, tenure)
     
-    if inverse:
-        normalized = 100 - normalized
+    # Sensitivities use the unrounded EMI
+    monthly_rate = rate / 12 / 100
+    zero_rate = monthly_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_rate)
+    growth_minus_one = np.expm1(tenure * np.log1p(safe_rate))
+    emi = np.where(zero_rate, principal / tenure, principal * safe_rate * (growth_minus_one + 1) / growth_minus_one)
     
-    return normalized
+    dlog_emi_dr = np.where(zero_rate, (tenure + 1) / 2, 1 / safe_rate - tenure / ((1 + safe_rate) * growth_minus_one))
+    dlog_emi_dn = np.where(zero_rate, -1 / tenure, -np.log1p(safe_rate) / growth_minus_one)
+    
+    # Per 1% of annual rate (r = R / 1200) and per month
+    emi_per_rate = emi * dlog_emi_dr / 1200
+    emi_per_month = emi * dlog_emi_dn
+    
+    return {
+        "emi": emi_data['emi'],
+        "total_interest": emi_data['total_interest'],
+        "emi_per_rate_step": np.round(emi_per_rate * rate_step, 2),
+        "emi_per_tenure_step": np.round(emi_per_month * tenure_step, 2),
+        "interest_per_rate_step": np.round(tenure * emi_per_rate * rate_step, 2),
+        "interest_per_tenure_step": np.round((emi + tenure * emi_per_month) * tenure_step, 2)
+    }
 
 
-def calculate_loan_score(
-    emi: float,
-    total_interest: float,
-    total_cost: float,
-    tenure: int,
-    processing_fee: float,
-    all_emis: List[float],
-    all_interests: List[float],
-    all_costs: List[float],
-    all_tenures: List[int],
-    all_fees: List[float]
-) -> float:
-    """
-    Calculate weighted MCDA score for a loan.
-    Weights: Interest (35%), EMI (25%), Total Cost (20%), Tenure (10%), Fees (10%)
-    """
-    # Normalize metrics (inverse=True for costs - lower is better)
-    norm_interest = normalize_value(total_interest, min(all_interests), max(all_interests), inverse=True)
-    norm_emi = normalize_value(emi, min(all_emis), max(all_emis), inverse=True)
-    norm_cost = normalize_value(total_cost, min(all_costs), max(all_costs), inverse=True)
-    norm_tenure = normalize_value(tenure, min(all_tenures), max(all_tenures), inverse=True)
-    norm_fee = normalize_value(processing_fee, min(all_fees), max(all_fees), inverse=True)
-    
-    # Apply weights
-    score = (
-        norm_interest * 0.35 +
-        norm_emi * 0.25 +
-        norm_cost * 0.20 +
-        norm_tenure * 0.10 +
-        norm_fee * 0.10
+def _balance_after(principal, monthly_rate: float, emi: float, months):
+    """
+    Outstanding balance after `months` payments of `emi` in closed form:
+    B_k = P × (1+R)^k - EMI × [(1+R)^k - 1] / R
+    `principal` and `months` may be scalars or NumPy arrays.
+    """
+    if monthly_rate == 0:
+        return principal - emi * months
+    growth = (1 + monthly_rate) ** months
+    return principal * growth - emi * (growth - 1) / monthly_rate
+
+
+def payoff_terms(balance, monthly_rate, emi):
+    """
+    Whole payments of `emi` that clear `balance`, and the interest they carry, in closed form.
+    The last payment only clears what is left; a residual within EMI rounding (₹0.005 per
+    payment, compounded) is absorbed by the payment before, as in the schedule.
+    Interest = n × EMI - B + B_n, as in amortization_totals. Arguments may be scalars or NumPy
+    arrays; the EMI must cover the first month's interest.
+    """
+    balance, monthly_rate, emi = np.broadcast_arrays(
+        np.asarray(balance, dtype=np.float64),
+        np.asarray(monthly_rate, dtype=np.float64),
+        np.asarray(emi, dtype=np.float64)
     )
+    zero_rate = monthly_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_rate)
+    
+    def residual(months):
+        growth = np.power(1 + monthly_rate, months)
+        factor = np.where(zero_rate, months, (growth - 1) / safe_rate)
+        return balance * growth - emi * factor, factor
     
-    return round(score, 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exact = np.where(
+            zero_rate,
+            balance / emi,
+            np.log(emi / (emi - balance * monthly_rate)) / np.log1p(safe_rate)
+        )
+        full = np.floor(exact)
+        left, factor = residual(full)
+        months = np.where((full > 0) & (left <= 0.005 * factor), full, full + 1)
+        months = np.where(balance > 0, months, 0)
+        interest = emi * months - balance + residual(months)[0]
+    return months, interest
+
+
+DEFAULT_WEIGHTS = {
+    "interest": 0.35,
+    "emi": 0.25,
+    "total_cost": 0.20,
+    "tenure": 0.10,
+    "processing_fee": 0.10
+}
 
 
-def compare_loans(loans: List[Dict]) -> List[Dict]:
+def normalize_weights(weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
     """
-    Compare multiple loans using MCDA algorithm and rank them.
+    Fill missing MCDA weights from DEFAULT_WEIGHTS and rescale them to sum to 1.
     """
-    # Calculate EMI and metrics for all loans
-    loan_metrics = []
-    for loan in loans:
-        emi_data = calculate_emi(loan['principal'], loan['interest_rate'], loan['tenure_months'])
-        total_cost = emi_data['total_payment'] + loan.get('processing_fee', 0)
+    if weights is None:
+        return dict(DEFAULT_WEIGHTS)
+    
+    unknown = set(weights) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown weight(s): {', '.join(sorted(unknown))}")
+    
+    merged = {**DEFAULT_WEIGHTS, **weights}
+    if any(w < 0 for w in merged.values()):
+        raise ValueError("Weights must be non-negative")
+    
+    total = sum(merged.values())
+    if total <= 0:
+        raise ValueError("At least one weight must be positive")
+    
+    return {key: w / total for key, w in merged.items()}
+
+
+def score_loans(
+    metrics: Dict[str, np.ndarray],
+    weights: Optional[Dict[str, float]] = None,
+    bounds: Optional[Dict[str, Dict[str, float]]] = None
+) -> Tuple[np.ndarray, Dict]:
+    """
+    Vectorized MCDA scoring of all loans in one pass.
+    `metrics` maps each weight key to an array of values; normalization bounds are computed once,
+    or taken from `bounds` when scoring a chunk of a larger set.
+    Returns the rounded scores and the (min, max) bounds per metric.
+    """
+    weights = normalize_weights(weights)
+    
+    scores = 0.0
+    bounds = dict(bounds) if bounds else {}
+    for key, weight in weights.items():
+        values = np.asarray(metrics[key], dtype=np.float64)
+        if key not in bounds:
+            bounds[key] = {"min": float(values.min()), "max": float(values.max())}
+        min_val, max_val = bounds[key]["min"], bounds[key]["max"]
         
-        loan_metrics.append({
-            'id': loan['id'],
-            'name': loan['name'],
-            'emi': emi_data['emi'],
-            'total_interest': emi_data['total_interest'],
-            'total_cost': total_cost,
-            'tenure': loan['tenure_months'],
-            'processing_fee': loan.get('processing_fee', 0)
-        })
-    
-    # Extract all values for normalization
-    all_emis = [m['emi'] for m in loan_metrics]
-    all_interests = [m['total_interest'] for m in loan_metrics]
-    all_costs = [m['total_cost'] for m in loan_metrics]
-    all_tenures = [m['tenure'] for m in loan_metrics]
-    all_fees = [m['processing_fee'] for m in loan_metrics]
-    
-    # Calculate scores
-    for metric in loan_metrics:
-        metric['score'] = calculate_loan_score(
-            metric['emi'],
-            metric['total_interest'],
-            metric['total_cost'],
-            metric['tenure'],
-            metric['processing_fee'],
-            all_emis,
-            all_interests,
-            all_costs,
-            all_tenures,
-            all_fees
-        )
+        # Lower is better: the minimum scores 100 and the maximum 0; a flat metric scores 50
+        if max_val == min_val:
+            normalized = np.full_like(values, 50.0)
+        else:
+            normalized = 100 - (values - min_val) / (max_val - min_val) * 100
+        
+        scores = scores + normalized * weight
     
-    # Sort by score (highest first)
-    loan_metrics.sort(key=lambda x: x['score'], reverse=True)
+    return np.round(scores, 2), bounds
+
+
+def loan_metrics_batch(principals, annual_rates, tenure_months, processing_fees) -> Dict[str, np.ndarray]:
+    """
+    MCDA input metrics for columnar loan data, keyed like DEFAULT_WEIGHTS.
+    """
+    emi_data = calculate_emi_batch(principals, annual_rates, tenure_months)
+    fees = np.asarray(processing_fees, dtype=np.float64)
     
-    # Assign ranks and badges
-    first_loan_cost = loan_metrics[0]['total_cost']
+    return {
+        "emi": emi_data['emi'],
+        "interest": emi_data['total_interest'],
+        "total_cost": emi_data['total_payment'] + fees,
+        "tenure": np.asarray(tenure_months),
+        "processing_fee": fees,
+        "total_payment": emi_data['total_payment']
+    }
+
+
+def _loan_metrics(loans: List[Dict]) -> Dict[str, np.ndarray]:
+    return loan_metrics_batch(
+        [loan['principal'] for loan in loans],
+        [loan['interest_rate'] for loan in loans],
+        [loan['tenure_months'] for loan in loans],
+        [loan.get('processing_fee', 0) for loan in loans]
+    )
+
+
+def _top_order(scores: np.ndarray, top_k: Optional[int] = None) -> np.ndarray:
+    """
+    Indices of the best-scoring loans, highest first, ties in input order.
+    With top_k, uses partial selection so only the candidates are sorted.
+    """
+    if top_k is None or top_k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    
+    # Every loan scoring at least the k-th best score, ties included, in input order
+    kth_score = -np.partition(-scores, top_k - 1)[top_k - 1]
+    candidates = np.flatnonzero(scores >= kth_score)
+    return candidates[np.argsort(-scores[candidates], kind='stable')][:top_k]
+
+
+@timed()
+def rank_loans(
+    loans: List[Dict],
+    weights: Optional[Dict[str, float]] = None,
+    top_k: Optional[int] = None
+) -> Dict:
+    """
+    Score loans with MCDA and return the best `top_k` (all when None) with ranks and badges,
+    along with the total count and the normalization bounds of the whole set.
+    """
+    metrics = _loan_metrics(loans)
+    scores, bounds = score_loans(metrics, weights)
+    order = _top_order(scores, top_k)
     
-    for i, metric in enumerate(loan_metrics):
-        metric['rank'] = i + 1
+    min_emi = metrics['emi'].min()
+    min_tenure = metrics['tenure'].min()
+    first_loan_cost = float(metrics['total_cost'][order[0]])
+    
+    # Assign ranks and badges
+    loan_metrics = []
+    for i, idx in enumerate(order.tolist()):
+        loan = loans[idx]
+        metric = {
+            'id': loan['id'],
+            'name': loan['name'],
+            'emi': float(metrics['emi'][idx]),
+            'total_interest': float(metrics['interest'][idx]),
+            'total_cost': float(metrics['total_cost'][idx]),
+            'tenure': loan['tenure_months'],
+            'processing_fee': loan.get('processing_fee', 0),
+            'score': float(scores[idx]),
+            'rank': i + 1
+        }
         metric['savings_vs_first'] = metric['total_cost'] - first_loan_cost if i > 0 else 0
         
-        # Assign badges
         if i == 0:
             metric['badge'] = "Best Overall"
-        elif metric['emi'] == min(all_emis):
+        elif metrics['emi'][idx] == min_emi:
             metric['badge'] = "Most Affordable EMI"
-        elif metric['tenure'] == min(all_tenures):
+        elif metrics['tenure'][idx] == min_tenure:
             metric['badge'] = "Fastest Payoff"
+        
+        loan_metrics.append(metric)
     
-    return loan_metrics
+    return {
+        "comparisons": loan_metrics,
+        "total_compared": len(loans),
+        "bounds": bounds
+    }
+
+
+@timed()
+def compare_loans(loans: List[Dict], weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """
+    Compare multiple loans using MCDA algorithm and rank them.
+    Runs in O(n log n): metrics, bounds and scores are computed once for the whole set.
+    """
+    return rank_loans(loans, weights)["comparisons"]
 
 
+def break_even_months(prepayment_amount: float, interest_saved: float, remaining_tenure: int) -> int:
+    """
+    Months of average interest savings over the remaining tenure needed to match the prepayment.
+    """
+    if interest_saved <= 0 or remaining_tenure <= 0:
+        return 0
+    return math.ceil(prepayment_amount / (interest_saved / remaining_tenure))
+
+
+@timed()
 def calculate_prepayment_impact(
     principal: float,
     annual_rate: float,
@@ -151,100 +343,245 @@ def calculate_prepayment_impact(
 ) -> Dict:
     """
     Calculate the impact of prepayment on loan.
+    Totals are closed form (payoff_terms) and agree with paying the loan month by month, as the
+    original loop and simulation.simulate_prepayment_plan do, to within ₹0.02; tenures and EMIs
+    match exactly.
     """
     # Original loan details
     original_emi_data = calculate_emi(principal, annual_rate, tenure_months)
     original_emi = original_emi_data['emi']
-    
-    # Calculate remaining principal at prepayment month
     monthly_rate = annual_rate / 12 / 100
-    remaining_principal = principal
+    original_total_interest = float(payoff_terms(principal, monthly_rate, original_emi)[1])
     
-    for month in range(prepayment_month):
-        interest_payment = remaining_principal * monthly_rate
-        principal_payment = original_emi - interest_payment
-        remaining_principal -= principal_payment
+    # Remaining principal at prepayment month, in closed form
+    remaining_principal = _balance_after(principal, monthly_rate, original_emi, prepayment_month)
     
-    # Apply prepayment
-    new_principal = remaining_principal - prepayment_amount
+    # Apply prepayment; anything beyond the outstanding balance simply closes the loan
+    new_principal = max(0.0, remaining_principal - prepayment_amount)
     remaining_tenure = tenure_months - prepayment_month
     
     if reduce_emi:
         # Keep tenure same, reduce EMI
-        new_emi_data = calculate_emi(new_principal, annual_rate, remaining_tenure)
-        new_emi = new_emi_data['emi']
-        new_tenure = remaining_tenure
+        new_emi = calculate_emi(new_principal, annual_rate, remaining_tenure)['emi']
     else:
         # Keep EMI same, reduce tenure
         new_emi = original_emi
-        # Calculate new tenure
-        if monthly_rate == 0:
-            new_tenure = int(new_principal / new_emi)
-        else:
-            new_tenure = math.ceil(
-                math.log(new_emi / (new_emi - new_principal * monthly_rate)) / 
-                math.log(1 + monthly_rate)
-            )
     
-    # Calculate new total interest
-    new_total_payment = new_emi * new_tenure
-    new_total_interest = new_total_payment - new_principal
+    # Payments after the prepayment, the last one clearing only what is left
+    new_tenure, interest_after = payoff_terms(new_principal, monthly_rate, new_emi)
+    new_tenure = int(new_tenure)
     
     # Add interest already paid
     interest_already_paid = (original_emi * prepayment_month) - (principal - remaining_principal)
-    new_total_interest += interest_already_paid
+    new_total_interest = float(interest_after) + interest_already_paid
+    if monthly_rate == 0:
+        # Interest-free: keep floating-point noise out of the totals
+        original_total_interest = new_total_interest = 0.0
     
     # Calculate savings
-    interest_saved = original_emi_data['total_interest'] - new_total_interest
+    interest_saved = original_total_interest - new_total_interest
     months_saved = tenure_months - (prepayment_month + new_tenure)
     
-    # Calculate break-even (when savings exceed prepayment)
-    break_even_months = 0
-    if interest_saved > 0:
-        monthly_savings = interest_saved / remaining_tenure if remaining_tenure > 0 else 0
-        if monthly_savings > 0:
-            break_even_months = math.ceil(prepayment_amount / monthly_savings)
+    break_even = break_even_months(prepayment_amount, interest_saved, remaining_tenure)
     
     return {
         "original_emi": round(original_emi, 2),
         "new_emi": round(new_emi, 2),
-        "original_total_interest": round(original_emi_data['total_interest'], 2),
+        "original_total_interest": round(original_total_interest, 2),
         "new_total_interest": round(new_total_interest, 2),
         "interest_saved": round(interest_saved, 2),
         "original_tenure": tenure_months,
         "new_tenure": prepayment_month + new_tenure,
         "months_saved": max(0, months_saved),
-        "break_even_months": break_even_months
+        "break_even_months": break_even
     }
 
 
-def generate_amortization_schedule(principal: float, annual_rate: float, tenure_months: int) -> List[Dict]:
+@timed()
+def calculate_prepayment_impact_batch(
+    principal,
+    annual_rate,
+    tenure_months,
+    prepayment_amount,
+    prepayment_month,
+    reduce_emi=False
+) -> Dict[str, np.ndarray]:
     """
-    Generate month-by-month amortization schedule.
+    Vectorized calculate_prepayment_impact. All arguments broadcast against each other,
+    e.g. one loan and amount against an array of prepayment months for a timing heatmap.
+    Both share payoff_terms, so results match the scalar function to within ₹0.01 and the
+    month-by-month schedule to within ₹0.02.
     """
-    emi_data = calculate_emi(principal, annual_rate, tenure_months)
-    emi = emi_data['emi']
+    principal, annual_rate, tenure, amount, month, reduce_emi = np.broadcast_arrays(
+        np.asarray(principal, dtype=np.float64),
+        np.asarray(annual_rate, dtype=np.float64),
+        np.asarray(tenure_months, dtype=np.float64),
+        np.asarray(prepayment_amount, dtype=np.float64),
+        np.asarray(prepayment_month, dtype=np.float64),
+        np.asarray(reduce_emi, dtype=bool)
+    )
+    
+    original = calculate_emi_batch(principal, annual_rate, tenure)
+    original_emi = original['emi']
     monthly_rate = annual_rate / 12 / 100
+    zero_rate = monthly_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_rate)
     
-    schedule = []
-    remaining_balance = principal
+    # Remaining principal at prepayment month, in closed form
+    growth = np.power(1 + monthly_rate, month)
+    remaining_principal = np.where(
+        zero_rate,
+        principal - original_emi * month,
+        principal * growth - original_emi * (growth - 1) / safe_rate
+    )
+    new_principal = np.maximum(0.0, remaining_principal - amount)
+    remaining_tenure = tenure - month
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Keep tenure same, reduce EMI; or keep EMI same, reduce tenure
+        reduced_emi = calculate_emi_batch(new_principal, annual_rate, remaining_tenure)['emi']
+    new_emi = np.where(reduce_emi, reduced_emi, original_emi)
+    
+    new_tenure, interest_after = payoff_terms(new_principal, monthly_rate, new_emi)
+    original_total_interest = payoff_terms(principal, monthly_rate, original_emi)[1]
+    
+    interest_already_paid = original_emi * month - (principal - remaining_principal)
+    # Interest-free loans carry no interest to save; keep floating-point noise out of the totals
+    new_total_interest = np.where(zero_rate, 0.0, interest_after + interest_already_paid)
+    original_total_interest = np.where(zero_rate, 0.0, original_total_interest)
+    interest_saved = original_total_interest - new_total_interest
+    months_saved = tenure - (month + new_tenure)
+    
+    # Break-even (when savings exceed prepayment); 0 when nothing is saved
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        monthly_savings = np.where(remaining_tenure > 0, interest_saved / remaining_tenure, 0)
+        break_even = np.where(
+            (interest_saved > 0) & (monthly_savings > 0),
+            np.ceil(amount / monthly_savings),
+            0
+        )
+    break_even = np.where(np.isfinite(break_even), break_even, 0)
+    
+    return {
+        "prepayment_month": month.astype(np.int64),
+        "original_emi": np.round(original_emi, 2),
+        "new_emi": np.round(new_emi, 2),
+        "original_total_interest": np.round(original_total_interest, 2),
+        "new_total_interest": np.round(new_total_interest, 2),
+        "interest_saved": np.round(interest_saved, 2),
+        "original_tenure": tenure.astype(np.int64),
+        "new_tenure": (month + new_tenure).astype(np.int64),
+        "months_saved": np.maximum(0, months_saved).astype(np.int64),
+        "break_even_months": break_even.astype(np.int64)
+    }
+
+
+def _schedule_row(principal: float, monthly_rate: float, emi: float, tenure_months: int, month: int) -> Dict:
+    opening_balance = _balance_after(principal, monthly_rate, emi, month - 1)
+    interest_payment = opening_balance * monthly_rate
     
-    for month in range(1, tenure_months + 1):
-        interest_payment = remaining_balance * monthly_rate
+    # Last month clears whatever balance is left after rounding
+    if month == tenure_months:
+        principal_payment = opening_balance
+        remaining_balance = 0
+    else:
         principal_payment = emi - interest_payment
-        remaining_balance -= principal_payment
-        
-        # Handle rounding in last month
-        if month == tenure_months:
-            principal_payment += remaining_balance
-            remaining_balance = 0
-        
-        schedule.append({
-            "month": month,
-            "emi": round(emi, 2),
-            "principal_payment": round(principal_payment, 2),
-            "interest_payment": round(interest_payment, 2),
-            "remaining_balance": round(max(0, remaining_balance), 2)
-        })
-    
-    return schedule
+        remaining_balance = opening_balance - principal_payment
+    
+    return {
+        "month": month,
+        "emi": round(emi, 2),
+        "principal_payment": round(principal_payment, 2),
+        "interest_payment": round(interest_payment, 2),
+        "remaining_balance": round(max(0, remaining_balance), 2)
+    }
+
+
+@timed()
+def amortization_row(principal: float, annual_rate: float, tenure_months: int, month: int) -> Dict:
+    """
+    Compute a single month of the amortization schedule in O(1).
+    """
+    if month < 1 or month > tenure_months:
+        raise ValueError(f"Month must be between 1 and {tenure_months}")
+    
+    emi = calculate_emi(principal, annual_rate, tenure_months)['emi']
+    return _schedule_row(principal, annual_rate / 12 / 100, emi, tenure_months, month)
+
+
+@timed()
+def amortization_totals(principal: float, annual_rate: float, tenure_months: int) -> Dict:
+    """
+    Schedule totals without materializing rows.
+    Total interest = N × EMI - P + B_N, where B_N is the rounding residual cleared in the last month.
+    """
+    emi = calculate_emi(principal, annual_rate, tenure_months)['emi']
+    monthly_rate = annual_rate / 12 / 100
+    residual = _balance_after(principal, monthly_rate, emi, tenure_months)
+    
+    return {
+        "total_months": tenure_months,
+        "total_payment": round(emi * tenure_months, 2),
+        "total_principal": round(principal, 2),
+        "total_interest": round(emi * tenure_months - principal + residual, 2)
+    }
+
+
+@timed()
+def amortization_schedule(
+    principal: float,
+    annual_rate: float,
+    tenure_months: int,
+    offset: int = 0,
+    limit: Optional[int] = None
+) -> AmortizationSchedule:
+    """
+    Columnar schedule for months offset+1 .. offset+limit (to the end when limit is None),
+    computed in one vectorized closed-form pass. Values match amortization_row.
+    """
+    emi = calculate_emi(principal, annual_rate, tenure_months)['emi']
+    last_month = tenure_months if limit is None else min(tenure_months, offset + limit)
+    return schedule_columns(principal, annual_rate / 12 / 100, emi, tenure_months, offset, last_month)
+
+
+def schedule_columns(
+    principal: float,
+    monthly_rate: float,
+    emi: float,
+    tenure_months: int,
+    offset: int = 0,
+    last_month: Optional[int] = None,
+    month_offset: int = 0
+) -> AmortizationSchedule:
+    """
+    Columnar schedule rows offset+1 .. last_month of a loan repaid by `emi` over `tenure_months`,
+    the final month clearing whatever is left. Months are labelled from month_offset + 1, e.g. for
+    the part of a schedule that follows a prepayment.
+    """
+    last_month = tenure_months if last_month is None else last_month
+    months = np.arange(offset + 1, last_month + 1, dtype=np.int64)
+    opening_balance = _balance_after(float(principal), monthly_rate, emi, months - 1)
+    interest_payment = opening_balance * monthly_rate
+    principal_payment = emi - interest_payment
+    remaining_balance = opening_balance - principal_payment
+    
+    # Last month clears whatever balance is left after rounding
+    if len(months) and months[-1] == tenure_months:
+        principal_payment[-1] = opening_balance[-1]
+        remaining_balance[-1] = 0
+    
+    return AmortizationSchedule(
+        months + month_offset,
+        np.full(len(months), round(emi, 2)),
+        np.round(principal_payment, 2),
+        np.round(interest_payment, 2),
+        np.round(np.maximum(0, remaining_balance), 2)
+    )
+
+
+@timed()
+def generate_amortization_schedule(principal: float, annual_rate: float, tenure_months: int) -> List[Dict]:
+    """
+    Generate month-by-month amortization schedule.
+    """
+    return amortization_schedule(principal, annual_rate, tenure_months).to_rows()
@@ -1,10 +1,45 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
-    gemini_api_key: str
+    gemini_api_key: Optional[str] = None
+    math_only: bool = False
+    ai_preload: bool = False
+    ai_routing: Literal["local_first", "llm_first", "local_only"] = "local_first"
     port: int = 8000
+    max_batch_size: int = 500000
+    max_compare_loans: int = 1000
+    max_refinance_offers: int = 200
+    max_simulation_events: int = 1000
+    max_grid_cells: int = 1000000
+    ai_timeout_seconds: float = 10.0
+    ai_max_concurrency: int = 8
+    insight_store_size: int = 10000
+    insight_ttl_seconds: float = 300.0
+    what_if_session_size: int = 1000
+    what_if_session_ttl_seconds: float = 900.0
+    chat_session_size: int = 10000
+    chat_session_ttl_seconds: float = 3600.0
+    chat_recent_turns: int = 3
+    chat_summary_max_chars: int = 1500
+    ai_cache_size: int = 1024
+    ai_cache_ttl_seconds: float = 86400.0
+    ai_cache_path: Optional[str] = None
+    ai_cache_max_rows: int = 100000
+    slow_request_ms: Optional[float] = None
+    memo_cache_size: int = 4096
+    memo_cache_max_bytes: int = 64 * 1024 * 1024
+    portfolio_max_jobs: int = 2
+    portfolio_chunk_size: int = 50000
+    portfolio_max_upload_bytes: int = 512 * 1024 * 1024
+    web_concurrency: int = 1
+    calc_workers: Optional[int] = None
+    calc_max_pending: Optional[int] = None
+    calc_offload_min_size: int = 1000
+    fast_json: bool = False
+    compression_min_size: Optional[int] = None
     
     class Config:
         env_file = ".env"
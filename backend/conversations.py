@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from cache import TTLCache
+
+
+# Longest question or answer kept per turn
+MAX_TURN_CHARS = 2000
+
+
+class Conversation:
+    """
+    One chat session: a running summary, the latest turns verbatim, and turns that have left
+    the recent window but are not folded into the summary yet.
+    """
+    
+    __slots__ = ("summary", "turns", "pending", "summarizing")
+
+    def __init__(self):
+        self.summary = ""
+        self.turns: deque = deque()
+        self.pending: List[Dict] = []
+        self.summarizing = False
+
+    def context(self) -> Tuple[str, List[Dict]]:
+        """
+        Summary and verbatim turns for the next prompt. Turns still waiting to be summarized
+        are included verbatim, so no context is lost while a summary is being written.
+        """
+        return self.summary, self.pending + list(self.turns)
+
+
+class ConversationStore:
+    """
+    Chat history per session_id, so clients send only the new question each turn.
+    
+    Sessions are kept in a TTLCache (LRU beyond maxsize, expiring after ttl idle seconds).
+    Each keeps its last `recent_turns` exchanges verbatim. Older exchanges are folded in the
+    background into a running summary of at most summary_max_chars by the async
+    summarize(summary, turns, max_chars) callable. Memory and prompt size per session therefore
+    stay bounded however long the chat runs. Intended for use from the event loop.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str, List[Dict], int], Awaitable[str]],
+        maxsize: int,
+        ttl: Optional[float] = None,
+        recent_turns: int = 3,
+        summary_max_chars: int = 1500
+    ):
+        self._summarize = summarize
+        self._sessions = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.recent_turns = recent_turns
+        self.summary_max_chars = summary_max_chars
+        self.summaries = 0
+        self._tasks = set()
+
+    def open(self, session_id: Optional[str] = None) -> Tuple[str, Conversation]:
+        """
+        Return the session (a new one when session_id is None, unknown or expired) and restart
+        its idle timeout.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        conversation = self._sessions.get(session_id)
+        if conversation is None:
+            conversation = Conversation()
+        self._sessions.set(session_id, conversation)
+        return session_id, conversation
+
+    def record(self, session_id: str, conversation: Conversation, question: str, answer: str) -> None:
+        conversation.turns.append({"question": question[:MAX_TURN_CHARS], "answer": answer[:MAX_TURN_CHARS]})
+        while len(conversation.turns) > self.recent_turns:
+            conversation.pending.append(conversation.turns.popleft())
+        self._sessions.set(session_id, conversation)
+        
+        if conversation.pending and not conversation.summarizing:
+            conversation.summarizing = True
+            task = asyncio.create_task(self._fold(conversation))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _fold(self, conversation: Conversation) -> None:
+        # Turns that arrive while a summary is being written are folded in the next round
+        try:
+            while conversation.pending:
+                turns = list(conversation.pending)
+                conversation.summary = await self._summarize(conversation.summary, turns, self.summary_max_chars)
+                del conversation.pending[:len(turns)]
+                self.summaries += 1
+        finally:
+            conversation.summarizing = False
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,345 @@
+"""
+Deterministic explanations that need no model call: an indexed glossary of loan terms and
+number-aware narratives built from compare_loans output. ai_service answers from here when
+the routing policy says the LLM is not needed, and falls back to it when a model call fails.
+"""
+import difflib
+import re
+from typing import Dict, List, Optional
+
+from calculations import calculate_emi
+
+
+# Example loan used in explanations when the request carries no context
+DEFAULT_AMOUNT = 500000
+DEFAULT_RATE = 10.0
+
+# {amount}, {rate} and the example figures from _example_figures() may be used in the text
+GLOSSARY = [
+    {
+        "term": "EMI",
+        "aliases": ("equated monthly installment", "equated monthly instalment", "monthly installment", "monthly instalment"),
+        "text": "EMI (Equated Monthly Installment) is the fixed amount you pay every month towards your loan. It includes both the loan amount (principal) and the interest charged by the lender. For example, ₹{amount} at {rate}% for 5 years means an EMI of ₹{emi_5y}."
+    },
+    {
+        "term": "Principal",
+        "aliases": ("principal amount", "loan amount"),
+        "text": "Principal is the actual loan amount you borrow from the bank. For example, if you take a ₹{amount} loan, ₹{amount} is your principal amount. Interest is charged only on the part of it you have not repaid yet."
+    },
+    {
+        "term": "Interest rate",
+        "aliases": ("rate of interest", "annual interest rate"),
+        "text": "Interest rate is the cost of borrowing money, shown as a yearly percentage. If you borrow ₹{amount} at {rate}%, you pay about ₹{first_year_interest} as interest in the first year, and less each year after as the balance comes down."
+    },
+    {
+        "term": "Processing fee",
+        "aliases": ("processing charge", "processing charges", "loan processing fee", "origination fee"),
+        "text": "Processing fee is a one-time charge banks levy to process your loan application. It typically ranges from 0.5% to 2% of the loan amount, so ₹{fee_low} to ₹{fee_high} on a ₹{amount} loan."
+    },
+    {
+        "term": "Tenure",
+        "aliases": ("loan tenure", "loan term", "repayment period"),
+        "text": "Tenure is the time period over which you'll repay the loan. A longer tenure means lower monthly EMI but more total interest paid: ₹{amount} at {rate}% costs ₹{interest_5y} in interest over 5 years but ₹{interest_10y} over 10 years."
+    },
+    {
+        "term": "APR",
+        "aliases": ("annual percentage rate", "effective interest rate", "effective rate"),
+        "text": "APR (Annual Percentage Rate) is the actual yearly cost of your loan including all fees and charges, not just the interest rate. Compare loans by APR: a lower rate with a high processing fee can cost more."
+    },
+    {
+        "term": "Total interest",
+        "aliases": ("total interest payable", "interest cost", "total interest paid"),
+        "text": "Total interest is everything you pay the lender beyond the amount borrowed, over the whole loan. ₹{amount} at {rate}% for 5 years adds ₹{interest_5y} in interest."
+    },
+    {
+        "term": "Prepayment",
+        "aliases": ("part payment", "part-payment", "partial prepayment", "lump sum payment"),
+        "text": "Prepayment means paying off part of your loan before it is due. The amount goes straight to the principal, so you either finish the loan earlier or pay a lower EMI, and save interest either way. Prepaying early in the loan saves the most."
+    },
+    {
+        "term": "Prepayment penalty",
+        "aliases": ("prepayment charges", "prepayment charge", "foreclosure charges", "foreclosure penalty"),
+        "text": "A prepayment penalty is a fee some lenders charge when you repay early, usually 2-4% of the amount prepaid. Floating-rate home loans taken by individuals in India cannot carry this charge."
+    },
+    {
+        "term": "Foreclosure",
+        "aliases": ("loan foreclosure", "preclosure", "pre-closure", "closing the loan early"),
+        "text": "Foreclosure means repaying the entire outstanding loan in one go before the tenure ends. It stops all future interest; check your lender's foreclosure charges first."
+    },
+    {
+        "term": "Amortization",
+        "aliases": ("amortisation", "amortization schedule", "amortisation schedule", "repayment schedule"),
+        "text": "Amortization is how each EMI is split between interest and principal over time. Early EMIs are mostly interest; later ones mostly repay principal. In the first EMI of ₹{amount} at {rate}% for 5 years, ₹{first_month_interest} of ₹{emi_5y} is interest."
+    },
+    {
+        "term": "Reducing balance",
+        "aliases": ("reducing balance rate", "diminishing balance", "reducing rate"),
+        "text": "On a reducing balance loan, interest is charged only on the amount still outstanding, so it falls as you repay. Almost all bank loans in India work this way."
+    },
+    {
+        "term": "Flat interest rate",
+        "aliases": ("flat rate", "flat interest"),
+        "text": "A flat interest rate charges interest on the full original amount for the whole tenure, even as you repay. A {rate}% flat rate over 5 years costs ₹{flat_interest_5y} on ₹{amount}, against ₹{interest_5y} at {rate}% on a reducing balance."
+    },
+    {
+        "term": "Fixed interest rate",
+        "aliases": ("fixed rate", "fixed rate loan"),
+        "text": "A fixed interest rate stays the same for the agreed period, so your EMI never changes. It is usually a little higher than floating rates in exchange for that certainty."
+    },
+    {
+        "term": "Floating interest rate",
+        "aliases": ("floating rate", "variable rate", "variable interest rate", "adjustable rate"),
+        "text": "A floating interest rate moves with a benchmark such as the RBI repo rate. When rates rise your EMI or tenure goes up, and when they fall you pay less."
+    },
+    {
+        "term": "Repo rate",
+        "aliases": ("rbi repo rate", "policy rate", "ebr", "eblr", "external benchmark rate", "mclr"),
+        "text": "The repo rate is the rate at which the RBI lends to banks. Floating-rate loans are linked to it (EBLR) or to the bank's MCLR, so changes in the repo rate reach your interest rate at the next reset."
+    },
+    {
+        "term": "Credit score",
+        "aliases": ("cibil score", "cibil", "credit rating"),
+        "text": "Your credit score (e.g. CIBIL, 300-900) summarizes how reliably you have repaid past loans and cards. A score above 750 usually gets faster approval and lower interest rates."
+    },
+    {
+        "term": "Loan to value ratio",
+        "aliases": ("ltv", "ltv ratio", "loan-to-value"),
+        "text": "Loan to value (LTV) is the loan amount as a percentage of the property's value. With a 75% LTV, a ₹{amount} loan needs a property worth at least ₹{ltv_property}; you pay the rest as down payment."
+    },
+    {
+        "term": "Down payment",
+        "aliases": ("downpayment", "margin money", "own contribution"),
+        "text": "The down payment is the part of the price you pay from your own funds; the loan covers the rest. A larger down payment means a smaller loan, a lower EMI and less interest."
+    },
+    {
+        "term": "Moratorium",
+        "aliases": ("emi holiday", "moratorium period"),
+        "text": "A moratorium is a period when you may skip EMIs, e.g. during studies on an education loan. Interest usually keeps adding up during it, so the loan costs more overall."
+    },
+    {
+        "term": "Balance transfer",
+        "aliases": ("loan transfer", "loan refinancing", "home loan balance transfer"),
+        "text": "A balance transfer moves your outstanding loan to another lender at a lower rate. It is worth it when the interest saved exceeds the new lender's fees; check the break-even month first."
+    },
+    {
+        "term": "Break-even",
+        "aliases": ("break even", "break-even point", "break even month", "breakeven"),
+        "text": "Break-even is the month from which a decision such as refinancing or prepaying has paid back its upfront cost. Before it you are still behind; after it every month is a saving."
+    },
+    {
+        "term": "Top-up loan",
+        "aliases": ("top up loan", "home loan top up"),
+        "text": "A top-up loan is extra money borrowed on an existing home loan, usually at a rate close to the home loan rate and lower than a personal loan."
+    },
+    {
+        "term": "Collateral",
+        "aliases": ("secured loan", "collateral security"),
+        "text": "Collateral is an asset, like a house or gold, that you pledge to the lender. Secured loans backed by collateral carry lower interest rates, but the lender can sell the asset if you stop paying."
+    },
+    {
+        "term": "Unsecured loan",
+        "aliases": ("loan without collateral",),
+        "text": "An unsecured loan, such as a personal loan, needs no collateral. Because the lender takes more risk, interest rates are higher and approval depends heavily on your income and credit score."
+    },
+    {
+        "term": "Co-applicant",
+        "aliases": ("co applicant", "co-borrower", "co borrower", "joint loan"),
+        "text": "A co-applicant shares responsibility for repaying the loan. Adding an earning co-applicant increases the loan you can get, and both can claim tax benefits on a home loan."
+    },
+    {
+        "term": "FOIR",
+        "aliases": ("fixed obligation to income ratio", "debt to income ratio", "dti", "emi to income ratio"),
+        "text": "FOIR (Fixed Obligation to Income Ratio) is the share of your monthly income that goes to EMIs. Lenders usually want it below 50%, so an EMI of ₹{emi_5y} needs a monthly income of about ₹{income_for_emi}."
+    }
+]
+
+
+def normalize_term(text: str) -> str:
+    """
+    Lower-case, drop punctuation and parenthesised expansions, collapse whitespace.
+    """
+    text = re.sub(r"\([^)]*\)", " ", text.lower())
+    return " ".join(re.sub(r"[^a-z0-9%\-]+", " ", text).replace("-", " ").split())
+
+
+def _build_index() -> Dict[str, Dict]:
+    index = {}
+    for entry in GLOSSARY:
+        for name in (entry["term"],) + entry["aliases"]:
+            key = normalize_term(name)
+            index.setdefault(key, entry)
+            # Plurals ("emis", "processing fees") resolve to the same entry
+            index.setdefault(key + "s", entry)
+    return index
+
+
+# Every normalized term and alias, precomputed at import
+GLOSSARY_INDEX = _build_index()
+
+# Question words around a term ("what is an EMI?", "what does FOIR mean") that do not change it
+_QUESTION_WORDS = frozenset((
+    "what", "whats", "is", "are", "a", "an", "the", "does", "do", "explain", "define",
+    "definition", "meaning", "mean", "means", "of", "please", "tell", "me", "about"
+))
+
+
+def _strip_question(key: str) -> str:
+    words = key.split()
+    while words and words[0] in _QUESTION_WORDS:
+        words.pop(0)
+    while words and words[-1] in _QUESTION_WORDS:
+        words.pop()
+    return " ".join(words)
+
+
+def lookup(term: str) -> Optional[Dict]:
+    """
+    Glossary entry for `term` when the whole text names it: the term or an alias, optionally
+    wrapped in a question ("what is an EMI?"), or a close spelling of one ("prepayemnt").
+    A glossary word inside a longer phrase ("compound interest", "term insurance") is not a
+    match, so None sends those to the model.
+    """
+    key = _strip_question(normalize_term(term))
+    if not key:
+        return None
+    
+    entry = GLOSSARY_INDEX.get(key)
+    if entry is not None:
+        return entry
+    
+    close = difflib.get_close_matches(key, GLOSSARY_INDEX.keys(), n=1, cutoff=0.85)
+    return GLOSSARY_INDEX[close[0]] if close else None
+
+
+def _number(value, default: float) -> float:
+    # Context values may arrive as strings like "5,00,000" or "₹5,00,000"
+    try:
+        number = float(str(value).replace(",", "").replace("₹", "").replace("%", "").strip())
+    except (TypeError, ValueError):
+        return default
+    return number if number > 0 else default
+
+
+def _example_figures(amount: float, rate: float) -> Dict[str, str]:
+    emi_5y = calculate_emi(amount, rate, 60)
+    emi_10y = calculate_emi(amount, rate, 120)
+    return {
+        "amount": f"{amount:,.0f}",
+        "rate": f"{rate:g}",
+        "emi_5y": f"{emi_5y['emi']:,.0f}",
+        "interest_5y": f"{emi_5y['total_interest']:,.0f}",
+        "interest_10y": f"{emi_10y['total_interest']:,.0f}",
+        "first_year_interest": f"{amount * rate / 100:,.0f}",
+        "first_month_interest": f"{amount * rate / 1200:,.0f}",
+        "flat_interest_5y": f"{amount * rate / 100 * 5:,.0f}",
+        "fee_low": f"{amount * 0.005:,.0f}",
+        "fee_high": f"{amount * 0.02:,.0f}",
+        "ltv_property": f"{amount / 0.75:,.0f}",
+        "income_for_emi": f"{emi_5y['emi'] * 2:,.0f}"
+    }
+
+
+# Explanations rendered with the default example loan, precomputed at import
+_DEFAULT_FIGURES = _example_figures(DEFAULT_AMOUNT, DEFAULT_RATE)
+_DEFAULT_EXPLANATIONS = {entry["term"]: entry["text"].format(**_DEFAULT_FIGURES) for entry in GLOSSARY}
+
+
+def explain_term(term: str, context: Optional[Dict] = None) -> Optional[str]:
+    """
+    Glossary explanation of `term`, with examples worked out for the context's amount and
+    rate when given. None for terms the glossary does not know.
+    """
+    entry = lookup(term)
+    if entry is None:
+        return None
+    if not context:
+        return _DEFAULT_EXPLANATIONS[entry["term"]]
+    
+    figures = _example_figures(
+        _number(context.get("amount"), DEFAULT_AMOUNT),
+        _number(context.get("rate"), DEFAULT_RATE)
+    )
+    return entry["text"].format(**figures)
+
+
+def generic_explanation(term: str) -> str:
+    return f"{term} is an important loan term. It affects your monthly payments and total loan cost. Please consult with a financial advisor for detailed explanation."
+
+
+def _loan_name(loan: Dict) -> str:
+    # compare_loans rows carry 'name'; AI request models carry 'loan_name'
+    return loan.get('loan_name', loan.get('name'))
+
+
+def _duration(months: int) -> str:
+    years, months = divmod(abs(int(months)), 12)
+    parts = []
+    if years:
+        parts.append(f"{years} year{'s' if years != 1 else ''}")
+    if months:
+        parts.append(f"{months} month{'s' if months != 1 else ''}")
+    return " ".join(parts) or "0 months"
+
+
+def comparison_insight(loans: List[Dict]) -> str:
+    """
+    Two or three sentences on what choosing the top-ranked loan over the last one means,
+    from rows in compare_loans order (emi, total_interest, and tenure/processing_fee/badge
+    when present).
+    """
+    if not loans or len(loans) < 2:
+        return "Add at least two loan options to get comparative insights."
+    
+    best, worst = loans[0], loans[-1]
+    best_name, worst_name = _loan_name(best), _loan_name(worst)
+    emi_diff = worst['emi'] - best['emi']
+    interest_diff = worst['total_interest'] - best['total_interest']
+    
+    if interest_diff >= 0:
+        sentences = [f"Choosing {best_name} over {worst_name} saves you ₹{interest_diff:,.0f} in total interest"]
+    else:
+        sentences = [f"{best_name} ranks above {worst_name} even though it costs ₹{-interest_diff:,.0f} more in total interest"]
+    
+    tenure_diff = worst.get('tenure', 0) - best.get('tenure', 0) if 'tenure' in best and 'tenure' in worst else 0
+    if emi_diff >= 0:
+        sentences[0] += f" and ₹{emi_diff:,.0f} every month."
+    elif tenure_diff > 0:
+        sentences[0] += f". Its EMI is ₹{-emi_diff:,.0f} higher, but you are debt-free {_duration(tenure_diff)} sooner."
+    elif interest_diff >= 0:
+        sentences[0] += f", though its EMI is ₹{-emi_diff:,.0f} higher each month."
+    else:
+        sentences[0] += f" and ₹{-emi_diff:,.0f} more each month."
+    
+    if emi_diff >= 0 and tenure_diff > 0:
+        sentences.append(f"You will also be debt-free {_duration(tenure_diff)} sooner.")
+    
+    fee_diff = best.get('processing_fee', 0) - worst.get('processing_fee', 0)
+    if fee_diff > 0 and interest_diff > 0:
+        sentences.append(f"Its processing fee is ₹{fee_diff:,.0f} higher, which the interest saving covers {interest_diff / fee_diff:,.1f} times over.")
+    
+    cheapest_emi = min(loans, key=lambda loan: loan['emi'])
+    if cheapest_emi is not best and _loan_name(cheapest_emi) != best_name:
+        sentences.append(f"If a lower monthly outgo matters most, {_loan_name(cheapest_emi)} has the smallest EMI at ₹{cheapest_emi['emi']:,.0f}.")
+    elif interest_diff > 0:
+        sentences.append("That's significant savings you can use for other financial goals!")
+    
+    return " ".join(sentences)
+
+
+def loan_recommendation(best_loan: Dict, all_loans: List[Dict]) -> str:
+    """
+    Recommendation for the top-ranked loan, with its savings against the costliest option compared.
+    """
+    name = _loan_name(best_loan)
+    text = f"Based on our analysis, {name} is your best option with a monthly EMI of ₹{best_loan['emi']:,.2f} and total interest of ₹{best_loan['total_interest']:,.0f}."
+    
+    others = [loan for loan in all_loans if _loan_name(loan) != name]
+    if others:
+        costliest = max(others, key=lambda loan: loan['total_cost'])
+        saving = costliest['total_cost'] - best_loan['total_cost']
+        if saving > 0:
+            text += f" Compared with {_loan_name(costliest)}, it saves you ₹{saving:,.0f} over the life of the loan."
+        text += f" It scored {best_loan['score']:.0f}/100 across interest, EMI, total cost, tenure and fees among {len(all_loans)} options."
+    else:
+        text += " This choice offers the optimal balance of affordability and total cost savings."
+    return text + " You'll be on track to financial freedom with smart loan management!"
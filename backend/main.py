@@ -1,16 +1,95 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
 from models import *
 from calculations import *
+from simulation import simulate_prepayment_plan
+from optimizer import no_prepayment_plan, optimize_prepayments
+from refinance import analyze_refinance
+from portfolio import analyze_portfolio
+from whatif import apply_update, session_results, start_session
+from schedule import BINARY_DTYPE, CSV_HEADER, AmortizationSchedule
+from responses import CompressionMiddleware, FastJSONResponse, dumps, jsonable
 from ai_service import *
 from config import get_settings
+from cache import MemoCache, TTLCache
+from conversations import ConversationStore
+from metrics import registry, observe_request
+from workers import PoolSaturated, WorkerPool
 
 settings = get_settings()
 
+# Deferred AI insights for /api/compare-loans, keyed by insight_id. Running tasks are held in
+# running_insights, a strong reference the event loop does not keep, and move to the expiring
+# insight_tasks only once finished, so eviction never drops an insight still being generated.
+running_insights: Dict[str, asyncio.Task] = {}
+insight_tasks = TTLCache(maxsize=settings.insight_store_size, ttl=settings.insight_ttl_seconds)
+
+# What-if sessions: parameters and derived results, keyed by session_id; idle sessions expire
+what_if_sessions = TTLCache(maxsize=settings.what_if_session_size, ttl=settings.what_if_session_ttl_seconds)
+
+# ai-chat history per session: recent turns verbatim, older ones summarized
+conversations = ConversationStore(
+    summarize_conversation,
+    maxsize=settings.chat_session_size,
+    ttl=settings.chat_session_ttl_seconds,
+    recent_turns=settings.chat_recent_turns,
+    summary_max_chars=settings.chat_summary_max_chars
+)
+
+# Serialized responses of deterministic calculation endpoints, keyed by normalized request body
+calculation_memo = MemoCache(maxsize=settings.memo_cache_size, max_bytes=settings.memo_cache_max_bytes)
+
+# Process pool for calculation requests above calc_offload_min_size, started on first use.
+# By default the cores are shared out between the WEB_CONCURRENCY server processes.
+worker_pool = WorkerPool(
+    settings.calc_workers if settings.calc_workers is not None else max(1, (os.cpu_count() or 1) // settings.web_concurrency),
+    settings.calc_max_pending,
+    preload=("calculations", "simulation", "optimizer")
+)
+
+# Portfolio uploads analyzed at once; each keeps up to two chunks per pool worker in flight
+portfolio_jobs = asyncio.Semaphore(settings.portfolio_max_jobs)
+
+
+def _report_preload(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logging.getLogger("loan_optimizer").warning(
+            "AI preload failed, the model loads on the first AI request instead: %s", task.exception()
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ai_preload = None
+    if settings.ai_preload and ai_enabled():
+        # Load the Google SDK in the background instead of on the first AI request. app.state
+        # holds the task until shutdown, since the event loop only keeps a weak reference
+        app.state.ai_preload = asyncio.create_task(asyncio.to_thread(get_model))
+        app.state.ai_preload.add_done_callback(_report_preload)
+    yield
+    if app.state.ai_preload is not None:
+        app.state.ai_preload.cancel()
+    worker_pool.shutdown()
+
+
 app = FastAPI(
     title="AI-Powered Loan Optimizer API",
     description="Intelligent loan comparison and optimization platform with AI recommendations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -22,6 +101,87 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in gzip/brotli for complete responses above the size threshold (streams are left alone)
+if settings.compression_min_size is not None:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        observe_request(
+            request.method,
+            route.path if route else "unmatched",
+            status,
+            time.perf_counter() - started,
+            settings.slow_request_ms
+        )
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def _run_calculation(size: int, func, *args):
+    """
+    Run a calculation inline, or in the worker pool when it processes at least
+    calc_offload_min_size items (loans, rows, months or events) so it does not block the event loop.
+    """
+    if size < settings.calc_offload_min_size or not worker_pool.enabled:
+        return func(*args)
+    
+    try:
+        return await worker_pool.run(func, *args)
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Calculation workers are busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+
+def _json_response(content: Dict):
+    """
+    With FAST_JSON, a FastJSONResponse rendered by dumps(), skipping FastAPI's encoding and
+    response_model pass; otherwise the plain data, validated and encoded as usual.
+    """
+    if settings.fast_json:
+        return FastJSONResponse(content)
+    return jsonable(content)
+
+
+async def _memoized_response(request: Request, endpoint: str, payload: BaseModel, compute) -> Response:
+    """
+    Serve a pure calculation endpoint from the memo cache; the async compute() runs only on a miss
+    and may return the JSON body already serialized (bytes); other results are serialized by
+    dumps(). Answers 304 when the client's If-None-Match already holds the ETag.
+    """
+    key = f"{endpoint}:{payload.model_dump_json()}"
+    entry = calculation_memo.get(key)
+    if entry is None:
+        result = await compute()
+        body = result if isinstance(result, bytes) else dumps(result)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        calculation_memo.set(key, etag, body)
+    else:
+        etag, body = entry
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @app.get("/")
 async def root():
@@ -35,106 +195,639 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy", "service": "loan-optimizer-api"}
+    return {"status": "healthy", "service": "loan-optimizer-api", "ai": ai_status()}
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Request, calculation and AI latency metrics in Prometheus text format.
+    """
+    for tier, hits in (("memory", response_cache.memory_hits), ("shared", response_cache.shared_hits)):
+        registry.set_gauge("ai_cache_hits", "AI response cache hits by tier", hits, tier=tier)
+    registry.set_gauge("ai_cache_misses", "AI response cache misses", response_cache.misses)
+    registry.set_gauge("ai_cache_entries", "Entries in the in-process AI response cache", len(response_cache.memory))
+    registry.set_gauge("ai_inflight_calls", "Distinct Gemini calls in flight (identical requests share one)", len(ai_flights))
+    registry.set_gauge("memo_cache_hits", "Calculation memo cache hits", calculation_memo.hits)
+    registry.set_gauge("memo_cache_misses", "Calculation memo cache misses", calculation_memo.misses)
+    registry.set_gauge("memo_cache_bytes", "Bytes held by the calculation memo cache", calculation_memo.total_bytes)
+    pool = worker_pool.stats()
+    registry.set_gauge("worker_pool_workers", "Processes in the calculation worker pool", pool["workers"])
+    registry.set_gauge("worker_pool_max_pending", "Calculations the worker pool may hold before refusing more", pool["max_pending"])
+    registry.set_gauge("worker_pool_pending", "Calculations queued or running in the worker pool", pool["pending"])
+    registry.set_gauge("worker_pool_completed", "Calculations finished successfully by the worker pool", pool["completed"])
+    registry.set_gauge("worker_pool_failed", "Calculations that raised in the worker pool", pool["failed"])
+    registry.set_gauge("worker_pool_rejected", "Calculations refused because the worker pool was saturated", pool["rejected"])
+    registry.set_gauge("chat_sessions", "ai-chat sessions held in memory", len(conversations))
+    registry.set_gauge("chat_summaries", "Summaries written for ai-chat sessions", conversations.summaries)
+    
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.post("/api/calculate-emi", response_model=EMIResponse)
-async def calculate_emi_endpoint(loan: LoanInput):
+async def calculate_emi_endpoint(loan: LoanInput, http_request: Request):
     """
     Calculate EMI for a single loan.
     """
+    async def compute():
+        try:
+            result = calculate_emi(loan.principal, loan.interest_rate, loan.tenure_months)
+            return EMIResponse(**result)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await _memoized_response(http_request, "calculate-emi", loan, compute)
+
+
+@app.post("/api/calculate-emi/batch", response_model=BatchEMIResponse)
+async def calculate_emi_batch_endpoint(batch: BatchLoanInput):
+    """
+    Calculate EMI for many loans at once from columnar inputs.
+    """
     try:
-        result = calculate_emi(loan.principal, loan.interest_rate, loan.tenure_months)
-        return EMIResponse(**result)
+        count = len(batch.principals)
+        if len(batch.interest_rates) != count or len(batch.tenure_months) != count:
+            raise HTTPException(
+                status_code=400,
+                detail="principals, interest_rates and tenure_months must have the same length"
+            )
+        
+        if count > settings.max_batch_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maximum {settings.max_batch_size} loans per batch"
+            )
+        
+        if min(batch.principals) <= 0 or min(batch.tenure_months) <= 0:
+            raise HTTPException(status_code=400, detail="Principal and tenure must be positive")
+        
+        if min(batch.interest_rates) < 0 or max(batch.interest_rates) > 100:
+            raise HTTPException(status_code=400, detail="Interest rate must be between 0 and 100")
+        
+        result = await _run_calculation(
+            count,
+            calculate_emi_batch,
+            batch.principals,
+            batch.interest_rates,
+            batch.tenure_months
+        )
+        
+        # With FAST_JSON the arrays go straight to the encoder; BatchEMIResponse documents the shape
+        return _json_response({
+            "emi": result['emi'],
+            "total_payment": result['total_payment'],
+            "total_interest": result['total_interest'],
+            "count": count
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/api/sensitivity-grid")
+async def sensitivity_grid_endpoint(request: SensitivityGridRequest):
+    """
+    EMI and total interest over every rate × tenure × principal combination, with analytic
+    sensitivities per rate_step and tenure_step. Matrices are indexed [rate][tenure][principal].
+    """
+    try:
+        cells = len(request.interest_rates) * len(request.tenure_months) * len(request.principals)
+        if cells > settings.max_grid_cells:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maximum {settings.max_grid_cells} grid cells (rates × tenures × principals)"
+            )
+        
+        if min(request.principals) <= 0 or min(request.tenure_months) <= 0:
+            raise HTTPException(status_code=400, detail="Principal and tenure must be positive")
+        
+        if min(request.interest_rates) < 0 or max(request.interest_rates) > 100:
+            raise HTTPException(status_code=400, detail="Interest rate must be between 0 and 100")
+        
+        grid = await _run_calculation(
+            cells,
+            emi_sensitivity_grid,
+            request.principals,
+            request.interest_rates,
+            request.tenure_months,
+            request.rate_step,
+            request.tenure_step
+        )
+        
+        response = {
+            "axes": ["interest_rate", "tenure_months", "principal"],
+            "interest_rates": request.interest_rates,
+            "tenure_months": request.tenure_months,
+            "principals": request.principals,
+            "shape": list(grid['emi'].shape),
+            "emi": grid['emi'],
+            "total_interest": grid['total_interest']
+        }
+        if request.include_sensitivity:
+            response["sensitivity"] = {
+                "rate_step": request.rate_step,
+                "tenure_step": request.tenure_step,
+                **{key: values for key, values in grid.items() if key.endswith("_step")}
+            }
+        return _json_response(response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _comparative_insight(results):
+    try:
+        return await get_comparative_insight(results)
+    except Exception:
+        return "Compare the options above to find the best fit for your financial situation."
+
+
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _event_stream(events) -> StreamingResponse:
+    # no-cache and X-Accel-Buffering keep proxies from holding events back
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/compare-loans")
 async def compare_loans_endpoint(request: ComparisonRequest):
     """
     Compare multiple loans and return ranked results with AI insights.
+    With insight_mode "deferred" or "stream" the ranking is returned without waiting for the AI.
     """
     try:
         if len(request.loans) < 2:
             raise HTTPException(status_code=400, detail="At least 2 loans required for comparison")
         
-        if len(request.loans) > 5:
-            raise HTTPException(status_code=400, detail="Maximum 5 loans can be compared")
+        if len(request.loans) > settings.max_compare_loans:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maximum {settings.max_compare_loans} loans can be compared"
+            )
         
         # Convert to dict format for calculations
         loans_dict = [loan.dict() for loan in request.loans]
+        weights = request.weights.dict() if request.weights else None
         
         # Calculate comparisons
-        results = compare_loans(loans_dict)
-        
-        # Generate AI insight
         try:
-            ai_insight = get_comparative_insight(results)
-        except:
-            ai_insight = "Compare the options above to find the best fit for your financial situation."
+            ranking = await _run_calculation(len(loans_dict), rank_loans, loans_dict, weights, request.top_k)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        results = ranking["comparisons"]
         
-        return {
+        response = {
             "comparisons": results,
-            "ai_insight": ai_insight,
+            "ai_insight": None,
             "best_loan_id": results[0]['id'],
-            "total_compared": len(results)
+            "total_compared": ranking["total_compared"],
+            "returned": len(results),
+            "bounds": ranking["bounds"]
         }
+        
+        if request.insight_mode == "stream":
+            async def events():
+                yield _sse_event("ranking", response)
+                yield _sse_event("insight", {"ai_insight": await _comparative_insight(results)})
+            
+            return _event_stream(events())
+        
+        if request.insight_mode == "deferred":
+            insight_id = _defer_insight(results)
+            return _json_response({**response, "insight_id": insight_id, "insight_status": "pending"})
+        
+        # Generate AI insight
+        response["ai_insight"] = await _comparative_insight(results)
+        return _json_response(response)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _defer_insight(results: List[Dict]) -> str:
+    """
+    Start generating the comparative insight in the background and return its insight_id.
+    """
+    insight_id = uuid.uuid4().hex
+    task = asyncio.create_task(_comparative_insight(results))
+    running_insights[insight_id] = task
+    
+    def finished(task: asyncio.Task):
+        del running_insights[insight_id]
+        insight_tasks.set(insight_id, task)
+    
+    task.add_done_callback(finished)
+    return insight_id
+
+
+@app.get("/api/compare-loans/insight/{insight_id}")
+async def compare_loans_insight_endpoint(insight_id: str):
+    """
+    Poll for a deferred AI insight created by /api/compare-loans.
+    """
+    task = running_insights.get(insight_id) or insight_tasks.get(insight_id)
+    if task is None or task.cancelled():
+        raise HTTPException(status_code=404, detail="Unknown or expired insight_id")
+    
+    if not task.done():
+        return {"insight_id": insight_id, "insight_status": "pending", "ai_insight": None}
+    
+    return {"insight_id": insight_id, "insight_status": "ready", "ai_insight": task.result()}
+
+
 @app.post("/api/calculate-prepayment", response_model=PrepaymentResponse)
-async def calculate_prepayment_endpoint(request: PrepaymentRequest):
+async def calculate_prepayment_endpoint(request: PrepaymentRequest, http_request: Request):
     """
     Calculate the impact of prepayment on loan.
     """
+    async def compute():
+        try:
+            if request.prepayment_month >= request.tenure_months:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Prepayment month must be before loan tenure ends"
+                )
+            
+            result = calculate_prepayment_impact(
+                request.principal,
+                request.interest_rate,
+                request.tenure_months,
+                request.prepayment_amount,
+                request.prepayment_month,
+                request.reduce_emi
+            )
+            
+            return PrepaymentResponse(**result)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await _memoized_response(http_request, "calculate-prepayment", request, compute)
+
+
+@app.post("/api/calculate-prepayment/timing")
+async def prepayment_timing_endpoint(request: PrepaymentTimingRequest):
+    """
+    Evaluate the same prepayment at every candidate month in one vectorized pass.
+    """
     try:
-        if request.prepayment_month >= request.tenure_months:
+        months = request.months if request.months is not None else list(range(1, request.tenure_months))
+        if not months:
+            raise HTTPException(status_code=400, detail="At least one prepayment month required")
+        
+        if min(months) < 0 or max(months) >= request.tenure_months:
             raise HTTPException(
                 status_code=400,
-                detail="Prepayment month must be before loan tenure ends"
+                detail="Prepayment months must be before loan tenure ends"
             )
         
-        result = calculate_prepayment_impact(
+        result = await _run_calculation(
+            len(months),
+            calculate_prepayment_impact_batch,
             request.principal,
             request.interest_rate,
             request.tenure_months,
             request.prepayment_amount,
-            request.prepayment_month,
+            months,
             request.reduce_emi
         )
+        best = int(result['interest_saved'].argmax())
+        
+        return _json_response({
+            **result,
+            "best_month": int(result['prepayment_month'][best]),
+            "best_interest_saved": float(result['interest_saved'][best])
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/simulate-prepayments")
+async def simulate_prepayments_endpoint(request: SimulationRequest):
+    """
+    Simulate lump sums, recurring top-ups and rate resets in one pass.
+    """
+    try:
+        if len(request.events) > settings.max_simulation_events:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maximum {settings.max_simulation_events} events per simulation"
+            )
         
-        return PrepaymentResponse(**result)
+        return await _run_calculation(
+            len(request.events),
+            simulate_prepayment_plan,
+            request.principal,
+            request.interest_rate,
+            request.tenure_months,
+            [event.dict() for event in request.events],
+            request.reduce_emi,
+            settings.max_simulation_events
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/api/optimize-prepayment")
+async def optimize_prepayment_endpoint(request: PrepaymentOptimizerRequest):
+    """
+    Find the prepayment timing and amounts that maximize interest saved.
+    """
+    try:
+        loan = request.current_loan
+        return await _run_calculation(
+            request.timeline_months * request.max_prepayments,
+            optimize_prepayments,
+            loan.principal,
+            loan.interest_rate,
+            loan.tenure_months,
+            request.available_savings,
+            request.timeline_months,
+            request.max_prepayments,
+            request.min_prepayment,
+            request.emergency_reserve,
+            request.savings_schedule,
+            request.reduce_emi
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/refinance")
+async def refinance_endpoint(request: RefinanceRequest):
+    """
+    Break-even month and net savings of moving the remaining balance to each offer.
+    """
+    try:
+        if len(request.offers) > settings.max_refinance_offers:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maximum {settings.max_refinance_offers} offers per analysis"
+            )
+        
+        result = await _run_calculation(
+            len(request.offers),
+            analyze_refinance,
+            request.current_loan.dict(),
+            request.months_elapsed,
+            [offer.dict() for offer in request.offers],
+            request.horizon_months,
+            request.weights.dict() if request.weights else None
+        )
+        return _json_response(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/what-if/sessions")
+async def create_what_if_session_endpoint(request: WhatIfParameters):
+    """
+    Start a what-if session; returns the session_id and the full results.
+    """
+    try:
+        state = await _run_calculation(request.tenure_months, start_session, request.dict())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    session_id = uuid.uuid4().hex
+    what_if_sessions.set(session_id, state)
+    return _json_response({"session_id": session_id, **session_results(state)})
+
+
+@app.patch("/api/what-if/sessions/{session_id}")
+async def update_what_if_session_endpoint(session_id: str, request: WhatIfUpdate):
+    """
+    Change some parameters of a session. Only the affected results are recomputed, and only
+    what changed is returned: the EMI, the prepayment fields and the schedule from the first
+    month that differs.
+    """
+    state = what_if_sessions.get(session_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session_id")
+    
+    changes = {key: value for key, value in request.dict(exclude_unset=True).items() if value is not None}
+    try:
+        state, diff = await _run_calculation(
+            max(state["params"]["tenure_months"], changes.get("tenure_months", 0)),
+            apply_update,
+            state,
+            changes
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Re-store (a worker returns an updated copy) and restart the idle timeout
+    what_if_sessions.set(session_id, state)
+    return _json_response({"session_id": session_id, **diff})
+
+
+@app.get("/api/what-if/sessions/{session_id}")
+async def get_what_if_session_endpoint(session_id: str):
+    state = what_if_sessions.get(session_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session_id")
+    return _json_response({"session_id": session_id, **session_results(state)})
+
+
+@app.delete("/api/what-if/sessions/{session_id}")
+async def delete_what_if_session_endpoint(session_id: str):
+    if what_if_sessions.pop(session_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session_id")
+    return {"session_id": session_id, "deleted": True}
+
+
 @app.post("/api/amortization-schedule")
-async def amortization_schedule_endpoint(request: AmortizationScheduleRequest):
+async def amortization_schedule_endpoint(request: AmortizationScheduleRequest, http_request: Request):
     """
     Generate month-by-month payment breakdown.
+    Supports paging with offset/limit; totals are computed in closed form.
+    """
+    async def compute():
+        try:
+            rows = max(0, min(request.tenure_months - request.offset, request.limit or request.tenure_months))
+            schedule = await _run_calculation(
+                rows,
+                amortization_schedule,
+                request.principal,
+                request.interest_rate,
+                request.tenure_months,
+                request.offset,
+                request.limit
+            )
+            totals = amortization_totals(request.principal, request.interest_rate, request.tenure_months)
+            
+            # The schedule is written from its columns; only the small envelope is a dict
+            envelope = dumps({"offset": request.offset, "limit": request.limit, **totals})
+            return b'{"schedule":' + schedule.to_json().encode("utf-8") + b"," + envelope[1:]
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await _memoized_response(http_request, "amortization-schedule", request, compute)
+
+
+@app.post("/api/amortization-schedule/month/{month}")
+async def amortization_month_endpoint(month: int, request: AmortizationScheduleRequest):
+    """
+    Get the payment breakdown for a single month.
     """
     try:
-        schedule = generate_amortization_schedule(
+        return amortization_row(request.principal, request.interest_rate, request.tenure_months, month)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Months per chunk when streaming a schedule
+SCHEDULE_STREAM_CHUNK = 10000
+
+
+def _schedule_chunks(request: AmortizationScheduleRequest, render):
+    """
+    Yield the requested schedule page rendered chunk by chunk, so memory stays bounded.
+    """
+    end = request.tenure_months if request.limit is None else min(request.tenure_months, request.offset + request.limit)
+    for offset in range(request.offset, end, SCHEDULE_STREAM_CHUNK):
+        yield render(amortization_schedule(
             request.principal,
             request.interest_rate,
-            request.tenure_months
+            request.tenure_months,
+            offset,
+            min(SCHEDULE_STREAM_CHUNK, end - offset)
+        ))
+
+
+@app.post("/api/amortization-schedule/stream")
+async def amortization_schedule_stream_endpoint(
+    request: AmortizationScheduleRequest,
+    format: str = Query("ndjson", pattern="^(ndjson|csv|binary)$")
+):
+    """
+    Stream the schedule as NDJSON, CSV or packed binary records without holding it in memory.
+    Binary rows are little-endian int32 month followed by float64 emi, principal_payment,
+    interest_payment and remaining_balance (36 bytes each).
+    """
+    try:
+        # Validate inputs up front so errors surface as 400 rather than a broken stream
+        calculate_emi(request.principal, request.interest_rate, request.tenure_months)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if format == "csv":
+        def csv_chunks():
+            yield CSV_HEADER
+            yield from _schedule_chunks(request, lambda schedule: schedule.to_csv(header=False))
+        
+        return StreamingResponse(
+            csv_chunks(),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=amortization_schedule.csv"}
+        )
+    if format == "binary":
+        return StreamingResponse(
+            _schedule_chunks(request, AmortizationSchedule.to_bytes),
+            media_type="application/octet-stream",
+            headers={"X-Record-Dtype": json.dumps(BINARY_DTYPE.descr)}
         )
+    return StreamingResponse(_schedule_chunks(request, AmortizationSchedule.to_ndjson), media_type="application/x-ndjson")
+
+
+def _remove_files(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@app.post("/api/portfolio/analyze")
+async def portfolio_analyze_endpoint(
+    file: UploadFile = File(...),
+    weights: Optional[str] = Form(None, description="ScoringWeights as JSON"),
+    output_format: str = Query("csv", pattern="^(csv|parquet)$")
+):
+    """
+    Analyze an uploaded loan book (CSV or Parquet) in chunks and return the per-loan results file.
+    """
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    if suffix not in (".csv", ".parquet", ".pq"):
+        raise HTTPException(status_code=400, detail="Upload a .csv or .parquet file")
+    
+    if portfolio_jobs.locked():
+        raise HTTPException(
+            status_code=503,
+            detail="Portfolio analysis is busy, please retry shortly",
+            headers={"Retry-After": "5"}
+        )
+    
+    async with portfolio_jobs:
+        return await _analyze_portfolio_upload(file, weights, suffix, output_format)
+
+
+async def _analyze_portfolio_upload(file: UploadFile, weights: Optional[str], suffix: str, output_format: str):
+    input_fd, input_path = tempfile.mkstemp(suffix=suffix)
+    output_fd, output_path = tempfile.mkstemp(suffix=f".{output_format}")
+    os.close(output_fd)
+    try:
+        # Spool the upload to disk so the pipeline can stream it twice
+        size = 0
+        with os.fdopen(input_fd, "wb") as f:
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+                if size > settings.portfolio_max_upload_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Maximum upload size is {settings.portfolio_max_upload_bytes} bytes"
+                    )
+                f.write(chunk)
         
-        return {
-            "schedule": schedule,
-            "total_months": len(schedule),
-            "total_payment": sum(item['emi'] for item in schedule),
-            "total_principal": sum(item['principal_payment'] for item in schedule),
-            "total_interest": sum(item['interest_payment'] for item in schedule)
-        }
+        # Chunks run on the shared calculation pool, or in-process when it is disabled
+        summary = await asyncio.to_thread(
+            analyze_portfolio,
+            input_path,
+            output_path,
+            ScoringWeights.model_validate_json(weights).model_dump() if weights else None,
+            settings.portfolio_chunk_size,
+            worker_pool.workers if worker_pool.enabled else 1,
+            worker_pool.executor()
+        )
+    except HTTPException:
+        _remove_files(input_path, output_path)
+        raise
     except Exception as e:
+        _remove_files(input_path, output_path)
         raise HTTPException(status_code=400, detail=str(e))
+    
+    _remove_files(input_path)
+    return FileResponse(
+        output_path,
+        media_type="text/csv" if output_format == "csv" else "application/vnd.apache.parquet",
+        filename=f"portfolio_results.{output_format}",
+        headers={"X-Portfolio-Rows": str(summary["rows"])},
+        background=BackgroundTask(_remove_files, output_path)
+    )
 
 
 @app.post("/api/ai-advisor")
@@ -143,7 +836,7 @@ async def ai_advisor_endpoint(request: AIAdvisorRequest):
     Get AI-powered loan recommendation in natural language.
     """
     try:
-        recommendation = generate_loan_recommendation(
+        recommendation = await generate_loan_recommendation(
             request.best_loan.dict(),
             request.user_profile,
             [loan.dict() for loan in request.all_loans]
@@ -170,7 +863,7 @@ async def ai_explain_term_endpoint(request: AIExplainRequest):
     Get simple explanation of financial term.
     """
     try:
-        explanation = explain_financial_term(request.term, request.context)
+        explanation = await explain_financial_term(request.term, request.context)
         
         return {
             "term": request.term,
@@ -180,52 +873,173 @@ async def ai_explain_term_endpoint(request: AIExplainRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+async def _strategy_plan(request: AIStrategyRequest) -> Dict:
+    """
+    Optimized prepayment plan for a strategy request. Without savings to deploy, or without a month
+    left to prepay in before the loan ends, the plan is the loan as it stands.
+    """
+    loan = request.current_loan
+    if request.available_savings <= 0 or loan.tenure_months < 2:
+        return no_prepayment_plan(loan.principal, loan.interest_rate, loan.tenure_months)
+    return await _run_calculation(
+        request.timeline_months * 4,
+        optimize_prepayments,
+        loan.principal,
+        loan.interest_rate,
+        loan.tenure_months,
+        request.available_savings,
+        request.timeline_months
+    )
+
+
 @app.post("/api/ai-strategy")
 async def ai_strategy_endpoint(request: AIStrategyRequest):
     """
     Generate personalized savings strategy.
+    The plan comes from the optimizer; the AI only narrates it.
     """
     try:
-        strategy = generate_savings_strategy(
+        plan = await _strategy_plan(request)
+        
+        strategy = await generate_savings_strategy(
             request.current_loan.dict(),
             request.available_savings,
             request.financial_goal,
-            request.timeline_months
+            request.timeline_months,
+            plan
         )
         
         return {
             "strategy": strategy,
+            "plan": plan,
             "available_savings": request.available_savings,
             "timeline_months": request.timeline_months,
             "goal": request.financial_goal
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/api/ai-strategy/stream")
+async def ai_strategy_stream_endpoint(request: AIStrategyRequest):
+    """
+    /api/ai-strategy as server-sent events. "plan" is sent as soon as the optimizer is done,
+    then "token" events carry the narration as the model writes it. A "fallback" event carries
+    the canned strategy and replaces any text received so far. "done" carries the full strategy.
+    """
+    try:
+        loan = request.current_loan
+        plan = await _strategy_plan(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def events():
+        yield _sse_event("plan", {
+            "plan": plan,
+            "available_savings": request.available_savings,
+            "timeline_months": request.timeline_months,
+            "goal": request.financial_goal
+        })
+        strategy = ""
+        async for kind, text in stream_savings_strategy(loan.dict(), request.financial_goal, plan):
+            strategy = strategy + text if kind == "token" else text
+            yield _sse_event(kind, {"text": text})
+        yield _sse_event("done", {"strategy": strategy})
+    
+    return _event_stream(events())
+
+
+def _chat_session(request: AIChatRequest):
+    """
+    Session and prompt history for a chat turn. Requests that carry their own
+    conversation_history (and no session_id) stay stateless, as before sessions existed.
+    Returns (session_id, conversation, history, summary, max_history).
+    """
+    if request.conversation_history is not None and request.session_id is None:
+        return None, None, request.conversation_history, None, 3
+    
+    session_id, conversation = conversations.open(request.session_id)
+    summary, history = conversation.context()
+    return session_id, conversation, history, summary, None
+
+
 @app.post("/api/ai-chat")
 async def ai_chat_endpoint(request: AIChatRequest):
     """
     Chatbot conversation endpoint.
+    Send the returned session_id with the next question instead of the conversation history.
     """
+    session_id, conversation, history, summary, max_history = _chat_session(request)
     try:
-        response = chat_with_advisor(
+        response = await chat_with_advisor(
             request.user_question,
             request.loan_context,
-            request.conversation_history
+            history,
+            summary,
+            max_history
         )
-        
-        return {
-            "question": request.user_question,
-            "answer": response,
-            "timestamp": "now"
-        }
     except Exception as e:
-        return {
+        response = "I'm here to help! Could you rephrase your question or provide more details about your loan situation?"
+    
+    if conversation is not None:
+        conversations.record(session_id, conversation, request.user_question, response)
+    return {
+        "question": request.user_question,
+        "answer": response,
+        "session_id": session_id,
+        "timestamp": "now"
+    }
+
+
+@app.post("/api/ai-chat/stream")
+async def ai_chat_stream_endpoint(request: AIChatRequest):
+    """
+    /api/ai-chat as server-sent events: "token" events carry the answer as the model writes it,
+    a "fallback" event carries the canned answer and replaces any text received so far, and
+    "done" carries the full answer and the session_id.
+    """
+    session_id, conversation, history, summary, max_history = _chat_session(request)
+    
+    async def events():
+        answer = ""
+        async for kind, text in stream_chat_with_advisor(
+            request.user_question,
+            request.loan_context,
+            history,
+            summary,
+            max_history
+        ):
+            answer = answer + text if kind == "token" else text
+            yield _sse_event(kind, {"text": text})
+        if conversation is not None:
+            conversations.record(session_id, conversation, request.user_question, answer)
+        yield _sse_event("done", {
             "question": request.user_question,
-            "answer": "I'm here to help! Could you rephrase your question or provide more details about your loan situation?",
+            "answer": answer,
+            "session_id": session_id,
             "timestamp": "now"
-        }
+        })
+    
+    return _event_stream(events())
+
+
+@app.delete("/api/ai-chat/sessions/{session_id}")
+async def delete_chat_session_endpoint(session_id: str):
+    if not conversations.delete(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired session_id")
+    return {"session_id": session_id, "deleted": True}
+
+
+@app.get("/api/ai-cache/stats")
+async def ai_cache_stats_endpoint():
+    """
+    Hit/miss counters for the AI response cache, and how many requests shared an in-flight call.
+    """
+    return {**response_cache.stats(), "single_flight": ai_flights.stats()}
 
 
 @app.get("/api/sample-loans")
@@ -328,4 +1142,7 @@ async def get_sample_loans():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=settings.port)
+    if settings.web_concurrency > 1:
+        uvicorn.run("main:app", host="0.0.0.0", port=settings.port, workers=settings.web_concurrency)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=settings.port)
@@ -0,0 +1,192 @@
+import bisect
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_request_logger = logging.getLogger("loan_optimizer.slow_requests")
+
+
+class Histogram:
+    """
+    Prometheus-style latency histogram with fixed buckets (in seconds).
+    """
+    
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class MetricsRegistry:
+    """
+    In-process registry of histograms, counters and gauges, rendered in Prometheus text format.
+    Each worker process keeps its own registry.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._gauges: Dict[str, Dict[Tuple, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, **labels) -> Histogram:
+        key = tuple(sorted(labels.items()))
+        series = self._histograms.setdefault(name, {})
+        if key not in series:
+            with self._lock:
+                self._help.setdefault(name, help_text)
+                series.setdefault(key, Histogram())
+        return series[key]
+
+    def inc(self, name: str, help_text: str, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name: str, help_text: str, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            self._gauges.setdefault(name, {})[key] = value
+
+    def render(self) -> str:
+        lines = []
+        for name, series in sorted(self._counters.items()):
+            lines += [f"# HELP {name} {self._help[name]}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_format_labels(key)} {value}" for key, value in sorted(series.items())]
+        
+        for name, series in sorted(self._gauges.items()):
+            lines += [f"# HELP {name} {self._help[name]}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{_format_labels(key)} {value}" for key, value in sorted(series.items())]
+        
+        for name, series in sorted(self._histograms.items()):
+            lines += [f"# HELP {name} {self._help[name]}", f"# TYPE {name} histogram"]
+            for key, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+registry = MetricsRegistry()
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """
+    Decorator recording the latency of a calculation function (sync or async).
+    """
+    def decorator(func: Callable) -> Callable:
+        histogram = registry.histogram(
+            "function_duration_seconds",
+            "Latency of calculation functions",
+            function=name or func.__name__
+        )
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    
+    return decorator
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, slow_request_ms: Optional[float] = None) -> None:
+    """
+    Record one HTTP request; logs it when slower than slow_request_ms (if set).
+    """
+    registry.histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route",
+        method=method,
+        route=route
+    ).observe(seconds)
+    registry.inc(
+        "http_requests_total",
+        "HTTP requests by route and status code",
+        method=method,
+        route=route,
+        status=str(status)
+    )
+    if status >= 500:
+        registry.inc("http_request_errors_total", "HTTP requests that failed with a 5xx status", method=method, route=route)
+    
+    if slow_request_ms is not None and seconds * 1000 >= slow_request_ms:
+        slow_request_logger.warning("Slow request: %s %s -> %s in %.1f ms", method, route, status, seconds * 1000)
+
+
+def observe_ai_call(function: str, outcome: str, seconds: float) -> None:
+    """
+    Record one Gemini call. Any outcome other than "ok" or "cancelled" (a streaming client
+    disconnected) means the caller served its fallback.
+    """
+    registry.histogram(
+        "ai_call_duration_seconds",
+        "Latency of Gemini calls by AI function",
+        function=function
+    ).observe(seconds)
+    registry.inc("ai_calls_total", "Gemini calls by AI function and outcome", function=function, outcome=outcome)
+    if outcome not in ("ok", "cancelled"):
+        registry.inc("ai_fallbacks_total", "AI responses served from canned fallbacks", function=function)
+
+
+def observe_ai_coalesced(function: str) -> None:
+    """
+    Record an AI request that joined an identical in-flight call instead of making its own.
+    """
+    registry.inc("ai_coalesced_total", "AI requests served by an identical in-flight Gemini call", function=function)
+
+
+def observe_local_answer(function: str) -> None:
+    """
+    Record an AI request answered by the local advisor without calling Gemini (AI_ROUTING).
+    """
+    registry.inc("ai_local_answers_total", "AI requests answered locally without a Gemini call", function=function)
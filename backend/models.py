@@ -1,5 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Literal
+
+
+# Longest tenure accepted where a request's memory grows with it (50 years)
+MAX_TENURE_MONTHS = 600
 
 
 class LoanInput(BaseModel):
@@ -9,6 +13,14 @@ class LoanInput(BaseModel):
     processing_fee: float = Field(default=0, ge=0, description="Processing fee amount")
 
 
+class PlannedLoanInput(LoanInput):
+    """
+    Loan with a bounded tenure, for calculations whose working memory grows with it: the prepayment
+    optimizer (with the square of the timeline) and refinancing (months × offers).
+    """
+    tenure_months: int = Field(..., gt=0, le=MAX_TENURE_MONTHS, description="Loan tenure in months")
+
+
 class EMIResponse(BaseModel):
     emi: float
     total_payment: float
@@ -17,6 +29,19 @@ class EMIResponse(BaseModel):
     monthly_rate: float
 
 
+class BatchLoanInput(BaseModel):
+    principals: List[float] = Field(..., min_length=1, description="Loan principal amounts")
+    interest_rates: List[float] = Field(..., min_length=1, description="Annual interest rates in percentage")
+    tenure_months: List[int] = Field(..., min_length=1, description="Loan tenures in months")
+
+
+class BatchEMIResponse(BaseModel):
+    emi: List[float]
+    total_payment: List[float]
+    total_interest: List[float]
+    count: int
+
+
 class LoanOption(BaseModel):
     id: str
     name: str
@@ -38,8 +63,25 @@ class LoanComparisonResult(BaseModel):
     badge: Optional[str] = None
 
 
+class ScoringWeights(BaseModel):
+    interest: float = Field(default=0.35, ge=0)
+    emi: float = Field(default=0.25, ge=0)
+    total_cost: float = Field(default=0.20, ge=0)
+    tenure: float = Field(default=0.10, ge=0)
+    processing_fee: float = Field(default=0.10, ge=0)
+
+
 class ComparisonRequest(BaseModel):
     loans: List[LoanOption]
+    weights: Optional[ScoringWeights] = Field(
+        default=None,
+        description="MCDA weights; rescaled to sum to 1"
+    )
+    top_k: Optional[int] = Field(default=None, gt=0, description="Return only the best k loans")
+    insight_mode: Literal["sync", "deferred", "stream"] = Field(
+        default="sync",
+        description="sync waits for the AI insight, deferred returns an insight_id to poll, stream sends SSE events"
+    )
 
 
 class PrepaymentRequest(BaseModel):
@@ -51,6 +93,80 @@ class PrepaymentRequest(BaseModel):
     reduce_emi: bool = False
 
 
+class SimulationEvent(BaseModel):
+    type: Literal["lump_sum", "recurring", "rate_change"]
+    month: int = Field(..., ge=0, description="Event applies after this EMI")
+    amount: Optional[float] = Field(default=None, gt=0, description="Prepayment amount for lump_sum/recurring")
+    end_month: Optional[int] = Field(default=None, ge=0, description="Last month of a recurring event")
+    interval_months: int = Field(default=1, ge=1, description="Recurring every N months; 1 adds to every EMI")
+    new_rate: Optional[float] = Field(default=None, ge=0, le=100, description="New annual rate for rate_change")
+    reduce_emi: Optional[bool] = Field(default=None, description="Overrides the simulation-wide choice")
+
+
+class SimulationRequest(BaseModel):
+    principal: float = Field(..., gt=0)
+    interest_rate: float = Field(..., ge=0, le=100)
+    tenure_months: int = Field(..., gt=0)
+    events: List[SimulationEvent] = Field(default_factory=list)
+    reduce_emi: bool = False
+
+
+class PrepaymentTimingRequest(BaseModel):
+    principal: float = Field(..., gt=0)
+    interest_rate: float = Field(..., ge=0, le=100)
+    tenure_months: int = Field(..., gt=1, le=MAX_TENURE_MONTHS)
+    prepayment_amount: float = Field(..., gt=0)
+    reduce_emi: bool = False
+    months: Optional[List[int]] = Field(
+        default=None,
+        max_length=MAX_TENURE_MONTHS,
+        description="Prepayment months to evaluate; defaults to every month from 1 to tenure - 1"
+    )
+
+
+class SensitivityGridRequest(BaseModel):
+    principals: List[float] = Field(..., min_length=1, description="Principal axis of the grid")
+    interest_rates: List[float] = Field(..., min_length=1, description="Annual rate axis, in percentage")
+    tenure_months: List[int] = Field(..., min_length=1, description="Tenure axis, in months")
+    rate_step: float = Field(default=0.25, gt=0, description="Rate change (percentage points) for the sensitivities")
+    tenure_step: int = Field(default=12, gt=0, description="Tenure change (months) for the sensitivities")
+    include_sensitivity: bool = True
+
+
+class RefinanceOffer(BaseModel):
+    id: str
+    name: str
+    interest_rate: float = Field(..., ge=0, le=100)
+    tenure_months: int = Field(..., gt=0, le=MAX_TENURE_MONTHS, description="Tenure of the new loan")
+    processing_fee: float = Field(default=0, ge=0)
+
+
+class RefinanceRequest(BaseModel):
+    current_loan: PlannedLoanInput
+    months_elapsed: int = Field(..., ge=0, description="EMIs already paid on the current loan")
+    offers: List[RefinanceOffer] = Field(..., min_length=1, description="Offers to refinance the remaining balance")
+    horizon_months: Optional[int] = Field(default=None, gt=0, description="Also report net savings at this month")
+    weights: Optional[ScoringWeights] = None
+
+
+class WhatIfParameters(BaseModel):
+    principal: float = Field(..., gt=0)
+    interest_rate: float = Field(..., ge=0, le=100)
+    tenure_months: int = Field(..., gt=0, le=MAX_TENURE_MONTHS)
+    prepayment_amount: float = Field(default=0, ge=0, description="0 for no prepayment")
+    prepayment_month: int = Field(default=0, ge=0, le=MAX_TENURE_MONTHS)
+    reduce_emi: bool = False
+
+
+class WhatIfUpdate(BaseModel):
+    principal: Optional[float] = Field(default=None, gt=0)
+    interest_rate: Optional[float] = Field(default=None, ge=0, le=100)
+    tenure_months: Optional[int] = Field(default=None, gt=0, le=MAX_TENURE_MONTHS)
+    prepayment_amount: Optional[float] = Field(default=None, ge=0)
+    prepayment_month: Optional[int] = Field(default=None, ge=0, le=MAX_TENURE_MONTHS)
+    reduce_emi: Optional[bool] = None
+
+
 class PrepaymentResponse(BaseModel):
     original_emi: float
     new_emi: float
@@ -75,19 +191,43 @@ class AIExplainRequest(BaseModel):
 
 
 class AIStrategyRequest(BaseModel):
-    current_loan: LoanInput
+    current_loan: PlannedLoanInput
     available_savings: float
     financial_goal: str
-    timeline_months: int
+    timeline_months: int = Field(..., gt=0, le=MAX_TENURE_MONTHS)
+
+
+class PrepaymentOptimizerRequest(BaseModel):
+    current_loan: PlannedLoanInput
+    available_savings: float = Field(..., gt=0)
+    timeline_months: int = Field(..., gt=0, le=MAX_TENURE_MONTHS)
+    max_prepayments: int = Field(default=4, ge=1, le=24)
+    min_prepayment: float = Field(default=0, ge=0)
+    emergency_reserve: float = Field(default=0, ge=0, lt=1, description="Fraction of savings kept aside")
+    savings_schedule: Literal["upfront", "monthly"] = Field(
+        default="monthly",
+        description="Savings available now, or accrued evenly over the timeline"
+    )
+    reduce_emi: bool = False
 
 
 class AIChatRequest(BaseModel):
     user_question: str
     loan_context: Optional[dict] = None
-    conversation_history: Optional[List[dict]] = None
+    conversation_history: Optional[List[dict]] = Field(
+        default=None,
+        description="Client-kept history; omit it to use the server-side session instead"
+    )
+    session_id: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        description="Session returned by a previous turn; a new session is started when omitted or expired"
+    )
 
 
 class AmortizationScheduleRequest(BaseModel):
     principal: float
     interest_rate: float
     tenure_months: int
+    offset: int = Field(default=0, ge=0, description="Number of months to skip")
+    limit: Optional[int] = Field(default=None, gt=0, description="Maximum number of months to return")
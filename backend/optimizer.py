@@ -0,0 +1,125 @@
+from typing import Dict
+
+import numpy as np
+
+from metrics import timed
+from simulation import simulate_prepayment_plan
+
+
+def _availability(deployable: float, timeline_months: int, savings_schedule: str) -> np.ndarray:
+    """
+    Cumulative savings available for prepayment by each month 1..timeline_months.
+    """
+    months = np.arange(1, timeline_months + 1, dtype=np.float64)
+    if savings_schedule == "upfront":
+        return np.full_like(months, deployable)
+    if savings_schedule == "monthly":
+        return deployable * months / timeline_months
+    raise ValueError(f"Unknown savings schedule: {savings_schedule}")
+
+
+def _plan_summary(prepayments, reserve: float, outcome: Dict) -> Dict:
+    return {
+        "prepayments": prepayments,
+        "emergency_reserve": round(reserve, 2),
+        "total_prepaid": outcome["total_prepaid"],
+        "interest_saved": outcome["interest_saved"],
+        "months_saved": outcome["months_saved"],
+        "original_emi": outcome["original_emi"],
+        "new_emi": outcome["final_emi"],
+        "original_tenure": outcome["original_tenure"],
+        "new_tenure": outcome["payoff_month"],
+        "original_total_interest": outcome["original_total_interest"],
+        "new_total_interest": outcome["total_interest"]
+    }
+
+
+def no_prepayment_plan(principal: float, annual_rate: float, tenure_months: int) -> Dict:
+    """
+    The plan for a borrower with no savings to deploy: the loan as it stands, in the same shape
+    as optimize_prepayments.
+    """
+    return _plan_summary([], 0.0, simulate_prepayment_plan(principal, annual_rate, tenure_months))
+
+
+@timed()
+def optimize_prepayments(
+    principal: float,
+    annual_rate: float,
+    tenure_months: int,
+    available_savings: float,
+    timeline_months: int,
+    max_prepayments: int = 4,
+    min_prepayment: float = 0,
+    emergency_reserve: float = 0,
+    savings_schedule: str = "monthly",
+    reduce_emi: bool = False
+) -> Dict:
+    """
+    Find the prepayment months and amounts that save the most interest.
+    
+    Savings (less the emergency_reserve fraction) become available either upfront or evenly
+    over timeline_months, and each prepayment deploys everything accrued since the previous one.
+    With the EMI kept fixed, interest saved grows with the value of the prepayments discounted at
+    the loan rate, sum(x_j × (1+R)^-m_j), so a dynamic program over (prepayment count, month) maximizes
+    that value in O(K × T²) vectorized steps. The chosen plan is then evaluated exactly with the
+    simulator; with reduce_emi the same plan is used and evaluated in that mode.
+    """
+    if available_savings <= 0:
+        raise ValueError("Available savings must be positive")
+    if not 0 <= emergency_reserve < 1:
+        raise ValueError("Emergency reserve must be a fraction between 0 and 1")
+    if max_prepayments < 1:
+        raise ValueError("At least one prepayment must be allowed")
+    
+    # Prepayments must land before the loan ends
+    timeline_months = min(timeline_months, tenure_months - 1)
+    if timeline_months < 1:
+        raise ValueError("Timeline must leave at least one month before the loan ends")
+    
+    reserve = available_savings * emergency_reserve
+    deployable = available_savings - reserve
+    available = _availability(deployable, timeline_months, savings_schedule)
+    discount = (1 + annual_rate / 12 / 100) ** -np.arange(1, timeline_months + 1, dtype=np.float64)
+    
+    # value[j][m]: best discounted value using j+1 prepayments, the last at month m+1
+    value = np.where(available >= min_prepayment, available * discount, -np.inf)
+    values = [value]
+    choices = []
+    
+    gap = available[None, :] - available[:, None]
+    feasible = np.triu(np.ones((timeline_months, timeline_months), dtype=bool), k=1) & (gap >= max(min_prepayment, 1e-9))
+    for _ in range(1, max_prepayments):
+        candidates = np.where(feasible, value[:, None] + gap * discount[None, :], -np.inf)
+        choices.append(candidates.argmax(axis=0))
+        value = candidates.max(axis=0)
+        values.append(value)
+    
+    # The plan must deploy everything by its last prepayment
+    final_months = np.flatnonzero(available >= deployable - 1e-6)
+    table = np.stack(values)[:, final_months]
+    if not np.isfinite(table).any():
+        raise ValueError("No prepayment plan satisfies the minimum prepayment amount")
+    
+    count_index, month_index = np.unravel_index(np.argmax(table), table.shape)
+    months = [int(final_months[month_index])]
+    for layer in range(count_index - 1, -1, -1):
+        months.append(int(choices[layer][months[-1]]))
+    months.reverse()
+    
+    prepayments = []
+    deployed = 0.0
+    for month_index in months:
+        amount = float(available[month_index]) - deployed
+        deployed += amount
+        prepayments.append({"month": month_index + 1, "amount": round(amount, 2)})
+    
+    outcome = simulate_prepayment_plan(
+        principal,
+        annual_rate,
+        tenure_months,
+        [{"type": "lump_sum", **prepayment} for prepayment in prepayments],
+        reduce_emi
+    )
+    
+    return _plan_summary(prepayments, reserve, outcome)
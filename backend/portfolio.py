@@ -0,0 +1,499 @@
+"""
+Bulk analysis of a loan book stored as CSV or Parquet.
+
+The file is streamed in chunks twice: the first pass collects the MCDA normalization bounds of
+the whole book, the second computes EMI, interest, score and prepayment impact per chunk with the
+vectorized calculations and appends the results to the output file. Chunks are processed in a
+process pool (the server's shared calculation pool, or a spawned one from the command line) with
+a bounded number in flight, so memory stays flat regardless of file size.
+
+    python portfolio.py loans.csv results.csv --workers 4 --chunk-size 50000
+
+Input columns: principal, interest_rate, tenure_months (required); id, processing_fee,
+prepayment_amount, prepayment_month, reduce_emi (optional).
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from calculations import (
+    DEFAULT_WEIGHTS,
+    calculate_prepayment_impact_batch,
+    loan_metrics_batch,
+    normalize_weights,
+    score_loans
+)
+
+
+REQUIRED_COLUMNS = ("principal", "interest_rate", "tenure_months")
+OPTIONAL_COLUMNS = ("id", "processing_fee", "prepayment_amount", "prepayment_month", "reduce_emi")
+OUTPUT_COLUMNS = (
+    "id",
+    "principal",
+    "interest_rate",
+    "tenure_months",
+    "emi",
+    "total_payment",
+    "total_interest",
+    "total_cost",
+    "score",
+    "interest_saved",
+    "new_tenure",
+    "months_saved"
+)
+TRUE_VALUES = ("1", "true", "yes", "y")
+
+
+class PortfolioError(ValueError):
+    """
+    Raised for malformed input files, with the offending row number where known.
+    """
+
+
+def _file_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".parquet", ".pq"):
+        return "parquet"
+    if extension == ".csv":
+        return "csv"
+    raise PortfolioError(f"Unsupported file type '{extension}'; use .csv or .parquet")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise PortfolioError("Parquet support requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def _check_columns(columns: List[str]) -> List[str]:
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise PortfolioError(f"Missing required columns: {', '.join(missing)}")
+    return [column for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS if column in columns]
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[Tuple]:
+    """
+    Stream (first_row, payload, header) chunks of at most chunk_size rows. CSV payloads are the
+    raw text lines and Parquet payloads unparsed columns, so that tokenizing, conversion and
+    validation happen in the worker processes. CSV fields must not contain line breaks.
+    """
+    if _file_format(path) == "parquet":
+        parquet = _import_pyarrow().parquet
+        source = parquet.ParquetFile(path)
+        wanted = _check_columns(source.schema_arrow.names)
+        first_row = 1
+        for batch in source.iter_batches(batch_size=chunk_size, columns=wanted):
+            yield first_row, {name: batch.column(name).to_pylist() for name in wanted}, None
+            first_row += batch.num_rows
+        return
+    
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = [name.strip() for name in next(csv.reader([f.readline()]), [])]
+        _check_columns(header)
+        
+        first_row = 1
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                break
+            yield first_row, lines, header
+            first_row += len(lines)
+
+
+def _csv_columns(lines: List[str], header: List[str], first_row: int) -> Tuple[Dict[str, tuple], np.ndarray]:
+    """
+    Split CSV lines into the wanted columns, skipping blank lines. Also returns the file row
+    number of each kept row, so errors point at the line as uploaded.
+    """
+    wanted = _check_columns(header)
+    positions = [header.index(name) for name in wanted]
+    width = max(positions) + 1
+    rows = []
+    numbers = []
+    for offset, row in enumerate(csv.reader(lines)):
+        if row:
+            rows.append(row)
+            numbers.append(first_row + offset)
+    if not rows:
+        return {name: () for name in wanted}, np.empty(0, dtype=np.int64)
+    
+    for row, number in zip(rows, numbers):
+        if len(row) < width:
+            raise PortfolioError(f"Row {number}: expected at least {width} fields, got {len(row)}")
+    columns = list(zip(*rows))
+    return {name: columns[position] for name, position in zip(wanted, positions)}, np.asarray(numbers, dtype=np.int64)
+
+
+def _numeric(values: list, name: str, row_numbers: np.ndarray, default: float = None) -> np.ndarray:
+    """
+    Convert a column to float64; blank cells take `default`, or become NaN and fail
+    validation when it is None.
+    """
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        cleaned = [None if value == "" else value for value in values]
+        try:
+            array = np.asarray(cleaned, dtype=np.float64)
+        except (TypeError, ValueError):
+            for offset, value in enumerate(cleaned):
+                try:
+                    float(value if value is not None else "nan")
+                except (TypeError, ValueError):
+                    raise PortfolioError(f"Row {row_numbers[offset]}: {name} must be a number, got {value!r}")
+            raise
+    
+    if default is not None:
+        array[np.isnan(array)] = default
+    return array
+
+
+def _flags(values: list) -> np.ndarray:
+    """
+    Parse a boolean column; only the few distinct spellings are inspected.
+    """
+    distinct, inverse = np.unique(np.asarray([str(value) for value in values]), return_inverse=True)
+    return np.asarray([value.strip().lower() in TRUE_VALUES for value in distinct], dtype=bool)[inverse]
+
+
+def _check(mask: np.ndarray, row_numbers: np.ndarray, message: str) -> None:
+    if mask.any():
+        raise PortfolioError(f"Row {row_numbers[int(np.argmax(mask))]}: {message}")
+
+
+def parse_chunk(first_row: int, payload, header: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Validate a raw chunk and convert it to typed column arrays. Row numbers count data lines
+    from 1, blank lines included.
+    """
+    if header is not None:
+        raw, rows = _csv_columns(payload, header, first_row)
+    else:
+        raw = payload
+        rows = np.arange(first_row, first_row + len(raw["principal"]))
+    count = len(raw["principal"])
+    principal = _numeric(raw["principal"], "principal", rows)
+    rate = _numeric(raw["interest_rate"], "interest_rate", rows)
+    tenure = _numeric(raw["tenure_months"], "tenure_months", rows)
+    fee = _numeric(raw.get("processing_fee", [0] * count), "processing_fee", rows, default=0)
+    amount = _numeric(raw.get("prepayment_amount", [0] * count), "prepayment_amount", rows, default=0)
+    month = _numeric(raw.get("prepayment_month", [0] * count), "prepayment_month", rows, default=0)
+    
+    _check(~np.isfinite(principal) | (principal <= 0), rows, "principal must be positive")
+    _check(~np.isfinite(rate) | (rate < 0) | (rate > 100), rows, "interest_rate must be between 0 and 100")
+    _check(~np.isfinite(tenure) | (tenure <= 0) | (tenure != np.trunc(tenure)), rows, "tenure_months must be a positive whole number")
+    _check(~np.isfinite(fee) | (fee < 0), rows, "processing_fee cannot be negative")
+    _check(~np.isfinite(amount) | (amount < 0), rows, "prepayment_amount cannot be negative")
+    _check(
+        (amount > 0) & ((month <= 0) | (month >= tenure) | (month != np.trunc(month))),
+        rows,
+        "prepayment_month must be a whole month within the tenure"
+    )
+    
+    if "id" in raw:
+        ids = np.asarray(raw["id"], dtype=object)
+    else:
+        ids = rows
+    reduce_emi = _flags(raw["reduce_emi"]) if "reduce_emi" in raw else np.zeros(count, dtype=bool)
+    
+    return {
+        "id": ids,
+        "principal": principal,
+        "interest_rate": rate,
+        "tenure_months": tenure.astype(np.int64),
+        "processing_fee": fee,
+        "prepayment_amount": amount,
+        "prepayment_month": month.astype(np.int64),
+        "reduce_emi": reduce_emi
+    }
+
+
+def _metrics(loans: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return loan_metrics_batch(loans["principal"], loans["interest_rate"], loans["tenure_months"], loans["processing_fee"])
+
+
+def chunk_bounds(chunk: Tuple) -> Tuple[int, Dict[str, Dict[str, float]]]:
+    """
+    Pass 1: row count and per-metric (min, max) of one chunk (None when it has no rows).
+    """
+    metrics = _metrics(parse_chunk(*chunk))
+    if not len(metrics["emi"]):
+        return 0, None
+    bounds = {
+        key: {"min": float(metrics[key].min()), "max": float(metrics[key].max())}
+        for key in DEFAULT_WEIGHTS
+    }
+    return len(metrics["emi"]), bounds
+
+
+def merge_bounds(bounds: Optional[Dict], other: Optional[Dict]) -> Dict[str, Dict[str, float]]:
+    if bounds is None or other is None:
+        return bounds or other
+    return {
+        key: {
+            "min": min(bounds[key]["min"], other[key]["min"]),
+            "max": max(bounds[key]["max"], other[key]["max"])
+        }
+        for key in bounds
+    }
+
+
+def analyze_chunk(
+    chunk: Tuple,
+    weights: Dict[str, float],
+    bounds: Dict[str, Dict[str, float]]
+) -> Dict[str, np.ndarray]:
+    """
+    Pass 2: EMI, totals, MCDA score against the book-wide bounds, and prepayment impact
+    for rows that carry a prepayment (NaN elsewhere).
+    """
+    loans = parse_chunk(*chunk)
+    metrics = _metrics(loans)
+    scores, _ = score_loans(metrics, weights, bounds)
+    
+    interest_saved = np.full(len(scores), np.nan)
+    new_tenure = np.full(len(scores), np.nan)
+    months_saved = np.full(len(scores), np.nan)
+    prepaid = np.flatnonzero(loans["prepayment_amount"] > 0)
+    if len(prepaid):
+        impact = calculate_prepayment_impact_batch(
+            loans["principal"][prepaid],
+            loans["interest_rate"][prepaid],
+            loans["tenure_months"][prepaid],
+            loans["prepayment_amount"][prepaid],
+            loans["prepayment_month"][prepaid],
+            loans["reduce_emi"][prepaid]
+        )
+        interest_saved[prepaid] = impact["interest_saved"]
+        new_tenure[prepaid] = impact["new_tenure"]
+        months_saved[prepaid] = impact["months_saved"]
+    
+    return {
+        "id": loans["id"],
+        "principal": loans["principal"],
+        "interest_rate": loans["interest_rate"],
+        "tenure_months": loans["tenure_months"],
+        "emi": metrics["emi"],
+        "total_payment": metrics["total_payment"],
+        "total_interest": metrics["interest"],
+        "total_cost": metrics["total_cost"],
+        "score": scores,
+        "interest_saved": interest_saved,
+        "new_tenure": new_tenure,
+        "months_saved": months_saved
+    }
+
+
+def render_csv(columns: Dict[str, np.ndarray]) -> str:
+    """
+    Format analyzed columns as CSV rows. Runs in the workers so the parent only writes text.
+    """
+    output = []
+    for name in OUTPUT_COLUMNS:
+        values = columns[name]
+        if values.dtype.kind == "f":
+            # Blank for missing prepayment results; months as whole numbers, amounts in cents
+            missing = np.isnan(values)
+            if name in ("new_tenure", "months_saved"):
+                values = np.where(missing, 0, values).astype(np.int64)
+            values = np.round(values, 2).astype(str)
+            values[missing] = ""
+        elif values.dtype.kind == "i":
+            values = values.astype(str)
+        output.append(values.tolist())
+    
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(zip(*output))
+    return buffer.getvalue()
+
+
+def analyze_chunk_for(
+    chunk: Tuple,
+    weights: Dict[str, float],
+    bounds: Dict[str, Dict[str, float]],
+    output_format: str
+):
+    """
+    analyze_chunk, rendered to CSV text when that is the output format.
+    """
+    columns = analyze_chunk(chunk, weights, bounds)
+    return render_csv(columns) if output_format == "csv" else columns
+
+
+class _CSVWriter:
+    def __init__(self, path: str):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        csv.writer(self._file).writerow(OUTPUT_COLUMNS)
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        self._pyarrow = _import_pyarrow()
+        self._path = path
+        self._writer = None
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        if not len(columns["id"]):
+            return
+        pa = self._pyarrow
+        table = pa.table({
+            name: pa.array(columns[name].tolist() if name == "id" else columns[name], from_pandas=True)
+            for name in OUTPUT_COLUMNS
+        })
+        if self._writer is None:
+            self._writer = pa.parquet.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _open_writer(path: str):
+    if _file_format(path) == "parquet":
+        return _ParquetWriter(path)
+    return _CSVWriter(path)
+
+
+def _bounded_map(executor, func: Callable, items: Iterator, max_in_flight: int, *args) -> Iterator:
+    """
+    Like executor.map, but reads `items` lazily and keeps at most max_in_flight
+    chunks submitted, so a slow consumer never lets the input pile up in memory.
+    """
+    if executor is None:
+        for item in items:
+            yield func(item, *args)
+        return
+    
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item, *args))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # On failure, don't leave queued chunks behind on a shared executor
+        for future in pending:
+            future.cancel()
+
+
+def analyze_portfolio(
+    input_path: str,
+    output_path: str,
+    weights: Optional[Dict[str, float]] = None,
+    chunk_size: int = 50000,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> Dict:
+    """
+    Analyze a loan book file into `output_path` (CSV or Parquet, by extension).
+    Chunks run on `executor` when given, with `workers` chunks per worker in flight; it is left
+    running for its owner. Otherwise workers=None spawns a pool with every core, and workers=1
+    runs in-process without a pool.
+    Returns a summary with the row count, chunk count, bounds and elapsed time.
+    """
+    if chunk_size < 1:
+        raise PortfolioError("chunk_size must be positive")
+    weights = normalize_weights(weights)
+    workers = workers or os.cpu_count() or 1
+    if _file_format(output_path) == "parquet":
+        _import_pyarrow()
+    
+    started = time.perf_counter()
+    own_executor = None
+    if executor is None and workers > 1:
+        # Spawned rather than forked: the caller may be a threaded server process
+        executor = own_executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    max_in_flight = workers * 2
+    try:
+        rows = 0
+        chunks = 0
+        bounds = None
+        for count, part in _bounded_map(executor, chunk_bounds, read_chunks(input_path, chunk_size), max_in_flight):
+            rows += count
+            chunks += 1
+            bounds = merge_bounds(bounds, part)
+        if not rows:
+            raise PortfolioError("Input file has no loan rows")
+        
+        writer = _open_writer(output_path)
+        try:
+            for result in _bounded_map(
+                executor,
+                analyze_chunk_for,
+                read_chunks(input_path, chunk_size),
+                max_in_flight,
+                weights,
+                bounds,
+                _file_format(output_path)
+            ):
+                writer.write(result)
+        finally:
+            writer.close()
+    finally:
+        if own_executor is not None:
+            own_executor.shutdown(cancel_futures=True)
+    
+    return {
+        "rows": rows,
+        "chunks": chunks,
+        "workers": workers,
+        "bounds": bounds,
+        "output_path": output_path,
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="loan book (.csv or .parquet)")
+    parser.add_argument("output", help="results file (.csv or .parquet)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per chunk")
+    parser.add_argument("--weights", help='MCDA weights as JSON, e.g. \'{"interest": 0.5, "emi": 0.5}\'')
+    args = parser.parse_args()
+    
+    try:
+        summary = analyze_portfolio(
+            args.input,
+            args.output,
+            json.loads(args.weights) if args.weights else None,
+            args.chunk_size,
+            args.workers
+        )
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from calculations import calculate_emi_batch, score_loans
+from metrics import timed
+
+
+def _balance_after(balance, monthly_rate, emi, months):
+    """
+    Closed-form balance after `months` payments; broadcasts over all arguments, including rates.
+    """
+    zero_rate = monthly_rate == 0
+    growth_minus_one = np.expm1(months * np.log1p(monthly_rate))
+    annuity = np.where(zero_rate, months, growth_minus_one / np.where(zero_rate, 1.0, monthly_rate))
+    return balance * (1 + growth_minus_one) - emi * annuity
+
+
+def _cumulative_interest(balance, monthly_rate, emi, tenure, months):
+    """
+    Interest paid over the first `months` payments: I(t) = EMI × t - B + B_t, with t capped at
+    the tenure since the last payment absorbs the rounding residual B_n.
+    """
+    t = np.minimum(months, tenure)
+    return emi * t - balance + _balance_after(balance, monthly_rate, emi, t)
+
+
+@timed()
+def analyze_refinance(
+    current_loan: Dict,
+    months_elapsed: int,
+    offers: List[Dict],
+    horizon_months: Optional[int] = None,
+    weights: Optional[Dict[str, float]] = None
+) -> Dict:
+    """
+    Evaluate refinancing the remaining balance of `current_loan` with each offer.
+    
+    After `months_elapsed` EMIs the outstanding balance moves to the offer (its own rate and
+    tenure) at the cost of its processing_fee. The break-even month is the first month after
+    switching at which fee + cumulative interest on the offer no longer exceeds the cumulative
+    interest of staying. All offers are evaluated at once on closed-form cumulative interest
+    curves. With horizon_months (e.g. a planned sale), net savings are also reported at that month.
+    """
+    principal = current_loan['principal']
+    tenure = current_loan['tenure_months']
+    if not 0 <= months_elapsed < tenure:
+        raise ValueError(f"months_elapsed must be between 0 and {tenure - 1}")
+    if not offers:
+        raise ValueError("At least one refinancing offer required")
+    
+    current = calculate_emi_batch(principal, current_loan['interest_rate'], tenure)
+    current_emi = float(current['emi'])
+    current_rate = current_loan['interest_rate'] / 12 / 100
+    remaining_months = tenure - months_elapsed
+    balance = float(_balance_after(principal, current_rate, current_emi, months_elapsed))
+    
+    rates = np.array([offer['interest_rate'] for offer in offers], dtype=np.float64)
+    tenures = np.array([offer['tenure_months'] for offer in offers], dtype=np.float64)
+    fees = np.array([offer.get('processing_fee', 0) for offer in offers], dtype=np.float64)
+    offer_emi = calculate_emi_batch(balance, rates, tenures)['emi']
+    offer_rates = rates / 12 / 100
+    
+    # Cumulative interest curves, month 1 .. the longest loan, one row per offer
+    months = np.arange(1, max(remaining_months, int(tenures.max())) + 1, dtype=np.float64)
+    stay = _cumulative_interest(balance, current_rate, current_emi, remaining_months, months)
+    switch = _cumulative_interest(balance, offer_rates[:, None], offer_emi[:, None], tenures[:, None], months[None, :])
+    advantage = stay[None, :] - switch - fees[:, None]
+    
+    reached = advantage >= 0
+    break_even = np.where(reached.any(axis=1), reached.argmax(axis=1) + 1, 0)
+    stay_interest = float(stay[-1])
+    interest_saved = stay_interest - switch[:, -1]
+    net_savings = advantage[:, -1]
+    
+    metrics = {
+        "emi": offer_emi,
+        "interest": switch[:, -1],
+        "total_cost": offer_emi * tenures + fees,
+        "tenure": tenures,
+        "processing_fee": fees
+    }
+    scores, _ = score_loans(metrics, weights)
+    
+    if horizon_months is not None:
+        horizon_index = min(horizon_months, len(months)) - 1
+        horizon_savings = advantage[:, horizon_index]
+    
+    results = []
+    for i, offer in enumerate(offers):
+        result = {
+            "id": offer['id'],
+            "name": offer['name'],
+            "interest_rate": offer['interest_rate'],
+            "tenure_months": offer['tenure_months'],
+            "processing_fee": float(fees[i]),
+            "new_emi": float(offer_emi[i]),
+            "emi_change": round(float(offer_emi[i]) - current_emi, 2),
+            "total_interest": round(float(switch[i, -1]), 2),
+            "interest_saved": round(float(interest_saved[i]), 2),
+            "net_savings": round(float(net_savings[i]), 2),
+            "break_even_month": int(break_even[i]) or None,
+            "score": float(scores[i])
+        }
+        worth = result["break_even_month"] is not None and result["net_savings"] > 0
+        if horizon_months is not None:
+            result["net_savings_at_horizon"] = round(float(horizon_savings[i]), 2)
+            worth = worth and result["break_even_month"] <= horizon_months and result["net_savings_at_horizon"] > 0
+        result["worth_switching"] = worth
+        results.append(result)
+    
+    key = "net_savings_at_horizon" if horizon_months is not None else "net_savings"
+    results.sort(key=lambda result: result[key], reverse=True)
+    for rank, result in enumerate(results, start=1):
+        result["rank"] = rank
+    
+    return {
+        "current": {
+            "remaining_balance": round(balance, 2),
+            "emi": current_emi,
+            "remaining_months": remaining_months,
+            "remaining_interest": round(stay_interest, 2)
+        },
+        "offers": results,
+        "best_offer_id": results[0]["id"] if results[0]["worth_switching"] else None
+    }
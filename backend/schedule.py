@@ -0,0 +1,107 @@
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+FIELDS = ("month", "emi", "principal_payment", "interest_payment", "remaining_balance")
+
+# Packed little-endian records for binary responses: int32 month + four float64 amounts (36 bytes/row)
+BINARY_DTYPE = np.dtype([
+    ("month", "<i4"),
+    ("emi", "<f8"),
+    ("principal_payment", "<f8"),
+    ("interest_payment", "<f8"),
+    ("remaining_balance", "<f8")
+])
+
+CSV_HEADER = ",".join(FIELDS) + "\n"
+
+ROW_TEMPLATE = "{{" + ",".join(f'"{field}":{{}}' for field in FIELDS) + "}}"
+
+
+class AmortizationSchedule:
+    """
+    Amortization schedule stored column-wise, one NumPy array per field, instead of one dict
+    per month. Serializes from the columns to JSON, NDJSON, CSV or packed binary records without
+    building per-row dicts; to_rows() is the list-of-dicts view kept for compatibility.
+    """
+    
+    __slots__ = FIELDS
+
+    def __init__(self, month, emi, principal_payment, interest_payment, remaining_balance):
+        self.month = np.asarray(month, dtype=np.int64)
+        self.emi = np.asarray(emi, dtype=np.float64)
+        self.principal_payment = np.asarray(principal_payment, dtype=np.float64)
+        self.interest_payment = np.asarray(interest_payment, dtype=np.float64)
+        self.remaining_balance = np.asarray(remaining_balance, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.month)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, field).nbytes for field in FIELDS)
+
+    def __getitem__(self, index: slice) -> "AmortizationSchedule":
+        """
+        Slice rows (the arrays are views, not copies).
+        """
+        return AmortizationSchedule(*(getattr(self, field)[index] for field in FIELDS))
+
+    @classmethod
+    def concat(cls, *parts: "AmortizationSchedule") -> "AmortizationSchedule":
+        return cls(*(np.concatenate([getattr(part, field) for part in parts]) for field in FIELDS))
+
+    def first_difference(self, other: "AmortizationSchedule") -> Optional[int]:
+        """
+        Index of the first row that differs from `other`, or None when both are identical.
+        """
+        common = min(len(self), len(other))
+        differs = np.zeros(common, dtype=bool)
+        for field in FIELDS:
+            differs |= getattr(self, field)[:common] != getattr(other, field)[:common]
+        if differs.any():
+            return int(differs.argmax())
+        return None if len(self) == len(other) else common
+
+    def _row_tuples(self) -> Iterator[tuple]:
+        return zip(*(getattr(self, field).tolist() for field in FIELDS))
+
+    def to_rows(self) -> List[Dict]:
+        """
+        Compatibility view: one dict per month, as generate_amortization_schedule used to return.
+        """
+        return [dict(zip(FIELDS, row)) for row in self._row_tuples()]
+
+    def _json_rows(self) -> Iterator[str]:
+        """
+        One JSON object per month, filled from the columns with no per-row dicts: each column is
+        written as one JSON array by dumps() (orjson when installed) and split into its values.
+        """
+        if not len(self):
+            return iter(())
+        # Imported here so calculation workers, which never serialize, skip starlette and pydantic
+        from responses import dumps
+        columns = (dumps(getattr(self, field)).decode("utf-8")[1:-1].split(",") for field in FIELDS)
+        return map(ROW_TEMPLATE.format, *columns)
+
+    def to_json(self) -> str:
+        return "[" + ",".join(self._json_rows()) + "]"
+
+    def to_ndjson(self) -> str:
+        return "".join(row + "\n" for row in self._json_rows())
+
+    def to_csv(self, header: bool = True) -> str:
+        body = "".join(f"{m},{e!r},{p!r},{i!r},{b!r}\n" for m, e, p, i, b in self._row_tuples())
+        return CSV_HEADER + body if header else body
+
+    def to_bytes(self) -> bytes:
+        records = np.empty(len(self), dtype=BINARY_DTYPE)
+        for field in FIELDS:
+            records[field] = getattr(self, field)
+        return records.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "AmortizationSchedule":
+        records = np.frombuffer(data, dtype=BINARY_DTYPE)
+        return cls(*(records[field] for field in FIELDS))
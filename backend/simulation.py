@@ -0,0 +1,283 @@
+import math
+from typing import List, Dict, Optional
+
+from calculations import calculate_emi
+
+from metrics import timed
+
+
+EVENT_TYPES = ("lump_sum", "recurring", "rate_change")
+
+
+def _annuity_factor(monthly_rate: float, months: float) -> float:
+    """
+    [(1+R)^k - 1] / R, i.e. the balance reduction per unit of payment over k months.
+    """
+    if monthly_rate == 0:
+        return months
+    return math.expm1(months * math.log1p(monthly_rate)) / monthly_rate
+
+
+def _months_to_payoff(balance: float, monthly_rate: float, payment: float) -> float:
+    """
+    Exact (fractional) number of payments needed to clear `balance`.
+    """
+    if monthly_rate == 0:
+        return balance / payment
+    if payment <= balance * monthly_rate:
+        return math.inf
+    return math.log(payment / (payment - balance * monthly_rate)) / math.log1p(monthly_rate)
+
+
+def _payoff_months(balance: float, monthly_rate: float, payment: float) -> float:
+    """
+    Whole payments needed to clear `balance`. A residual within EMI rounding
+    (₹0.005 per payment, compounded) is absorbed by the last payment, as in the schedule.
+    """
+    exact = _months_to_payoff(balance, monthly_rate, payment)
+    if exact == math.inf:
+        return math.inf
+    
+    full_payments = math.floor(exact)
+    residual = balance * (1 + monthly_rate) ** full_payments - payment * _annuity_factor(monthly_rate, full_payments)
+    if full_payments > 0 and residual <= 0.005 * _annuity_factor(monthly_rate, full_payments):
+        return full_payments
+    return full_payments + 1
+
+
+def _balance_after(balance: float, monthly_rate: float, payment: float, months: int) -> float:
+    return balance * (1 + monthly_rate) ** months - payment * _annuity_factor(monthly_rate, months)
+
+
+def _check_event_count(count: int, max_events: Optional[int]) -> None:
+    if max_events is not None and count > max_events:
+        raise ValueError(f"Maximum {max_events} events per simulation, counting each recurring top-up")
+
+
+def _expand_events(
+    events: List[Dict],
+    default_reduce_emi: bool,
+    tenure_months: int,
+    max_events: Optional[int] = None
+) -> List[tuple]:
+    """
+    Turn events into (month, order, action, value, reduce_emi) actions.
+    Recurring extras paid every month become a start/stop pair so the segment between them
+    stays closed-form; recurring top-ups at longer intervals become individual lump sums, ending
+    with the tenure at the latest. Raises ValueError when the actions exceed max_events.
+    """
+    actions = []
+    for event in events:
+        event_type = event.get('type')
+        month = event.get('month', 0)
+        reduce_emi = event.get('reduce_emi')
+        reduce_emi = default_reduce_emi if reduce_emi is None else reduce_emi
+        
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type: {event_type}")
+        if month < 0:
+            raise ValueError("Event month cannot be negative")
+        
+        if event_type == "rate_change":
+            if event.get('new_rate') is None:
+                raise ValueError("rate_change events require new_rate")
+            actions.append((month, 0, "rate", event['new_rate'], reduce_emi))
+            continue
+        
+        amount = event.get('amount')
+        if amount is None or amount <= 0:
+            raise ValueError(f"{event_type} events require a positive amount")
+        
+        if event_type == "lump_sum":
+            actions.append((month, 1, "lump_sum", amount, reduce_emi))
+            continue
+        
+        end_month = event.get('end_month')
+        interval = event.get('interval_months') or 1
+        if end_month is not None and end_month < month:
+            raise ValueError("Recurring events must end on or after their start month")
+        
+        if end_month is not None:
+            end_month = min(end_month, tenure_months)
+        
+        if interval == 1:
+            # Extra paid with every EMI from the payment after `month` through `end_month`
+            actions.append((month, 2, "extra_start", amount, reduce_emi))
+            if end_month is not None:
+                actions.append((end_month, 2, "extra_stop", amount, reduce_emi))
+        else:
+            if end_month is None:
+                raise ValueError("Recurring top-ups with interval_months > 1 require end_month")
+            top_ups = range(month, end_month + 1, interval)
+            _check_event_count(len(actions) + len(top_ups), max_events)
+            actions.extend((top_up_month, 1, "lump_sum", amount, reduce_emi) for top_up_month in top_ups)
+        _check_event_count(len(actions), max_events)
+    
+    # Rate changes apply before prepayments made in the same month
+    actions.sort(key=lambda action: (action[0], action[1]))
+    return actions
+
+
+def simulate_loan(
+    principal: float,
+    annual_rate: float,
+    tenure_months: int,
+    events: Optional[List[Dict]] = None,
+    reduce_emi: bool = False,
+    max_events: Optional[int] = None
+) -> Dict:
+    """
+    Simulate a loan through an ordered set of events in a single forward pass.
+    
+    Event types (month m means "after the m-th EMI"):
+    - lump_sum: prepay `amount` at month m
+    - recurring: pay `amount` extra with every EMI from month m to `end_month`, or
+      every `interval_months` as a top-up when interval_months > 1
+    - rate_change: switch to `new_rate` for payments after month m
+    
+    After a lump sum or rate change the EMI is recalculated over the remaining tenure when
+    `reduce_emi` is set (per event or for the whole simulation); otherwise the EMI is kept and the
+    tenure shortens. Balances between events are advanced in closed form.
+    """
+    actions = _expand_events(events or [], reduce_emi, tenure_months, max_events)
+    
+    emi = calculate_emi(principal, annual_rate, tenure_months)['emi']
+    state = {
+        "month": 0,
+        "balance": float(principal),
+        "annual_rate": annual_rate,
+        "emi": emi,
+        "extra": 0.0,
+        "end_month": tenure_months,
+        "interest_paid": 0.0,
+        "total_paid": 0.0,
+        "prepaid": 0.0,
+        "payoff_month": None
+    }
+    segments = []
+    skipped_events = 0
+
+    def advance(to_month: float):
+        """
+        Pay EMI (+ extra) up to `to_month`, or until the loan is cleared.
+        """
+        months = to_month - state["month"]
+        if months <= 0 or state["balance"] <= 0:
+            return
+        
+        monthly_rate = state["annual_rate"] / 12 / 100
+        payment = state["emi"] + state["extra"]
+        opening_balance = state["balance"]
+        
+        payoff = _payoff_months(opening_balance, monthly_rate, payment)
+        if payoff == math.inf and to_month == math.inf:
+            raise ValueError(
+                f"Payment of ₹{payment:,.2f} does not cover interest from month {state['month']}; loan never amortizes"
+            )
+        
+        if payoff <= months:
+            # Last payment clears whatever is left, including its interest
+            paid = payment * (payoff - 1) + _balance_after(opening_balance, monthly_rate, payment, payoff - 1) * (1 + monthly_rate)
+            closing_balance = 0.0
+            months = payoff
+        else:
+            payoff = None
+            closing_balance = _balance_after(opening_balance, monthly_rate, payment, months)
+            paid = payment * months
+        
+        interest = paid - (opening_balance - closing_balance)
+        segments.append({
+            "start_month": state["month"] + 1,
+            "end_month": state["month"] + months,
+            "annual_rate": state["annual_rate"],
+            "emi": round(state["emi"], 2),
+            "extra_payment": round(state["extra"], 2),
+            "opening_balance": round(opening_balance, 2),
+            "closing_balance": round(closing_balance, 2),
+            "interest_paid": round(interest, 2),
+            "principal_paid": round(opening_balance - closing_balance, 2)
+        })
+        
+        state["interest_paid"] += interest
+        state["total_paid"] += paid
+        state["balance"] = closing_balance
+        state["month"] += months
+        if payoff is not None:
+            state["payoff_month"] = state["month"]
+
+    def reschedule(event_reduce_emi: bool):
+        """
+        After a balance or rate change, either recalculate the EMI over the remaining tenure
+        or keep it and let the tenure shorten. The EMI is also recalculated if it no longer
+        covers interest. Voluntary extras do not change the contractual schedule.
+        """
+        monthly_rate = state["annual_rate"] / 12 / 100
+        remaining = state["end_month"] - state["month"]
+        covers_interest = state["emi"] > state["balance"] * monthly_rate
+        
+        if event_reduce_emi or not covers_interest:
+            if remaining <= 0:
+                raise ValueError(f"EMI no longer covers interest at month {state['month']}")
+            state["emi"] = calculate_emi(state["balance"], state["annual_rate"], remaining)['emi']
+        
+        state["end_month"] = state["month"] + _payoff_months(state["balance"], monthly_rate, state["emi"])
+    
+    for month, _, action, value, event_reduce_emi in actions:
+        advance(month)
+        if state["balance"] <= 0:
+            skipped_events += 1
+            continue
+        
+        if action == "rate":
+            state["annual_rate"] = value
+            reschedule(event_reduce_emi)
+        elif action == "lump_sum":
+            applied = min(value, state["balance"])
+            state["balance"] -= applied
+            state["prepaid"] += applied
+            state["total_paid"] += applied
+            if state["balance"] <= 0:
+                state["payoff_month"] = state["month"]
+            else:
+                reschedule(event_reduce_emi)
+        elif action == "extra_start":
+            state["extra"] += value
+        elif action == "extra_stop":
+            state["extra"] = max(0.0, state["extra"] - value)
+    
+    advance(math.inf)
+    
+    return {
+        "payoff_month": state["payoff_month"],
+        "final_emi": round(state["emi"], 2),
+        "total_interest": round(state["interest_paid"], 2),
+        "total_paid": round(state["total_paid"], 2),
+        "total_prepaid": round(state["prepaid"], 2),
+        "segments": segments,
+        "skipped_events": skipped_events
+    }
+
+
+@timed()
+def simulate_prepayment_plan(
+    principal: float,
+    annual_rate: float,
+    tenure_months: int,
+    events: Optional[List[Dict]] = None,
+    reduce_emi: bool = False,
+    max_events: Optional[int] = None
+) -> Dict:
+    """
+    Run simulate_loan with and without the events and summarize the difference.
+    """
+    baseline = simulate_loan(principal, annual_rate, tenure_months)
+    result = simulate_loan(principal, annual_rate, tenure_months, events, reduce_emi, max_events)
+    
+    return {
+        "original_emi": baseline["final_emi"],
+        "original_tenure": baseline["payoff_month"],
+        "original_total_interest": baseline["total_interest"],
+        **result,
+        "interest_saved": round(baseline["total_interest"] - result["total_interest"], 2),
+        "months_saved": max(0, baseline["payoff_month"] - result["payoff_month"])
+    }
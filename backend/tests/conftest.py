@@ -0,0 +1,49 @@
+import asyncio
+import os
+import sys
+
+# Offline settings, applied before the app modules read their configuration
+os.environ.setdefault("GEMINI_API_KEY", "test-offline")
+os.environ.setdefault("CALC_WORKERS", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import ai_service
+
+
+class FakeModel:
+    """
+    Stand-in for the Gemini model: answers `text` after `delay` seconds and counts calls.
+    """
+
+    def __init__(self, text: str = "model answer", delay: float = 0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        
+        class Response:
+            text = self.text
+        return Response()
+
+
+@pytest.fixture
+def fake_model():
+    model = FakeModel()
+    previous = ai_service.set_model(model)
+    ai_service.response_cache.memory.clear()
+    yield model
+    ai_service.set_model(previous)
+    ai_service.response_cache.memory.clear()
@@ -0,0 +1,49 @@
+import asyncio
+
+import ai_service
+from local_advisor import generic_explanation
+
+
+UNKNOWN_TERMS = [f"unlisted term {i}" for i in range(6)]
+
+
+def test_slow_model_falls_back_after_the_timeout(fake_model, monkeypatch):
+    fake_model.delay = 1.0
+    monkeypatch.setattr(ai_service.settings, "ai_timeout_seconds", 0.05)
+    timeouts = ai_service.ai_flights.timeouts
+    
+    explanation = asyncio.run(ai_service.explain_financial_term(UNKNOWN_TERMS[0]))
+    
+    assert explanation == generic_explanation(UNKNOWN_TERMS[0])
+    assert ai_service.ai_flights.timeouts == timeouts + 1
+    assert len(ai_service.ai_flights) == 0
+    # Fallbacks are never cached
+    assert len(ai_service.response_cache.memory) == 0
+
+
+def test_model_calls_are_limited_to_the_concurrency_slots(fake_model, monkeypatch):
+    fake_model.delay = 0.02
+    monkeypatch.setattr(ai_service, "_ai_semaphore", asyncio.Semaphore(2))
+    
+    async def explain_all():
+        return await asyncio.gather(*(ai_service.explain_financial_term(term) for term in UNKNOWN_TERMS))
+    
+    assert asyncio.run(explain_all()) == ["model answer"] * len(UNKNOWN_TERMS)
+    assert fake_model.calls == len(UNKNOWN_TERMS)
+    assert fake_model.max_active == 2
+
+
+def test_identical_concurrent_requests_share_one_call(fake_model):
+    fake_model.delay = 0.02
+    coalesced = ai_service.ai_flights.coalesced
+    
+    async def explain_repeatedly():
+        return await asyncio.gather(*(ai_service.explain_financial_term(UNKNOWN_TERMS[0]) for _ in range(5)))
+    
+    assert asyncio.run(explain_repeatedly()) == ["model answer"] * 5
+    assert fake_model.calls == 1
+    assert ai_service.ai_flights.coalesced == coalesced + 4
+    
+    # A later identical request is served from the response cache
+    assert asyncio.run(ai_service.explain_financial_term(UNKNOWN_TERMS[0])) == "model answer"
+    assert fake_model.calls == 1
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from cache import ResponseCache, SQLiteCache, TTLCache
+
+
+def test_ttl_cache_counts_only_live_entries():
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("old", 1)
+    cache.set("kept", 2, ttl=60)
+    time.sleep(0.02)
+    
+    assert len(cache) == 1
+    assert "kept" in cache
+
+
+def test_sqlite_sweep_drops_expired_and_oldest_rows(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=60, max_rows=3, sweep_every=5)
+    for i in range(5):
+        cache.set(f"key{i}", f"value{i}")
+    
+    # The fifth write swept the table down to the three newest rows
+    assert len(cache) == 3
+    assert cache.get("key1") is None
+    assert [cache.get(f"key{i}") for i in (2, 3, 4)] == ["value2", "value3", "value4"]
+    
+    cache.ttl = -1
+    cache.set("expired", "value")
+    cache.sweep()
+    assert len(cache) == 3
+    assert cache.get("expired") is None
+
+
+def test_response_cache_reads_the_shared_tier_off_the_event_loop(tmp_path):
+    shared = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    writer = ResponseCache(maxsize=10, shared=shared)
+    reader = ResponseCache(maxsize=10, shared=shared)
+    
+    async def roundtrip():
+        await writer.set("key", "value")
+        return await reader.get("key"), await reader.get("key")
+    
+    assert asyncio.run(roundtrip()) == ("value", "value")
+    assert (reader.shared_hits, reader.memory_hits) == (1, 1)
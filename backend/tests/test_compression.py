@@ -0,0 +1,81 @@
+import asyncio
+import gzip
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+import main
+from responses import CompressionMiddleware
+
+
+def _client(minimum_size=500):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+    
+    @app.get("/text/{size}")
+    async def text(size: int):
+        return PlainTextResponse("x" * size, headers={"ETag": '"abc"'})
+    
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("encoding, decompress", [("gzip", gzip.decompress), ("br", brotli.decompress)])
+def test_responses_above_the_threshold_are_compressed(encoding, decompress):
+    with _client().stream("GET", "/text/2000", headers={"Accept-Encoding": encoding}) as response:
+        raw = b"".join(response.iter_raw())
+    
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["etag"] == 'W/"abc"'
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) == len(raw) < 2000
+    assert decompress(raw) == b"x" * 2000
+
+
+def test_small_responses_and_unsupported_encodings_are_sent_as_is():
+    client = _client()
+    
+    small = client.get("/text/100", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in small.headers
+    assert small.headers["etag"] == '"abc"'
+    
+    identity = client.get("/text/2000", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+
+@pytest.mark.parametrize("media_type", ["text/event-stream", "application/x-ndjson"])
+def test_streamed_responses_are_not_buffered(media_type):
+    sent = []
+    release = asyncio.Event()
+    
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", media_type.encode())]})
+        await send({"type": "http.response.body", "body": b"x" * 2000, "more_body": True})
+        await release.wait()
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    
+    async def send(message):
+        sent.append(message)
+    
+    async def scenario():
+        scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip, br")]}
+        call = asyncio.create_task(CompressionMiddleware(app, minimum_size=500)(scope, None, send))
+        await asyncio.sleep(0.01)
+        
+        # The first event reached the client, uncompressed, before the stream ended
+        assert [message["type"] for message in sent] == ["http.response.start", "http.response.body"]
+        assert sent[1]["body"] == b"x" * 2000
+        assert all(name != b"content-encoding" for name, _ in sent[0]["headers"])
+        
+        release.set()
+        await call
+        assert len(sent) == 3
+    
+    asyncio.run(scenario())
+
+
+def test_compression_is_off_unless_configured():
+    assert main.settings.compression_min_size is None
+    assert all(middleware.cls is not CompressionMiddleware for middleware in main.app.user_middleware)
@@ -0,0 +1,37 @@
+import asyncio
+
+import httpx
+
+import main
+
+LOANS = [
+    {"id": "a", "name": "Bank A", "principal": 500000, "interest_rate": 9.5, "tenure_months": 60},
+    {"id": "b", "name": "Bank B", "principal": 500000, "interest_rate": 11.0, "tenure_months": 60}
+]
+
+
+def test_deferred_insight_survives_eviction_until_finished(fake_model):
+    fake_model.delay = 0.05
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/compare-loans", json={"loans": LOANS, "insight_mode": "deferred"})
+            insight_id = response.json()["insight_id"]
+            
+            # Clearing the expiring store must not drop an insight still being generated
+            main.insight_tasks.clear()
+            pending = (await client.get(f"/api/compare-loans/insight/{insight_id}")).json()
+            assert pending["insight_status"] == "pending"
+            assert insight_id in main.running_insights
+            
+            await asyncio.sleep(0.1)
+            ready = (await client.get(f"/api/compare-loans/insight/{insight_id}")).json()
+            assert ready == {"insight_id": insight_id, "insight_status": "ready", "ai_insight": "model answer"}
+            assert insight_id not in main.running_insights
+            
+            # Finished insights expire with the store
+            main.insight_tasks.clear()
+            assert (await client.get(f"/api/compare-loans/insight/{insight_id}")).status_code == 404
+    
+    asyncio.run(scenario())
@@ -0,0 +1,25 @@
+import logging
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_failed_ai_preload_is_kept_and_reported(monkeypatch, caplog):
+    def broken_get_model():
+        raise RuntimeError("SDK import failed")
+    
+    monkeypatch.setattr(main.settings, "ai_preload", True)
+    monkeypatch.setattr(main, "get_model", broken_get_model)
+    
+    with caplog.at_level(logging.WARNING, logger="loan_optimizer"):
+        with TestClient(main.app) as client:
+            assert client.get("/api/health").status_code == 200
+            preload = main.app.state.ai_preload
+            deadline = time.monotonic() + 5
+            while not preload.done() and time.monotonic() < deadline:
+                time.sleep(0.01)
+    
+    assert preload.done()
+    assert "SDK import failed" in caplog.text
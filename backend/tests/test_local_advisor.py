@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+import ai_service
+import local_advisor
+
+
+@pytest.mark.parametrize("text, term", [
+    ("EMI", "EMI"),
+    ("emis", "EMI"),
+    ("What is an EMI?", "EMI"),
+    ("what does FOIR mean", "FOIR"),
+    ("Equated Monthly Installment", "EMI"),
+    ("loan term", "Tenure"),
+    ("processing fees", "Processing fee"),
+    ("prepayemnt", "Prepayment"),
+])
+def test_lookup_matches_whole_terms(text, term):
+    assert local_advisor.lookup(text)["term"] == term
+
+
+@pytest.mark.parametrize("text", [
+    "compound interest",
+    "term insurance",
+    "security deposit",
+    "interest",
+    "personal loan interest",
+    "",
+])
+def test_lookup_ignores_partial_matches(text):
+    assert local_advisor.lookup(text) is None
+
+
+@pytest.mark.parametrize("term", ["compound interest", "term insurance", "security deposit"])
+def test_partial_matches_go_to_the_model(fake_model, term):
+    assert asyncio.run(ai_service.explain_financial_term(term)) == "model answer"
+    assert fake_model.calls == 1
+
+
+def test_known_terms_are_answered_locally(fake_model):
+    explanation = asyncio.run(ai_service.explain_financial_term("tenure", {"amount": "10,00,000", "rate": "8.5"}))
+    assert explanation.startswith("Tenure is")
+    assert "₹1,000,000 at 8.5%" in explanation
+    assert fake_model.calls == 0
+
+
+LOANS = [
+    {"name": "A", "emi": 10379.18, "total_interest": 122750.66, "total_cost": 627750.66, "tenure": 60, "processing_fee": 5000, "score": 65.0},
+    {"name": "B", "emi": 8561.22, "total_interest": 219142.33, "total_cost": 719142.33, "tenure": 84, "processing_fee": 0, "score": 35.0}
+]
+
+
+def test_comparative_insight_asks_the_model(fake_model):
+    assert asyncio.run(ai_service.get_comparative_insight(LOANS)) == "model answer"
+    assert fake_model.calls == 1
+
+
+def test_comparative_insight_local_only(fake_model, monkeypatch):
+    monkeypatch.setattr(ai_service.settings, "ai_routing", "local_only")
+    insight = asyncio.run(ai_service.get_comparative_insight(LOANS))
+    assert insight.startswith("Choosing A over B saves you ₹96,392 in total interest")
+    assert fake_model.calls == 0
@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+
+import main
+from cache import MemoCache
+
+
+LOAN = {"principal": 500000, "interest_rate": 10, "tenure_months": 60}
+
+
+def test_repeat_request_with_etag_gets_304():
+    client = TestClient(main.app)
+    main.calculation_memo.clear()
+    
+    first = client.post("/api/calculate-emi", json=LOAN)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    
+    repeat = client.post("/api/calculate-emi", json=LOAN, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.headers["etag"] == etag
+    assert repeat.content == b""
+    
+    changed = client.post("/api/calculate-emi", json={**LOAN, "tenure_months": 61}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_memo_evicts_least_recently_used_entries():
+    memo = MemoCache(maxsize=2, max_bytes=10 ** 6)
+    memo.set("a", '"1"', b"{}")
+    memo.set("b", '"2"', b"{}")
+    memo.get("a")
+    memo.set("c", '"3"', b"{}")
+    
+    assert memo.get("b") is None
+    assert memo.get("a") == ('"1"', b"{}")
+    assert len(memo) == 2
+
+
+def test_memo_stays_within_its_byte_budget():
+    memo = MemoCache(maxsize=100, max_bytes=100)
+    for key in ("a", "b", "c"):
+        memo.set(key, '"tag"', b"x" * 39)
+    
+    # Each entry takes 40 bytes (key and body), so only the two newest fit
+    assert memo.get("a") is None
+    assert memo.total_bytes == 80
+    
+    memo.set("huge", '"tag"', b"x" * 200)
+    assert memo.get("huge") is None
+    assert memo.total_bytes == 80
@@ -0,0 +1,91 @@
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+import main
+from calculations import calculate_prepayment_impact
+from models import AIStrategyRequest, PrepaymentOptimizerRequest
+from optimizer import no_prepayment_plan, optimize_prepayments
+from simulation import simulate_prepayment_plan
+
+
+LOAN = {"principal": 500000, "interest_rate": 10, "tenure_months": 60}
+
+
+def test_no_prepayment_plan_is_the_loan_as_it_stands():
+    plan = no_prepayment_plan(500000, 10, 60)
+    
+    assert plan["prepayments"] == []
+    assert plan["interest_saved"] == 0
+    assert plan["new_tenure"] == plan["original_tenure"] == 60
+    assert plan["new_total_interest"] == plan["original_total_interest"]
+
+
+@pytest.mark.parametrize("model, fields", [
+    (PrepaymentOptimizerRequest, {"current_loan": LOAN, "available_savings": 1000, "timeline_months": 10 ** 6}),
+    (PrepaymentOptimizerRequest, {"current_loan": {**LOAN, "tenure_months": 10 ** 6}, "available_savings": 1000, "timeline_months": 12}),
+    (AIStrategyRequest, {"current_loan": LOAN, "available_savings": 1000, "financial_goal": "", "timeline_months": 10 ** 6}),
+])
+def test_optimizer_requests_are_bounded(model, fields):
+    with pytest.raises(ValidationError):
+        model(**fields)
+
+
+def _replay(plan, reduce_emi=False):
+    events = [{"type": "lump_sum", **prepayment} for prepayment in plan["prepayments"]]
+    return simulate_prepayment_plan(500000, 10, 60, events, reduce_emi)
+
+
+@pytest.mark.parametrize("savings_schedule, reduce_emi", [("monthly", False), ("monthly", True), ("upfront", False)])
+def test_plan_totals_match_the_simulator(savings_schedule, reduce_emi):
+    plan = optimize_prepayments(
+        500000, 10, 60, 120000, 24,
+        emergency_reserve=0.25,
+        savings_schedule=savings_schedule,
+        reduce_emi=reduce_emi
+    )
+    simulated = _replay(plan, reduce_emi)
+    
+    assert sum(prepayment["amount"] for prepayment in plan["prepayments"]) == pytest.approx(90000, abs=0.05)
+    assert plan["emergency_reserve"] == 30000
+    assert plan["interest_saved"] == pytest.approx(simulated["interest_saved"], abs=0.01)
+    assert plan["new_total_interest"] == pytest.approx(simulated["total_interest"], abs=0.01)
+    assert plan["new_tenure"] == simulated["payoff_month"]
+
+
+def test_upfront_savings_are_prepaid_at_once():
+    plan = optimize_prepayments(500000, 10, 60, 100000, 24, savings_schedule="upfront")
+    impact = calculate_prepayment_impact(500000, 10, 60, 100000, 1)
+    
+    assert plan["prepayments"] == [{"month": 1, "amount": 100000}]
+    assert plan["interest_saved"] == pytest.approx(impact["interest_saved"], abs=0.02)
+
+
+def test_plan_saves_at_least_as_much_as_simple_schedules():
+    plan = optimize_prepayments(500000, 10, 60, 120000, 24, max_prepayments=4)
+    alternatives = [
+        [{"month": 24, "amount": 120000}],
+        [{"month": 12, "amount": 60000}, {"month": 24, "amount": 60000}],
+        [{"month": month, "amount": 30000} for month in (6, 12, 18, 24)]
+    ]
+    
+    for prepayments in alternatives:
+        assert plan["interest_saved"] >= _replay({"prepayments": prepayments})["interest_saved"] - 0.01
+
+
+@pytest.mark.parametrize("loan, savings", [({**LOAN, "tenure_months": 1}, 50000), (LOAN, 0)])
+def test_strategy_without_anything_to_optimize_keeps_the_loan(fake_model, loan, savings):
+    response = TestClient(main.app).post("/api/ai-strategy", json={
+        "current_loan": loan,
+        "available_savings": savings,
+        "financial_goal": "Close the loan early",
+        "timeline_months": 12
+    })
+    
+    assert response.status_code == 200
+    assert response.json()["plan"]["prepayments"] == []
+
+
+def test_strategy_timeline_must_be_positive():
+    with pytest.raises(ValidationError):
+        AIStrategyRequest(current_loan=LOAN, available_savings=1000, financial_goal="", timeline_months=0)
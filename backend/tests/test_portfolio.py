@@ -0,0 +1,46 @@
+import csv
+
+import pytest
+
+import portfolio
+
+
+HEADER = "principal,interest_rate,tenure_months,prepayment_amount,prepayment_month\n"
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "loans.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def test_blank_chunk_is_skipped(tmp_path):
+    # With 2-row chunks the middle chunk holds only blank lines
+    source = _write(tmp_path, HEADER + "100000,10,12,,\n200000,9,24,,\n\n\n300000,8,36,50000,12\n")
+    output = str(tmp_path / "results.csv")
+    
+    summary = portfolio.analyze_portfolio(source, output, chunk_size=2, workers=1)
+    
+    assert summary["rows"] == 3
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    # Default ids are the file's data row numbers, blank lines included
+    assert [row["id"] for row in rows] == ["1", "2", "5"]
+    assert rows[2]["interest_saved"] != ""
+
+
+def test_blank_file_has_no_rows(tmp_path):
+    source = _write(tmp_path, HEADER + "\n\n")
+    with pytest.raises(portfolio.PortfolioError, match="no loan rows"):
+        portfolio.analyze_portfolio(source, str(tmp_path / "results.csv"), workers=1)
+
+
+@pytest.mark.parametrize("text, message", [
+    (HEADER + "100000,10,12,,\n\n\nabc,10,12,,\n", "Row 4: principal must be a number"),
+    (HEADER + "100000,10,12,,\n\n100000,-1,12,,\n", "Row 3: interest_rate must be between 0 and 100"),
+    (HEADER + "\n100000,10\n", "Row 2: expected at least 5 fields, got 2"),
+])
+def test_errors_report_file_row_numbers(tmp_path, text, message):
+    source = _write(tmp_path, text)
+    with pytest.raises(portfolio.PortfolioError, match=message):
+        portfolio.analyze_portfolio(source, str(tmp_path / "results.csv"), chunk_size=10, workers=1)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from calculations import calculate_prepayment_impact, calculate_prepayment_impact_batch
+from models import PrepaymentTimingRequest
+from simulation import simulate_prepayment_plan
+
+
+PLANS = [
+    (500000, 10, 24, 100000, 12, False),
+    (5000000, 9.5, 240, 500000, 24, False),
+    (5000000, 9.5, 240, 500000, 24, True),
+    (500000, 12, 60, 100000, 10, True),
+    (500000, 12, 60, 10000000, 10, False),
+    (500000, 0, 24, 100000, 12, False),
+]
+
+
+@pytest.mark.parametrize("principal, rate, tenure, amount, month, reduce_emi", PLANS)
+def test_prepayment_impact_matches_simulator(principal, rate, tenure, amount, month, reduce_emi):
+    impact = calculate_prepayment_impact(principal, rate, tenure, amount, month, reduce_emi)
+    simulated = simulate_prepayment_plan(
+        principal,
+        rate,
+        tenure,
+        [{"type": "lump_sum", "month": month, "amount": amount}],
+        reduce_emi
+    )
+    
+    assert impact["interest_saved"] == pytest.approx(simulated["interest_saved"], abs=0.02)
+    assert impact["new_total_interest"] == pytest.approx(simulated["total_interest"], abs=0.02)
+    assert impact["original_total_interest"] == pytest.approx(simulated["original_total_interest"], abs=0.02)
+    assert impact["new_tenure"] == simulated["payoff_month"]
+    assert impact["new_emi"] == simulated["final_emi"]
+
+
+def test_valid_prepayment_saves_interest():
+    impact = calculate_prepayment_impact(500000, 10, 24, 100000, 12)
+    assert impact["interest_saved"] == pytest.approx(8755.51, abs=0.01)
+
+
+@pytest.mark.parametrize("principal, rate, tenure, amount, month, reduce_emi", PLANS)
+def test_batch_matches_scalar(principal, rate, tenure, amount, month, reduce_emi):
+    impact = calculate_prepayment_impact(principal, rate, tenure, amount, month, reduce_emi)
+    batch = calculate_prepayment_impact_batch(principal, rate, tenure, amount, month, reduce_emi)
+    
+    for key in ("new_emi", "new_total_interest", "interest_saved"):
+        assert float(batch[key]) == pytest.approx(impact[key], abs=0.01)
+    for key in ("new_tenure", "months_saved", "break_even_months"):
+        assert int(batch[key]) == impact[key]
+
+
+@pytest.mark.parametrize("reduce_emi", [False, True])
+def test_zero_rate_batch_has_no_savings_or_break_even(reduce_emi):
+    months = np.arange(1, 240)
+    with np.errstate(all="raise"):
+        batch = calculate_prepayment_impact_batch(500000, 0, 240, 100000, months, reduce_emi)
+    
+    assert not batch["interest_saved"].any()
+    assert not batch["break_even_months"].any()
+    assert calculate_prepayment_impact(500000, 0, 240, 100000, 10, reduce_emi)["break_even_months"] == 0
+
+
+@pytest.mark.parametrize("fields", [
+    {"tenure_months": 10 ** 9},
+    {"tenure_months": 240, "months": list(range(1, 240)) * 3},
+])
+def test_timing_requests_are_bounded(fields):
+    with pytest.raises(ValidationError):
+        PrepaymentTimingRequest(principal=500000, interest_rate=10, prepayment_amount=100000, **fields)
@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+import main
+from calculations import calculate_emi
+from models import MAX_TENURE_MONTHS, RefinanceRequest
+from refinance import analyze_refinance
+
+
+LOAN = {"principal": 5000000, "interest_rate": 11, "tenure_months": 240}
+
+OFFERS = [
+    {"id": "cheap", "name": "Lower rate", "interest_rate": 8.5, "tenure_months": 180, "processing_fee": 25000},
+    {"id": "longer", "name": "Longer tenure", "interest_rate": 9.5, "tenure_months": 300, "processing_fee": 10000},
+    {"id": "costly", "name": "High fee", "interest_rate": 10.8, "tenure_months": 180, "processing_fee": 400000},
+]
+
+
+def _interest_by_month(balance, annual_rate, tenure, months):
+    """
+    Cumulative interest after each month, paying the EMI month by month; the last payment
+    clears the balance and nothing is paid after it.
+    """
+    monthly_rate = annual_rate / 12 / 100
+    emi = calculate_emi(balance, annual_rate, tenure)['emi']
+    paid = 0.0
+    cumulative = []
+    for month in range(1, months + 1):
+        if month <= tenure:
+            interest = balance * monthly_rate
+            balance = 0.0 if month == tenure else balance - (emi - interest)
+            paid += interest
+        cumulative.append(paid)
+    return cumulative
+
+
+def _balance_after(principal, annual_rate, tenure, months):
+    monthly_rate = annual_rate / 12 / 100
+    emi = calculate_emi(principal, annual_rate, tenure)['emi']
+    balance = principal
+    for _ in range(months):
+        balance -= emi - balance * monthly_rate
+    return balance
+
+
+@pytest.mark.parametrize("months_elapsed", [0, 36, 120])
+def test_break_even_and_net_savings_match_a_monthly_simulation(months_elapsed):
+    result = analyze_refinance(LOAN, months_elapsed, OFFERS)
+    balance = _balance_after(LOAN["principal"], LOAN["interest_rate"], LOAN["tenure_months"], months_elapsed)
+    remaining = LOAN["tenure_months"] - months_elapsed
+    horizon = max(remaining, max(offer["tenure_months"] for offer in OFFERS))
+    stay = _interest_by_month(balance, LOAN["interest_rate"], remaining, horizon)
+    
+    assert result["current"]["remaining_balance"] == pytest.approx(balance, abs=0.01)
+    assert result["current"]["remaining_interest"] == pytest.approx(stay[-1], abs=0.05)
+    
+    analyzed = {offer["id"]: offer for offer in result["offers"]}
+    for offer in OFFERS:
+        switch = _interest_by_month(balance, offer["interest_rate"], offer["tenure_months"], horizon)
+        advantage = [s - w - offer["processing_fee"] for s, w in zip(stay, switch)]
+        break_even = next((month for month, value in enumerate(advantage, start=1) if value >= 0), None)
+        
+        assert analyzed[offer["id"]]["break_even_month"] == break_even
+        assert analyzed[offer["id"]]["net_savings"] == pytest.approx(advantage[-1], abs=0.05)
+
+
+def test_horizon_savings_match_a_monthly_simulation():
+    result = analyze_refinance(LOAN, 36, OFFERS, horizon_months=60)
+    balance = _balance_after(LOAN["principal"], LOAN["interest_rate"], LOAN["tenure_months"], 36)
+    stay = _interest_by_month(balance, LOAN["interest_rate"], 204, 60)
+    
+    for analyzed in result["offers"]:
+        offer = next(offer for offer in OFFERS if offer["id"] == analyzed["id"])
+        switch = _interest_by_month(balance, offer["interest_rate"], offer["tenure_months"], 60)
+        expected = stay[-1] - switch[-1] - offer["processing_fee"]
+        assert analyzed["net_savings_at_horizon"] == pytest.approx(expected, abs=0.05)
+
+
+@pytest.mark.parametrize("fields", [
+    {"current_loan": {**LOAN, "tenure_months": MAX_TENURE_MONTHS + 1}, "months_elapsed": 0, "offers": OFFERS},
+    {"current_loan": LOAN, "months_elapsed": 0, "offers": [{**OFFERS[0], "tenure_months": 10 ** 9}]},
+])
+def test_refinance_tenures_are_bounded(fields):
+    with pytest.raises(ValidationError):
+        RefinanceRequest(**fields)
+
+
+def test_offer_count_is_limited(monkeypatch):
+    monkeypatch.setattr(main.settings, "max_refinance_offers", 2)
+    response = TestClient(main.app).post("/api/refinance", json={"current_loan": LOAN, "months_elapsed": 0, "offers": OFFERS})
+    
+    assert response.status_code == 400
+    assert "Maximum 2 offers" in response.json()["detail"]
@@ -0,0 +1,13 @@
+import json
+
+import pytest
+
+from calculations import amortization_schedule
+
+
+@pytest.mark.parametrize("tenure, offset, limit", [(1, 0, None), (24, 0, None), (480, 100, 50), (12, 12, None)])
+def test_json_exports_match_the_row_view(tenure, offset, limit):
+    schedule = amortization_schedule(5000000, 9.5, tenure, offset, limit)
+    
+    assert json.loads(schedule.to_json()) == schedule.to_rows()
+    assert [json.loads(line) for line in schedule.to_ndjson().splitlines()] == schedule.to_rows()
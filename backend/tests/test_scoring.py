@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from calculations import DEFAULT_WEIGHTS, calculate_emi, compare_loans, normalize_weights, rank_loans
+
+
+def _loans(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"loan_{i}",
+            "name": f"Lender {i}",
+            "principal": rng.choice([500000, 1000000, 5000000]),
+            "interest_rate": round(rng.uniform(7.5, 16.0), 2),
+            "tenure_months": rng.choice([60, 120, 240]),
+            "processing_fee": rng.choice([0, 2000, 10000])
+        }
+        for i in range(count)
+    ]
+
+
+def _legacy_ranking(loans):
+    """
+    The original per-loan MCDA: each metric min-max normalized with lower values scoring higher,
+    weighted with DEFAULT_WEIGHTS and sorted by score.
+    """
+    rows = []
+    for loan in loans:
+        emi = calculate_emi(loan["principal"], loan["interest_rate"], loan["tenure_months"])
+        rows.append({
+            "id": loan["id"],
+            "interest": emi["total_interest"],
+            "emi": emi["emi"],
+            "total_cost": emi["total_payment"] + loan["processing_fee"],
+            "tenure": loan["tenure_months"],
+            "processing_fee": loan["processing_fee"]
+        })
+    
+    def normalized(row, key):
+        values = [other[key] for other in rows]
+        if max(values) == min(values):
+            return 50.0
+        return 100 - (row[key] - min(values)) / (max(values) - min(values)) * 100
+    
+    for row in rows:
+        row["score"] = round(sum(normalized(row, key) * weight for key, weight in DEFAULT_WEIGHTS.items()), 2)
+    rows.sort(key=lambda row: row["score"], reverse=True)
+    return rows
+
+
+@pytest.mark.parametrize("count", [2, 10, 200])
+def test_ranking_matches_per_loan_scoring(count):
+    loans = _loans(count)
+    ranked = compare_loans(loans)
+    legacy = _legacy_ranking(loans)
+    
+    assert [loan["id"] for loan in ranked] == [row["id"] for row in legacy]
+    for loan, row in zip(ranked, legacy):
+        assert loan["score"] == pytest.approx(row["score"], abs=0.01)
+        assert loan["total_cost"] == pytest.approx(row["total_cost"], abs=0.01)
+    assert ranked[0]["badge"] == "Best Overall"
+    assert [loan["rank"] for loan in ranked] == list(range(1, count + 1))
+
+
+def test_weights_are_filled_in_and_rescaled():
+    weights = normalize_weights({"interest": 1.0, "emi": 1.0, "total_cost": 0, "tenure": 0, "processing_fee": 0})
+    assert weights == {"interest": 0.5, "emi": 0.5, "total_cost": 0.0, "tenure": 0.0, "processing_fee": 0.0}
+    
+    partial = normalize_weights({"interest": 0.7})
+    assert sum(partial.values()) == pytest.approx(1.0)
+    assert partial["interest"] / partial["emi"] == pytest.approx(0.7 / DEFAULT_WEIGHTS["emi"])
+    
+    # Scaling every weight by the same factor ranks loans the same way
+    loans = _loans(20)
+    doubled = {key: weight * 2 for key, weight in DEFAULT_WEIGHTS.items()}
+    assert compare_loans(loans, doubled) == compare_loans(loans)
+
+
+@pytest.mark.parametrize("weights, message", [
+    ({key: 0 for key in DEFAULT_WEIGHTS}, "At least one weight must be positive"),
+    ({"interest": -1}, "non-negative"),
+    ({"color": 1}, "Unknown weight"),
+])
+def test_invalid_weights_are_rejected(weights, message):
+    with pytest.raises(ValueError, match=message):
+        compare_loans(_loans(3), weights)
+
+
+def test_ties_keep_input_order():
+    loan = {"name": "Same terms", "principal": 500000, "interest_rate": 10, "tenure_months": 60, "processing_fee": 0}
+    loans = [{**loan, "id": name} for name in ("c", "a", "b")] + [{**loan, "id": "worse", "interest_rate": 12}]
+    
+    assert [result["id"] for result in compare_loans(loans)] == ["c", "a", "b", "worse"]
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 50])
+def test_top_k_returns_the_leaders_of_the_full_ranking(top_k):
+    loans = _loans(500)
+    full = rank_loans(loans)
+    top = rank_loans(loans, top_k=top_k)
+    
+    assert top["comparisons"] == full["comparisons"][:top_k]
+    assert top["total_compared"] == full["total_compared"] == 500
+    assert top["bounds"] == full["bounds"]
+
+
+def test_top_k_keeps_tied_leaders_in_input_order():
+    loan = {"name": "Same terms", "principal": 500000, "interest_rate": 10, "tenure_months": 60, "processing_fee": 0}
+    loans = [{**loan, "id": "worse", "interest_rate": 12}] + [{**loan, "id": name} for name in ("c", "a", "b")]
+    
+    assert [result["id"] for result in rank_loans(loans, top_k=2)["comparisons"]] == ["c", "a"]
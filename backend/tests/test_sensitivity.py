@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from calculations import calculate_emi, emi_sensitivity_grid
+
+
+PRINCIPALS = [500000, 5000000]
+RATES = [0, 7.5, 12]
+TENURES = [12, 120, 360]
+
+
+def _emi(principal, annual_rate, months):
+    """
+    Unrounded EMI with the tenure treated as continuous, for finite differences.
+    """
+    rate = annual_rate / 1200
+    if rate == 0:
+        return principal / months
+    growth = (1 + rate) ** months
+    return principal * rate * growth / (growth - 1)
+
+
+def _interest(principal, annual_rate, months):
+    return months * _emi(principal, annual_rate, months) - principal
+
+
+def test_grid_matches_calculate_emi():
+    grid = emi_sensitivity_grid(PRINCIPALS, RATES, TENURES)
+    
+    assert grid["emi"].shape == (len(RATES), len(TENURES), len(PRINCIPALS))
+    for i, rate in enumerate(RATES):
+        for j, tenure in enumerate(TENURES):
+            for k, principal in enumerate(PRINCIPALS):
+                expected = calculate_emi(principal, rate, tenure)
+                assert grid["emi"][i, j, k] == pytest.approx(expected["emi"], abs=0.01)
+                assert grid["total_interest"][i, j, k] == pytest.approx(expected["total_interest"], abs=0.01)
+
+
+def test_sensitivities_match_finite_differences():
+    rate_step, tenure_step = 0.01, 1
+    grid = emi_sensitivity_grid(PRINCIPALS, RATES, TENURES, rate_step, tenure_step)
+    h = 1e-4
+    
+    for i, rate in enumerate(RATES):
+        for j, tenure in enumerate(TENURES):
+            for k, principal in enumerate(PRINCIPALS):
+                # Central differences; at 0% the rate is only nudged upwards
+                low = max(rate - h, 0)
+                per_rate = (_emi(principal, rate + h, tenure) - _emi(principal, low, tenure)) / (rate + h - low)
+                per_month = (_emi(principal, rate, tenure + h) - _emi(principal, rate, tenure - h)) / (2 * h)
+                interest_per_rate = (_interest(principal, rate + h, tenure) - _interest(principal, low, tenure)) / (rate + h - low)
+                interest_per_month = (_interest(principal, rate, tenure + h) - _interest(principal, rate, tenure - h)) / (2 * h)
+                
+                cell = (i, j, k)
+                assert grid["emi_per_rate_step"][cell] == pytest.approx(per_rate * rate_step, rel=1e-3, abs=0.01)
+                assert grid["emi_per_tenure_step"][cell] == pytest.approx(per_month * tenure_step, rel=1e-3, abs=0.01)
+                assert grid["interest_per_rate_step"][cell] == pytest.approx(interest_per_rate * rate_step, rel=1e-3, abs=0.01)
+                assert grid["interest_per_tenure_step"][cell] == pytest.approx(interest_per_month * tenure_step, rel=1e-3, abs=0.01)
+
+
+def test_oversized_grid_is_rejected(monkeypatch):
+    monkeypatch.setattr(main.settings, "max_grid_cells", 17)
+    client = TestClient(main.app)
+    request = {"principals": PRINCIPALS, "interest_rates": RATES, "tenure_months": TENURES}
+    
+    response = client.post("/api/sensitivity-grid", json=request)
+    assert response.status_code == 400
+    assert "Maximum 17 grid cells" in response.json()["detail"]
+    
+    monkeypatch.setattr(main.settings, "max_grid_cells", 18)
+    response = client.post("/api/sensitivity-grid", json=request)
+    assert response.status_code == 200
+    assert response.json()["shape"] == [3, 3, 2]
+    assert np.asarray(response.json()["emi"]).shape == (3, 3, 2)
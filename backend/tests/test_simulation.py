@@ -0,0 +1,40 @@
+import pytest
+
+from calculations import amortization_totals
+from simulation import simulate_loan, simulate_prepayment_plan
+
+
+def test_recurring_top_ups_count_towards_the_event_limit():
+    events = [{"type": "recurring", "month": 1, "amount": 1000, "interval_months": 2, "end_month": 59}]
+    simulate_loan(500000, 10, 60, events, max_events=30)
+    with pytest.raises(ValueError, match="Maximum 29 events"):
+        simulate_loan(500000, 10, 60, events, max_events=29)
+
+
+def test_recurring_end_month_is_clamped_to_the_tenure():
+    far = [{"type": "recurring", "month": 1, "amount": 1000, "interval_months": 3, "end_month": 10 ** 12}]
+    near = [{"type": "recurring", "month": 1, "amount": 1000, "interval_months": 3, "end_month": 60}]
+    
+    assert simulate_prepayment_plan(500000, 10, 60, far, max_events=1000) == simulate_prepayment_plan(500000, 10, 60, near)
+
+
+@pytest.mark.parametrize("principal, rate, tenure", [(500000, 10, 60), (5000000, 9.5, 240), (300000, 0, 36)])
+def test_loan_without_events_matches_closed_form_totals(principal, rate, tenure):
+    simulated = simulate_loan(principal, rate, tenure)
+    totals = amortization_totals(principal, rate, tenure)
+    
+    assert simulated["payoff_month"] == tenure
+    assert simulated["total_interest"] == pytest.approx(totals["total_interest"], abs=0.02)
+
+
+@pytest.mark.parametrize("reduce_emi", [False, True])
+def test_recurring_top_ups_match_the_same_lump_sums(reduce_emi):
+    recurring = [{"type": "recurring", "month": 6, "amount": 20000, "interval_months": 6, "end_month": 48}]
+    lump_sums = [{"type": "lump_sum", "month": month, "amount": 20000} for month in range(6, 49, 6)]
+    
+    expanded = simulate_prepayment_plan(500000, 10, 60, recurring, reduce_emi)
+    explicit = simulate_prepayment_plan(500000, 10, 60, lump_sums, reduce_emi)
+    
+    for key in ("total_interest", "total_prepaid", "interest_saved", "final_emi"):
+        assert expanded[key] == pytest.approx(explicit[key], abs=0.01)
+    assert expanded["payoff_month"] == explicit["payoff_month"]
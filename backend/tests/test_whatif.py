@@ -0,0 +1,36 @@
+import pytest
+from pydantic import ValidationError
+
+from calculations import calculate_prepayment_impact
+from models import WhatIfParameters
+from whatif import session_results, start_session, update_session
+
+
+LOAN = {"principal": 500000, "interest_rate": 10, "tenure_months": 24, "prepayment_amount": 0, "prepayment_month": 0, "reduce_emi": False}
+
+
+def test_prepayment_totals_come_from_the_schedule():
+    state = start_session({**LOAN, "prepayment_amount": 100000, "prepayment_month": 12})
+    results = session_results(state)
+    prepayment = results["prepayment"]
+    
+    assert prepayment["interest_saved"] > 0
+    assert prepayment["new_total_interest"] == pytest.approx(sum(row["interest_payment"] for row in results["schedule"]), abs=0.01)
+    assert prepayment["new_tenure"] == len(results["schedule"]) == 20
+    assert results["schedule"][-1]["remaining_balance"] == 0
+    # Row rounding aside, the schedule agrees with the closed form
+    assert prepayment["interest_saved"] == pytest.approx(calculate_prepayment_impact(500000, 10, 24, 100000, 12)["interest_saved"], abs=1)
+
+
+def test_update_diff_reports_positive_savings():
+    state = start_session(LOAN)
+    update = update_session(state, {"prepayment_amount": 100000, "prepayment_month": 12})
+    
+    assert update["changed"] == ["prepayment_amount", "prepayment_month"]
+    assert update["diff"]["prepayment"]["interest_saved"] > 0
+    assert update["diff"]["schedule"]["from_month"] == 12
+
+
+def test_tenure_is_bounded():
+    with pytest.raises(ValidationError):
+        WhatIfParameters(principal=500000, interest_rate=10, tenure_months=10 ** 7)
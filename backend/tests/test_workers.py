@@ -0,0 +1,29 @@
+import asyncio
+import math
+
+import pytest
+
+from workers import WorkerPool
+
+
+def test_failed_jobs_are_not_counted_as_completed():
+    pool = WorkerPool(workers=1)
+    
+    async def jobs():
+        assert await pool.run(math.sqrt, 16.0) == 4.0
+        with pytest.raises(ValueError):
+            await pool.run(math.sqrt, -1.0)
+    
+    try:
+        asyncio.run(jobs())
+    finally:
+        pool.shutdown()
+    
+    stats = pool.stats()
+    assert (stats["completed"], stats["failed"], stats["pending"]) == (1, 1, 0)
+
+
+def test_pool_starts_on_first_job():
+    pool = WorkerPool(workers=1)
+    assert pool._executor is None
+    pool.shutdown()
@@ -0,0 +1,162 @@
+from typing import Dict, Tuple
+
+from calculations import (
+    amortization_schedule,
+    break_even_months,
+    calculate_emi,
+    payoff_terms,
+    schedule_columns
+)
+from metrics import timed
+from schedule import AmortizationSchedule
+
+
+LOAN_PARAMETERS = ("principal", "interest_rate", "tenure_months")
+PREPAYMENT_PARAMETERS = ("prepayment_amount", "prepayment_month", "reduce_emi")
+
+
+def _validate(params: Dict) -> None:
+    if params['prepayment_amount'] > 0 and not 0 < params['prepayment_month'] < params['tenure_months']:
+        raise ValueError("Prepayment month must be between 1 and tenure - 1")
+
+
+def _derive_loan(state: Dict) -> None:
+    """
+    Results that depend only on the loan: EMI and the schedule without prepayment.
+    """
+    params = state["params"]
+    state["emi"] = calculate_emi(params['principal'], params['interest_rate'], params['tenure_months'])
+    state["base_schedule"] = amortization_schedule(params['principal'], params['interest_rate'], params['tenure_months'])
+
+
+def _derive_prepayment(state: Dict) -> None:
+    """
+    The effective schedule and the prepayment impact derived from it. Rows up to the
+    prepayment month are taken from the base schedule (that month's balance net of the
+    prepayment), so only the months after it are recomputed.
+    """
+    params = state["params"]
+    base = state["base_schedule"]
+    if params['prepayment_amount'] <= 0:
+        state["prepayment"] = None
+        state["schedule"] = base
+        return
+    
+    month = params['prepayment_month']
+    monthly_rate = params['interest_rate'] / 12 / 100
+    original_emi = state["emi"]['emi']
+    remaining_balance = float(base.remaining_balance[month - 1])
+    new_principal = max(0.0, remaining_balance - params['prepayment_amount'])
+    remaining_tenure = params['tenure_months'] - month
+    
+    if params['reduce_emi']:
+        new_emi = calculate_emi(new_principal, params['interest_rate'], remaining_tenure)['emi']
+    else:
+        new_emi = original_emi
+    tail_months = int(payoff_terms(new_principal, monthly_rate, new_emi)[0])
+    
+    tail = schedule_columns(
+        new_principal,
+        monthly_rate,
+        new_emi,
+        tail_months,
+        month_offset=month
+    ) if tail_months > 0 else base[0:0]
+    
+    schedule = AmortizationSchedule.concat(base[:month], tail)
+    schedule.remaining_balance[month - 1] = round(new_principal, 2)
+    
+    original_total_interest = float(base.interest_payment.sum())
+    new_total_interest = float(schedule.interest_payment.sum())
+    interest_saved = original_total_interest - new_total_interest
+    state["prepayment"] = {
+        "original_emi": original_emi,
+        "new_emi": round(new_emi, 2),
+        "original_total_interest": round(original_total_interest, 2),
+        "new_total_interest": round(new_total_interest, 2),
+        "interest_saved": round(interest_saved, 2),
+        "original_tenure": params['tenure_months'],
+        "new_tenure": len(schedule),
+        "months_saved": max(0, params['tenure_months'] - len(schedule)),
+        "break_even_months": break_even_months(params['prepayment_amount'], interest_saved, remaining_tenure)
+    }
+    state["schedule"] = schedule
+
+
+@timed()
+def start_session(params: Dict) -> Dict:
+    """
+    Derive every result for a fresh what-if session. Returns the session state.
+    """
+    _validate(params)
+    state = {"params": dict(params), "version": 1}
+    _derive_loan(state)
+    _derive_prepayment(state)
+    return state
+
+
+def session_results(state: Dict) -> Dict:
+    return {
+        "version": state["version"],
+        "params": state["params"],
+        "emi": state["emi"],
+        "prepayment": state["prepayment"],
+        "schedule": state["schedule"].to_rows()
+    }
+
+
+@timed()
+def update_session(state: Dict, changes: Dict) -> Dict:
+    """
+    Apply changed parameters and return only what changed: the EMI if the loan changed,
+    the prepayment fields that moved (None when the prepayment was removed) and the schedule
+    rows from the first month that differs. The state is updated in place.
+    """
+    unknown = set(changes) - set(LOAN_PARAMETERS + PREPAYMENT_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    
+    changed = sorted(key for key, value in changes.items() if state["params"][key] != value)
+    params = {**state["params"], **changes}
+    _validate(params)
+    
+    previous = {key: state[key] for key in ("emi", "prepayment", "schedule")}
+    state["params"] = params
+    if any(key in LOAN_PARAMETERS for key in changed):
+        _derive_loan(state)
+    if changed:
+        _derive_prepayment(state)
+        state["version"] += 1
+    
+    diff = {}
+    if state["emi"] != previous["emi"]:
+        diff["emi"] = state["emi"]
+    
+    if state["prepayment"] is None:
+        if previous["prepayment"] is not None:
+            diff["prepayment"] = None
+    elif state["prepayment"] != previous["prepayment"]:
+        before = previous["prepayment"] or {}
+        diff["prepayment"] = {
+            key: value for key, value in state["prepayment"].items()
+            if before.get(key) != value
+        }
+    
+    first_changed = previous["schedule"].first_difference(state["schedule"])
+    if first_changed is not None:
+        diff["schedule"] = {
+            "from_month": first_changed + 1,
+            "total_months": len(state["schedule"]),
+            "rows": state["schedule"][first_changed:].to_rows()
+        }
+    
+    return {"version": state["version"], "changed": changed, "diff": diff}
+
+
+def apply_update(state: Dict, changes: Dict) -> Tuple[Dict, Dict]:
+    """
+    update_session for the worker pool, where in-place changes are lost: returns the updated
+    state along with the diff.
+    """
+    diff = update_session(state, changes)
+    return state, diff
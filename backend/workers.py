@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+
+
+class PoolSaturated(Exception):
+    """
+    Raised when the pool already holds its maximum number of pending calculations.
+    """
+
+
+class WorkerPool:
+    """
+    Managed process pool for CPU-bound calculations.
+    
+    At most max_pending jobs may be queued or running at once; further jobs are refused with
+    PoolSaturated so a burst fails fast instead of queueing without bound. Workers are spawned
+    rather than forked, since the server process runs threads. Functions and arguments must be
+    picklable, i.e. module-level functions called with plain data. Modules listed in `preload`
+    are imported in the workers at start-up so the first jobs do not pay for it. The processes are
+    spawned on the first job rather than at server start-up.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None, preload: Tuple[str, ...] = ()):
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.preload = preload
+        self._executor = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def start(self) -> None:
+        if self.enabled and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            for _ in range(self.workers):
+                for module in self.preload:
+                    self._executor.submit(importlib.import_module, module)
+    
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        """
+        The underlying executor, started on demand, for pipelines that submit their own chunks
+        from a thread (see portfolio.analyze_portfolio). None when the pool is disabled.
+        """
+        self.start()
+        return self._executor
+    
+    async def run(self, func: Callable, *args):
+        """
+        Run func(*args) in a worker process. Only called from the event loop thread.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturated(f"{self.pending} calculations already pending")
+        
+        self.start()
+        executor = self._executor
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args))
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool for later jobs
+            self.failed += 1
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
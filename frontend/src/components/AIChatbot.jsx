@@ -1,6 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { MessageCircle, Send, X, Sparkles } from 'lucide-react';
-import { chatWithAI } from '../services/api';
+import { streamChatWithAI } from '../services/api';
 
 const AIChatbot = ({ loanContext = null }) => {
   const [isOpen, setIsOpen] = useState(false);
@@ -13,6 +13,7 @@ const AIChatbot = ({ loanContext = null }) => {
   ]);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
+  const [sessionId, setSessionId] = useState(null);
   const messagesEndRef = useRef(null);
 
   const scrollToBottom = () => {
@@ -37,20 +38,24 @@ const AIChatbot = ({ loanContext = null }) => {
     setLoading(true);
 
     try {
-      const conversationHistory = messages.slice(-6).map(msg => ({
-        question: msg.type === 'user' ? msg.text : '',
-        answer: msg.type === 'bot' ? msg.text : ''
-      }));
-
-      const response = await chatWithAI(input, loanContext, conversationHistory);
-
-      const botMessage = {
-        type: 'bot',
-        text: response.answer,
-        timestamp: new Date()
+      // Show the answer as it streams in, growing a single bot message
+      const showAnswer = (text) => {
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          if (last.streaming) {
+            return [...prev.slice(0, -1), { ...last, text }];
+          }
+          return [...prev, { type: 'bot', text, timestamp: new Date(), streaming: true }];
+        });
       };
 
-      setMessages(prev => [...prev, botMessage]);
+      // The server keeps the conversation; only the session id goes with each question
+      const response = await streamChatWithAI(input, loanContext, sessionId, showAnswer);
+      if (response) {
+        showAnswer(response.answer);
+        setSessionId(response.session_id);
+      }
+      setMessages(prev => prev.map(msg => (msg.streaming ? { ...msg, streaming: false } : msg)));
     } catch (error) {
       console.error('Error chatting with AI:', error);
       const errorMessage = {
@@ -58,7 +63,7 @@ const AIChatbot = ({ loanContext = null }) => {
         text: "I apologize, I'm having trouble connecting right now. Please try again in a moment.",
         timestamp: new Date()
       };
-      setMessages(prev => [...prev, errorMessage]);
+      setMessages(prev => [...prev.filter(msg => !msg.streaming), errorMessage]);
     } finally {
       setLoading(false);
     }
@@ -145,7 +150,7 @@ const AIChatbot = ({ loanContext = null }) => {
               </div>
             ))}
             
-            {loading && (
+            {loading && !messages[messages.length - 1].streaming && (
               <div className="flex justify-start">
                 <div className="bg-white text-gray-800 shadow-md px-4 py-3 rounded-2xl rounded-bl-none">
                   <div className="flex gap-2">
@@ -9,6 +9,62 @@ const api = axios.create({
   },
 });
 
+// POST a request answered with server-sent events (EventSource only supports GET);
+// calls onEvent(event, data) for each event as it arrives
+const postEventStream = async (path, body, onEvent) => {
+  const response = await fetch(`${API_URL}${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+    },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      const data = [];
+      block.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+      });
+      if (data.length) onEvent(event, JSON.parse(data.join('\n')));
+    }
+  }
+};
+
+// Follow a streamed AI answer: onText gets the text so far after every token. A fallback
+// event replaces whatever was streamed with the canned answer. Resolves with the "done" data.
+const streamAIText = async (path, body, onText, onEvent = () => {}) => {
+  let text = '';
+  let result = null;
+  await postEventStream(path, body, (event, data) => {
+    if (event === 'token' || event === 'fallback') {
+      text = event === 'token' ? text + data.text : data.text;
+      onText(text);
+    } else if (event === 'done') {
+      result = data;
+    } else {
+      onEvent(event, data);
+    }
+  });
+  return result;
+};
+
 // EMI Calculator
 export const calculateEMI = async (loanData) => {
   const response = await api.post('/api/calculate-emi', loanData);
@@ -61,6 +117,23 @@ export const chatWithAI = async (question, loanContext = null, history = null) =
   return response.data;
 };
 
+// AI Savings Strategy, streamed: onPlan gets the optimizer's plan before the narration starts
+export const streamAIStrategy = async (strategyData, onText, onPlan = () => {}) => {
+  return streamAIText('/api/ai-strategy/stream', strategyData, onText, (event, data) => {
+    if (event === 'plan') onPlan(data);
+  });
+};
+
+// AI Chatbot, streamed: onText gets the answer so far as it is written. The server keeps the
+// history; pass the session_id from the previous answer (null starts a new conversation)
+export const streamChatWithAI = async (question, loanContext = null, sessionId = null, onText = () => {}) => {
+  return streamAIText('/api/ai-chat/stream', {
+    user_question: question,
+    loan_context: loanContext,
+    session_id: sessionId,
+  }, onText);
+};
+
 // Sample Loans
 export const getSampleLoans = async () => {
   const response = await api.get('/api/sample-loans');